@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'admin_api'
+
+urlpatterns = [
+    # User administration endpoints
+    path('users/', views.admin_users, name='admin_users'),
+]
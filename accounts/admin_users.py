@@ -0,0 +1,44 @@
+"""
+Queries behind the admin user list.
+
+Per-user exam statistics are correlated subqueries on ``exam_sessions``
+(indexed by student), evaluated only for the rows of the requested page,
+so a page is one query however many users and sessions there are. Pages
+are addressed by keyset (``id < last id``), which stays fast deep into a
+table of hundreds of thousands of users where ``OFFSET`` would not.
+"""
+from django.db.models import Avg, Count, DecimalField, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import User
+
+
+def _per_student(queryset, aggregate, output_field):
+    return Subquery(
+        queryset.order_by().values('student_id').annotate(value=aggregate).values('value'),
+        output_field=output_field
+    )
+
+
+def with_exam_statistics(users):
+    """Annotate ``total_exams``, ``completed_exams`` and ``average_score`` (None without completed exams)"""
+    from exam_sessions.models import ExamSession
+
+    sessions = ExamSession.objects.filter(student_id=OuterRef('pk'))
+    completed = sessions.filter(status='completed')
+    return users.annotate(
+        total_exams=Coalesce(_per_student(sessions, Count('pk'), IntegerField()), Value(0)),
+        completed_exams=Coalesce(_per_student(completed, Count('pk'), IntegerField()), Value(0)),
+        average_score=_per_student(completed, Avg('total_score'), DecimalField(max_digits=7, decimal_places=2)),
+    )
+
+
+def filter_users(role=None, is_active=None, search=''):
+    users = User.objects.all()
+    if role:
+        users = users.filter(role=role)
+    if is_active is not None:
+        users = users.filter(is_active=is_active)
+    if search:
+        users = users.filter(Q(fullName__icontains=search) | Q(email__icontains=search))
+    return users
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from django.contrib.auth.models import update_last_login
+        from django.contrib.auth.signals import user_logged_in
+        from . import signals  # noqa: F401
+
+        # last_login is written in batches by accounts.last_login instead of once per login
+        user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
@@ -2,7 +2,31 @@ from typing import Optional
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import Q
+from django.db.models.functions import Lower
+
+
+def find_login_user(identifier: str):
+    """
+    The user whose email or username equals ``identifier``, ignoring case.
+
+    Each column is probed with its own ``LOWER(column) = value`` equality,
+    which the ``users_*_lower_idx`` functional indexes answer directly;
+    ``iexact`` (LIKE/UPPER) OR'd over both columns would scan ``users``.
+    The likelier column is tried first, so most logins cost one probe.
+    """
+    UserModel = get_user_model()
+    value = identifier.strip().lower()
+    fields = ("email", "username") if "@" in value else ("username", "email")
+    for field in fields:
+        user = (
+            UserModel._default_manager.alias(login_key=Lower(field))
+            .filter(login_key=value)
+            .order_by("id")
+            .first()
+        )
+        if user is not None:
+            return user
+    return None
 
 
 class EmailOrUsernameModelBackend(ModelBackend):
@@ -22,17 +46,16 @@ class EmailOrUsernameModelBackend(ModelBackend):
         UserModel = get_user_model()
 
         try:
-            user = (
-                UserModel.objects.filter(
-                    Q(email__iexact=username) | Q(username__iexact=username)
-                )
-                .order_by("id")
-                .first()
-            )
+            user = find_login_user(username)
         except Exception:
             return None
 
-        if user and user.check_password(password) and self.user_can_authenticate(user):
+        if user is None:
+            # Hash anyway so unknown accounts take as long as wrong passwords
+            UserModel().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
 
@@ -43,5 +66,3 @@ class EmailOrUsernameModelBackend(ModelBackend):
         except UserModel.DoesNotExist:
             return None
         return user if self.user_can_authenticate(user) else None
-
-
@@ -0,0 +1,155 @@
+"""
+Refresh token blacklist: pruning and an in-memory bloom filter.
+
+simplejwt checks every refresh token against ``token_blacklist`` with an
+``EXISTS`` query. Each process instead keeps a bloom filter of the
+blacklisted jtis: a miss means "definitely not blacklisted" and skips the
+database, a hit (a real entry or a false positive) falls back to the query.
+
+The filter is refreshed incrementally, loading only blacklist rows with an
+id above the last one seen. Blacklisting bumps a version number in the
+shared cache, so a process notices new entries on its next check instead
+of accepting a just-revoked token; without a bump the filter is still
+refreshed every ``REFRESH_INTERVAL`` seconds, and rebuilt from scratch
+(dropping expired tokens) every ``REBUILD_INTERVAL`` seconds. With a
+per-process cache other processes never see the bump, so new entries are
+loaded on every check instead.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from myproject.cache import cache_is_shared
+
+FALSE_POSITIVE_RATE = 0.001
+MIN_CAPACITY = 1024
+REFRESH_INTERVAL = 30
+REBUILD_INTERVAL = 60 * 60
+PRUNE_CHUNK_SIZE = 1000
+VERSION_KEY = 'accounts:blacklist:version'
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings, sized for ``capacity`` items"""
+
+    def __init__(self, capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: h1 + i * h2 gives k independent enough positions
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+    """The per-process filter of blacklisted jtis"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._version = None
+        self._refreshed_at = 0.0
+        self._built_at = 0.0
+
+    def _rebuild(self):
+        # Read the last id first: rows added while loading are above it and
+        # picked up incrementally, rows of expired tokens below it are skipped
+        last_id = BlacklistedToken.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        jtis = list(
+            BlacklistedToken.objects.filter(id__lte=last_id, token__expires_at__gt=timezone.now())
+            .values_list('token__jti', flat=True)
+        )
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(jtis)))
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._last_id = last_id
+        self._built_at = time.monotonic()
+
+    def _load_new(self):
+        rows = list(
+            BlacklistedToken.objects.filter(id__gt=self._last_id).order_by('id').values_list('id', 'token__jti')
+        )
+        for row_id, jti in rows:
+            self._bloom.add(jti)
+            self._last_id = row_id
+        if self._bloom.count > self._bloom.capacity:
+            # Past its capacity the false positive rate climbs, resize
+            self._rebuild()
+
+    def _sync(self):
+        now = time.monotonic()
+        version = cache.get(VERSION_KEY)
+        if self._bloom is None or now - self._built_at >= REBUILD_INTERVAL:
+            self._rebuild()
+        elif version != self._version or now - self._refreshed_at >= REFRESH_INTERVAL or not cache_is_shared():
+            self._load_new()
+        else:
+            return
+        self._version = version
+        self._refreshed_at = now
+
+    def might_contain(self, jti):
+        """False means the token is definitely not blacklisted"""
+        with self._lock:
+            self._sync()
+            return jti in self._bloom
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def bump_version():
+    """Tell every process that the blacklist changed"""
+    def bump():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, None)
+
+    transaction.on_commit(bump)
+
+
+def prune_expired_tokens(chunk_size=PRUNE_CHUNK_SIZE, before=None):
+    """
+    Delete outstanding tokens that expired before ``before`` (default: now)
+    together with their blacklist entries, ``chunk_size`` tokens per
+    transaction. Returns ``(outstanding_deleted, blacklisted_deleted)``.
+    """
+    before = before or timezone.now()
+    outstanding_deleted = blacklisted_deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=before)
+            .order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return outstanding_deleted, blacklisted_deleted
+        with transaction.atomic():
+            blacklisted_deleted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            outstanding_deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,101 @@
+"""
+Coalesced ``last_login`` tracking.
+
+Logins no longer UPDATE the ``users`` row synchronously. ``record_login``
+keeps at most one pending timestamp per user and process, skips users
+whose last login was recorded less than ``RECORD_INTERVAL`` seconds ago
+(checked in the shared cache, so this holds across processes), and pending
+timestamps are written with one bulk UPDATE once ``FLUSH_SIZE`` users are
+waiting or the oldest has waited ``FLUSH_INTERVAL`` seconds. The age check
+runs on every request start, and the buffer is also flushed at exit.
+"""
+import atexit
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .user_cache import invalidate_users
+
+RECORD_INTERVAL = 60
+FLUSH_INTERVAL = 10
+FLUSH_SIZE = 500
+
+_pending = {}
+_pending_since = None
+_lock = threading.Lock()
+
+
+def _recent_key(user_id):
+    return f'accounts:last_login:{user_id}'
+
+
+def record_login(user, when=None):
+    """Note a login of ``user``; sets ``user.last_login`` for the caller right away"""
+    global _pending_since
+    when = when or timezone.now()
+    user.last_login = when
+    # cache.add is atomic: only the first login of the interval gets through
+    if not cache.add(_recent_key(user.pk), True, RECORD_INTERVAL):
+        return
+    with _lock:
+        _pending[user.pk] = when
+        if _pending_since is None:
+            _pending_since = time.monotonic()
+        due = len(_pending) >= FLUSH_SIZE
+    if due:
+        _try_flush()
+
+
+def flush_if_due():
+    if _pending_since is not None and time.monotonic() - _pending_since >= FLUSH_INTERVAL:
+        _try_flush()
+
+
+def _try_flush():
+    try:
+        flush()
+    except DatabaseError:
+        # The batch is back in the buffer, the next request retries
+        pass
+
+
+def flush():
+    """Write every pending timestamp with one UPDATE, returns the number of users updated"""
+    global _pending, _pending_since
+    with _lock:
+        batch, _pending, _pending_since = _pending, {}, None
+    if not batch:
+        return 0
+    try:
+        updated = get_user_model()._default_manager.filter(pk__in=list(batch)).update(
+            last_login=Case(
+                *[When(pk=user_id, then=Value(when)) for user_id, when in batch.items()],
+                output_field=DateTimeField()
+            )
+        )
+    except DatabaseError:
+        with _lock:
+            for user_id, when in batch.items():
+                _pending.setdefault(user_id, when)
+            if _pending_since is None:
+                _pending_since = time.monotonic()
+        raise
+    # The UPDATE skips post_save, which is what drops cached users
+    invalidate_users(batch)
+    return updated
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        # The database may already be gone at interpreter shutdown
+        pass
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,86 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from accounts.auth_backends import find_login_user
+
+User = get_user_model()
+
+EMAIL_TEMPLATE = 'bench-login-{}@example.com'
+INSERT_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the case-insensitive OR lookup with the functional index lookup used at login. '
+        'Seeds synthetic users into the configured database, so run it against a scratch copy.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000, help='Size of the synthetic users table')
+        parser.add_argument('--lookups', type=int, default=1000)
+        parser.add_argument('--cleanup', action='store_true', help='Delete the synthetic users afterwards')
+
+    def handle(self, *args, **options):
+        seeded = self.seed(options['users'])
+        rng = random.Random(0)
+        # Mixed case probes, as typed on a phone keyboard
+        identifiers = [
+            EMAIL_TEMPLATE.format(rng.randrange(options['users'])).capitalize()
+            for _ in range(options['lookups'])
+        ]
+
+        def legacy(identifier):
+            return User.objects.filter(
+                Q(email__iexact=identifier) | Q(username__iexact=identifier)
+            ).order_by('id').first()
+
+        for name, lookup in [('iexact OR', legacy), ('lower() index', find_login_user)]:
+            timings = []
+            for identifier in identifiers:
+                start = time.perf_counter()
+                user = lookup(identifier)
+                timings.append((time.perf_counter() - start) * 1000)
+                if user is None:
+                    self.stderr.write(self.style.ERROR(f'{name}: {identifier} not found'))
+            timings.sort()
+            self.stdout.write(
+                f'{name:>14}: mean {statistics.mean(timings):.3f} ms, '
+                f'p95 {timings[int(len(timings) * 0.95) - 1]:.3f} ms'
+            )
+
+        probe = identifiers[0]
+        self.stdout.write('Plan of the iexact OR lookup:')
+        self.stdout.write(
+            User.objects.filter(Q(email__iexact=probe) | Q(username__iexact=probe)).order_by('id')[:1].explain()
+        )
+        self.stdout.write('Plan of the lower() index lookup:')
+        self.stdout.write(
+            User.objects.alias(login_key=Lower('email')).filter(login_key=probe.lower()).order_by('id')[:1].explain()
+        )
+
+        if options['cleanup']:
+            deleted, _ = User.objects.filter(email__startswith='bench-login-').delete()
+            self.stdout.write(f'{deleted} synthetic users deleted')
+        elif seeded:
+            self.stdout.write('Synthetic users kept, pass --cleanup to remove them')
+
+    def seed(self, total):
+        existing = User.objects.filter(email__startswith='bench-login-').count()
+        if existing >= total:
+            return 0
+        self.stdout.write(f'Seeding {total - existing} synthetic users...')
+        for start in range(existing, total, INSERT_BATCH_SIZE):
+            User.objects.bulk_create([
+                User(
+                    username=EMAIL_TEMPLATE.format(i), email=EMAIL_TEMPLATE.format(i),
+                    fullName=f'Bench User {i}', role='student', password='!'
+                )
+                for i in range(start, min(start + INSERT_BATCH_SIZE, total))
+            ])
+        return total - existing
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts import blacklist
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=blacklist.PRUNE_CHUNK_SIZE)
+        parser.add_argument('--grace-hours', type=float, default=0,
+                            help='Keep tokens that expired less than this many hours ago')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(hours=options['grace_hours'])
+        outstanding, blacklisted = blacklist.prune_expired_tokens(chunk_size=options['chunk_size'], before=before)
+        self.stdout.write(self.style.SUCCESS(
+            f'{outstanding} expired tokens deleted ({blacklisted} blacklist entries)'
+        ))
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class User(AbstractUser):
@@ -26,6 +27,11 @@ class User(AbstractUser):
         db_table = 'users'
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            # Case-insensitive login lookups (see EmailOrUsernameModelBackend)
+            models.Index(Lower('email'), name='users_email_lower_idx'),
+            models.Index(Lower('username'), name='users_username_lower_idx'),
+        ]
     
     def __str__(self):
         return f"{self.fullName} ({self.email})"
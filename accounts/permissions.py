@@ -0,0 +1,10 @@
+from rest_framework import permissions
+
+
+class IsAdminRole(permissions.BasePermission):
+    """
+    Custom permission to only allow admins (role or superuser) to manage users.
+    """
+    
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (request.user.role == 'admin' or request.user.is_superuser)
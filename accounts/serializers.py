@@ -63,6 +63,23 @@ class UserProfileSerializer(serializers.ModelSerializer):
                            'is_active', 'is_staff', 'is_superuser')
 
 
+class AdminUserSerializer(serializers.ModelSerializer):
+    """Serializer for the admin user list, reads the statistics annotated by ``with_exam_statistics``"""
+    statistics = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = User
+        fields = ('id', 'email', 'fullName', 'role', 'created_at', 'last_login', 
+                 'is_active', 'is_staff', 'is_superuser', 'statistics')
+    
+    def get_statistics(self, obj):
+        return {
+            'total_exams': obj.total_exams,
+            'completed_exams': obj.completed_exams,
+            'average_score': round(float(obj.average_score), 2) if obj.average_score is not None else 0.0
+        }
+
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating user profile"""
     
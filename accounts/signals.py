@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.core.signals import request_started
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from . import last_login
+from .blacklist import bump_version
+from .user_cache import invalidate_user
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def announce_blacklisted_token(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        bump_version()
+
+
+@receiver(user_logged_in)
+def record_last_login(sender, request, user, **kwargs):
+    last_login.record_login(user)
+
+
+@receiver(request_started)
+def flush_last_logins(sender, **kwargs):
+    last_login.flush_if_due()
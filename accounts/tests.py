@@ -1,3 +1,234 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts import last_login
+from accounts.authentication import CachedJWTAuthentication
+from accounts import blacklist
+from accounts.blacklist import blacklist_filter, prune_expired_tokens
+from accounts.tokens import RefreshToken
+from accounts.user_cache import get_cached_user
+from accounts.views import get_tokens_for_user
+from classes.models import Class
+from exams.models import Exam
+from exam_sessions.models import ExamSession
+
+User = get_user_model()
+
+
+class LoginLookupTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='Lan.Nguyen', email='Lan.Nguyen@example.com',
+            password='secret-pass', fullName='Lan Nguyen', role='student'
+        )
+
+    def test_login_matches_email_or_username_ignoring_case(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(authenticate(username='lan.nguyen@EXAMPLE.com', password='secret-pass'), self.user)
+        # One equality probe on the lowered email, no LIKE over both columns
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LOWER("users"."email") =', queries[0]['sql'])
+        self.assertNotIn('LIKE', queries[0]['sql'])
+
+        self.assertEqual(authenticate(username='LAN.NGUYEN', password='secret-pass'), self.user)
+        self.assertIsNone(authenticate(username='lan.nguyen', password='wrong'))
+        self.assertIsNone(authenticate(username='nobody@example.com', password='secret-pass'))
+
+    def test_benchmark_command_runs(self):
+        out = StringIO()
+        call_command('benchmark_login_lookup', users=50, lookups=20, cleanup=True, stdout=out)
+        self.assertIn('lower() index', out.getvalue())
+        self.assertIn('50 synthetic users deleted', out.getvalue())
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='cached@example.com', email='cached@example.com',
+            password='secret-pass', fullName='Cached User', role='teacher'
+        )
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_user_is_cached_until_it_changes(self):
+        token = get_tokens_for_user(self.user)['access']
+        self.assertEqual(AccessToken(token)['role'], 'teacher')
+
+        self.assertEqual(self.authenticate(token), self.user)
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+        self.assertEqual(user.role, 'teacher')
+        # The test cache is per-process, other processes could not see its invalidations
+        self.assertIsNone(cache.get(f'accounts:user:{self.user.id}'))
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+
+class LastLoginWriterTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        last_login.flush()
+
+        self.user = User.objects.create_user(
+            username='storm@example.com', email='storm@example.com',
+            password='secret-pass', fullName='Storm User', role='student'
+        )
+
+    def test_logins_are_coalesced_and_flushed_in_bulk(self):
+        for _ in range(3):
+            resp = self.client.post('/auth/login/', {'email': 'storm@example.com', 'password': 'secret-pass'})
+            self.assertEqual(resp.status_code, 200)
+            self.assertIsNotNone(resp.data['data']['user']['last_login'])
+
+        # Nothing written yet, one pending entry for the three logins
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+        self.assertIsNone(get_cached_user(self.user.id).last_login)
+        with self.assertNumQueries(1):
+            self.assertEqual(last_login.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        # The flushed user is not served stale from the user cache
+        self.assertEqual(get_cached_user(self.user.id).last_login, self.user.last_login)
+
+    def test_failed_flush_does_not_fail_the_login(self):
+        with mock.patch.object(last_login, 'FLUSH_SIZE', 1), \
+                mock.patch('django.db.models.query.QuerySet.update', side_effect=DatabaseError):
+            resp = self.client.post('/auth/login/', {'email': 'storm@example.com', 'password': 'secret-pass'})
+        self.assertEqual(resp.status_code, 200)
+        # Kept for the next flush
+        self.assertEqual(last_login.flush(), 1)
+
+
+# The blacklist relies on a cache shared by every process, as configured in settings
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp(),
+}})
+class TokenBlacklistTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+
+        self.user = User.objects.create_user(
+            username='tokens@example.com', email='tokens@example.com',
+            password='secret-pass', fullName='Token User', role='student'
+        )
+
+    def test_bloom_filter_skips_the_query_until_a_token_is_blacklisted(self):
+        token = str(RefreshToken.for_user(self.user))
+        RefreshToken(token)  # builds the filter
+        with self.assertNumQueries(0):
+            RefreshToken(token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RefreshToken(token).blacklist()
+        with self.assertRaises(TokenError):
+            RefreshToken(token)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_loads_new_entries_on_every_check(self):
+        token = str(RefreshToken.for_user(self.user))
+        RefreshToken(token)
+        # Another process's blacklisting bumps a version this process cannot see
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=RefreshToken(token)['jti']))
+        with self.assertRaises(TokenError):
+            RefreshToken(token)
+
+    def test_token_blacklisted_during_a_rebuild_is_not_missed(self):
+        refresh = RefreshToken.for_user(self.user)
+        token = str(refresh)
+        bloom_filter = blacklist.BloomFilter
+
+        def blacklist_while_building(capacity):
+            # Lands after the rebuild read the blacklist
+            with self.captureOnCommitCallbacks(execute=True):
+                BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh['jti']))
+                blacklist.bump_version()
+            return bloom_filter(capacity)
+
+        with mock.patch.object(blacklist, 'BloomFilter', side_effect=blacklist_while_building):
+            blacklist_filter.might_contain('unknown')
+        with self.assertRaises(TokenError):
+            RefreshToken(token)
+
+    def test_prune_deletes_expired_tokens_in_chunks(self):
+        past = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            token = OutstandingToken.objects.create(user=self.user, jti=f'old-{i}', token='x', expires_at=past)
+            BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(
+            user=self.user, jti='live', token='x', expires_at=timezone.now() + timedelta(days=1)
+        )
+
+        self.assertEqual(prune_expired_tokens(chunk_size=2), (5, 5))
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+class AdminUserListTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='root@example.com', email='root@example.com',
+            password='pass', fullName='Root', role='admin'
+        )
+        teacher = User.objects.create_user(
+            username='stats_teacher@example.com', email='stats_teacher@example.com',
+            password='pass', fullName='Stats Teacher', role='teacher'
+        )
+        self.students = [
+            User.objects.create_user(
+                username=f'stats{i}@example.com', email=f'stats{i}@example.com',
+                password='pass', fullName=f'Stats Student {i}', role='student'
+            )
+            for i in range(3)
+        ]
+        class_obj = Class.objects.create(className='Stats', teacher=teacher)
+        now = timezone.now()
+        exams = [
+            Exam.objects.create(
+                class_obj=class_obj, title=f'Exam {i}', minutes=30, created_by=teacher,
+                start_time=now, end_time=now + timedelta(hours=1)
+            )
+            for i in range(2)
+        ]
+        for exam, status, score in [(exams[0], 'completed', 80), (exams[1], 'in_progress', 0)]:
+            ExamSession.objects.create(
+                exam=exam, student=self.students[0], code=f'S-{exam.id}', start_time=now,
+                status=status, total_score=score
+            )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_users_are_listed_with_statistics_by_keyset(self):
+        with self.assertNumQueries(1):
+            resp = self.client.get('/admin/users/', {'role': 'student', 'page_size': 2})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.data['data']['results']
+        self.assertEqual([user['id'] for user in results], [self.students[2].id, self.students[1].id])
+        self.assertEqual(results[0]['statistics'], {'total_exams': 0, 'completed_exams': 0, 'average_score': 0.0})
+
+        resp = self.client.get(resp.data['data']['next'])
+        self.assertEqual([user['id'] for user in resp.data['data']['results']], [self.students[0].id])
+        self.assertEqual(
+            resp.data['data']['results'][0]['statistics'],
+            {'total_exams': 2, 'completed_exams': 1, 'average_score': 80.0}
+        )
+
+        self.client.force_authenticate(user=self.students[0])
+        self.assertEqual(self.client.get('/admin/users/').status_code, 403)
@@ -7,6 +7,7 @@ urlpatterns = [
     # Authentication endpoints
     path('register/', views.register, name='register'),
     path('login/', views.login_view, name='login'),
+    path('exam-code/', views.exam_code_login, name='exam_code_login'),
     path('refresh/', views.refresh_token, name='refresh_token'),
     path('logout/', views.logout_view, name='logout'),
     
@@ -0,0 +1,106 @@
+"""
+Cached users for token authentication.
+
+Every JWT-authenticated request needs the ``User`` row of its token. The
+row is kept in a small per-process LRU for a few seconds and in the
+shared Django cache for a few minutes, so most requests resolve their user
+without touching the database. Saving or deleting a user (profile updates,
+deactivation, password changes) drops the shared entry and the local one;
+other processes' local entries expire after ``LOCAL_TTL`` seconds. The
+shared level is skipped when the configured cache is per-process, where
+other processes would keep a changed user for ``SHARED_TTL`` seconds.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from myproject.cache import cache_is_shared
+
+SHARED_TTL = 5 * 60
+LOCAL_TTL = 5
+LOCAL_MAX_SIZE = 2048
+
+
+class _LocalLRU:
+    """Thread-safe LRU of ``user_id -> (expires_at, user)``"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = _LocalLRU(LOCAL_MAX_SIZE, LOCAL_TTL)
+
+
+def _cache_key(user_id):
+    return f'accounts:user:{user_id}'
+
+
+def get_cached_user(user_id):
+    """The user with this id, or None. Callers get their own copy they may modify."""
+    user = _local.get(user_id)
+    if user is None:
+        shared = cache_is_shared()
+        user = cache.get(_cache_key(user_id)) if shared else None
+        if user is None:
+            UserModel = get_user_model()
+            try:
+                user = UserModel._default_manager.get(pk=user_id)
+            except (UserModel.DoesNotExist, ValueError, TypeError):
+                return None
+            if shared:
+                cache.set(_cache_key(user_id), user, SHARED_TTL)
+        _local.set(user_id, user)
+    return copy.copy(user)
+
+
+def invalidate_user(user_id):
+    """Drop the cached user now and again once the current transaction commits"""
+    invalidate_users([user_id])
+
+
+def invalidate_users(user_ids):
+    """``invalidate_user`` for many users, for writes that bypass ``save()``"""
+    user_ids = list(user_ids)
+
+    def drop():
+        for user_id in user_ids:
+            _local.discard(user_id)
+        cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+    if user_ids:
+        drop()
+        transaction.on_commit(drop)
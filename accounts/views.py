@@ -2,24 +2,37 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.pagination import CursorPagination
 from rest_framework_simplejwt.views import TokenRefreshView
 from django.contrib.auth import login, logout
-from django.utils import timezone
 
 from .models import User
+from .admin_users import filter_users, with_exam_statistics
+from .permissions import IsAdminRole
+from .tokens import RefreshToken
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
     UserProfileSerializer,
     UserUpdateSerializer,
+    AdminUserSerializer,
     ChangePasswordSerializer
 )
 
 
+class AdminUserPagination(CursorPagination):
+    """Keyset pagination for the admin user list (newest users first)"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+
 def get_tokens_for_user(user):
     """Generate JWT tokens for user"""
     refresh = RefreshToken.for_user(user)
+    # Copied into the access token, lets clients route by role without a profile call
+    refresh['role'] = user.role
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
@@ -68,12 +81,9 @@ def login_view(request):
     serializer = UserLoginSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data['user']
+        # Records last_login through the coalescing writer (see accounts.last_login)
         login(request, user)
         
-        # Update last login
-        user.last_login = timezone.now()
-        user.save(update_fields=['last_login'])
-        
         tokens = get_tokens_for_user(user)
         
         return Response({
@@ -100,6 +110,52 @@ def login_view(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def exam_code_login(request):
+    """
+    Exam Code Sign-in
+    POST /auth/exam-code/
+    """
+    from exams.access_codes import redeem_code, AccessCodeError
+    from .last_login import record_login
+    
+    code = request.data.get('code')
+    if not code or not isinstance(code, str):
+        return Response({
+            'success': False,
+            'message': 'Exam code is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        user, exam, access = redeem_code(code)
+    except AccessCodeError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    record_login(user)
+    
+    return Response({
+        'success': True,
+        'data': {
+            'access': access,
+            'exam_id': exam.id,
+            'expires_at': exam.end_time.isoformat(),
+            'user': {
+                'id': user.id,
+                'email': user.email,
+                'fullName': user.fullName,
+                'role': user.role,
+                'created_at': user.created_at.isoformat(),
+                'last_login': user.last_login.isoformat()
+            }
+        },
+        'message': 'Login successful'
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def refresh_token(request):
@@ -231,3 +287,33 @@ def change_password(request):
         'errors': serializer.errors,
         'message': 'Password change failed'
     }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminRole])
+def admin_users(request):
+    """
+    List users with their exam statistics (admins only)
+    GET /admin/users/
+    """
+    is_active = request.GET.get('is_active')
+    if is_active is not None:
+        is_active = is_active.lower() in ('true', '1')
+    users = filter_users(
+        role=request.GET.get('role'),
+        is_active=is_active,
+        search=request.GET.get('search', '')
+    )
+    
+    paginator = AdminUserPagination()
+    page = paginator.paginate_queryset(with_exam_statistics(users), request)
+    serializer = AdminUserSerializer(page, many=True)
+    
+    return Response({
+        'success': True,
+        'data': {
+            'results': serializer.data,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link()
+        }
+    })
@@ -0,0 +1,114 @@
+"""
+Bulk enrollment of students into a class.
+
+A list of emails is resolved with one ``IN`` query on users and one on the
+existing enrollments of the class, then the new ``ClassStudent`` rows are
+written with ``bulk_create``. Every email gets its own outcome so a
+teacher can fix the rejected ones and resend only those.
+"""
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import ClassStudent
+from .membership import invalidate_membership
+
+User = get_user_model()
+
+MAX_BULK_EMAILS = 5000
+BULK_CREATE_BATCH_SIZE = 500
+EMAIL_COLUMNS = ('email', 'student_email')
+
+# Outcomes reported per email
+ENROLLED = 'enrolled'
+ALREADY_ENROLLED = 'already_enrolled'
+NOT_FOUND = 'not_found'
+INVALID = 'invalid'
+DUPLICATE = 'duplicate'
+
+
+def read_emails(binary_file):
+    """
+    Emails from an uploaded CSV: the ``email`` (or ``student_email``) column
+    when there is a header, otherwise the first column of every row.
+    """
+    reader = csv.reader(io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline=''))
+    column = 0
+    for row_number, row in enumerate(reader):
+        cells = [cell.strip() for cell in row]
+        if row_number == 0:
+            header = [cell.lower() for cell in cells]
+            matches = [index for index, name in enumerate(header) if name in EMAIL_COLUMNS]
+            if matches:
+                column = matches[0]
+                continue
+            if cells and '@' not in cells[0]:
+                continue
+        if len(cells) > column and cells[column]:
+            yield cells[column]
+
+
+def enroll_students(class_obj, emails):
+    """
+    Enroll the students with the given emails. Returns
+    ``{'results': [{'email', 'status', 'student_id'}], 'summary': {status: count}}``
+    with the results in the order of ``emails``.
+    """
+    results = []
+    wanted = {}
+    for email in emails:
+        email = email.strip()
+        key = email.lower()
+        try:
+            validate_email(email)
+        except ValidationError:
+            results.append({'email': email, 'status': INVALID, 'student_id': None})
+            continue
+        if key in wanted:
+            results.append({'email': email, 'status': DUPLICATE, 'student_id': None})
+            continue
+        wanted[key] = email
+        results.append({'email': email, 'status': None, 'student_id': None})
+
+    students = {}
+    if wanted:
+        # Served by the users_email_lower_idx functional index
+        rows = User.objects.alias(email_lower=Lower('email')).filter(
+            email_lower__in=wanted, role='student'
+        ).values_list('email', 'id')
+        students = {email.lower(): student_id for email, student_id in rows}
+
+    with transaction.atomic():
+        enrolled = set(
+            ClassStudent.objects.filter(class_obj=class_obj, student_id__in=students.values())
+            .order_by().values_list('student_id', flat=True)
+        )
+        new_ids = [student_id for student_id in students.values() if student_id not in enrolled]
+        # ignore_conflicts covers a concurrent enrollment of the same student
+        ClassStudent.objects.bulk_create(
+            [ClassStudent(class_obj=class_obj, student_id=student_id) for student_id in new_ids],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        # bulk_create sends no post_save signals
+        invalidate_membership(user_ids=new_ids, class_ids=[class_obj.id] if new_ids else [])
+
+    summary = {status: 0 for status in (ENROLLED, ALREADY_ENROLLED, NOT_FOUND, INVALID, DUPLICATE)}
+    for result in results:
+        if result['status'] is None:
+            student_id = students.get(result['email'].lower())
+            result['student_id'] = student_id
+            if student_id is None:
+                result['status'] = NOT_FOUND
+            elif student_id in enrolled:
+                result['status'] = ALREADY_ENROLLED
+            else:
+                result['status'] = ENROLLED
+        summary[result['status']] += 1
+
+    return {'results': results, 'summary': summary}
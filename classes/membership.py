@@ -0,0 +1,64 @@
+"""
+Cached enrollment membership.
+
+Each student's set of class ids and each class's roster of student ids are
+cached as frozensets, so enrollment checks in permissions and views are
+set lookups instead of an ``EXISTS`` query per request. Both entries are
+dropped when a ``ClassStudent`` row is saved or deleted (see ``signals``);
+code writing enrollments in bulk must call ``invalidate_membership`` itself.
+Other processes only see that through a shared cache; with a per-process
+one the sets are kept for a few seconds, so a removed student does not
+keep passing enrollment checks elsewhere for an hour.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from myproject.cache import shared_ttl
+from .models import ClassStudent
+
+MEMBERSHIP_CACHE_TTL = 60 * 60
+
+
+def _classes_key(user_id):
+    return f'classes:member:{user_id}:class_ids'
+
+
+def _roster_key(class_id):
+    return f'classes:{class_id}:roster'
+
+
+def user_class_ids(user_id):
+    """Ids of the classes the user is enrolled in"""
+    def load():
+        return frozenset(
+            ClassStudent.objects.filter(student_id=user_id).order_by().values_list('class_obj_id', flat=True)
+        )
+
+    return cache.get_or_set(_classes_key(user_id), load, shared_ttl(MEMBERSHIP_CACHE_TTL))
+
+
+def class_roster(class_id):
+    """Ids of the students enrolled in the class"""
+    def load():
+        return frozenset(
+            ClassStudent.objects.filter(class_obj_id=class_id).order_by().values_list('student_id', flat=True)
+        )
+
+    return cache.get_or_set(_roster_key(class_id), load, shared_ttl(MEMBERSHIP_CACHE_TTL))
+
+
+def is_enrolled(user_id, class_id):
+    return class_id in user_class_ids(user_id)
+
+
+def invalidate_membership(user_ids=(), class_ids=()):
+    """
+    Drop the cached sets now, so later checks in this transaction see the
+    change, and again on commit, in case a concurrent request cached the
+    pre-commit state meanwhile.
+    """
+    keys = [_classes_key(user_id) for user_id in set(user_ids)]
+    keys += [_roster_key(class_id) for class_id in set(class_ids)]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
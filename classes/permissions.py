@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .membership import is_enrolled
+
 
 class IsTeacherOrReadOnly(permissions.BasePermission):
     """
@@ -24,8 +26,8 @@ class IsClassTeacher(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Read permissions for class teacher and enrolled students
         if request.method in permissions.SAFE_METHODS:
-            return (request.user == obj.teacher or 
-                   obj.students.filter(student=request.user).exists())
+            return (request.user.id == obj.teacher_id or
+                   is_enrolled(request.user.id, obj.id))
         
         # Write permissions only for the class teacher
         return request.user == obj.teacher
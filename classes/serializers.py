@@ -1,11 +1,43 @@
+import csv
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import timezone
 from .models import Class, ClassStudent
+from .enrollment import MAX_BULK_EMAILS, enroll_students, read_emails
 from accounts.serializers import UserProfileSerializer
+from exams.models import Exam
+
+# Students and exams embedded in the class detail, the rest is paginated
+DETAIL_PREVIEW_SIZE = 10
 
 User = get_user_model()
 
 
+def _count(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values('class_obj_id').annotate(n=Count('pk')).values('n'),
+            output_field=IntegerField()
+        ),
+        Value(0)
+    )
+
+
+def annotate_counts(classes):
+    """
+    Add ``student_count`` and ``exam_count`` to a class queryset as correlated
+    subqueries, so listing a page of classes costs one query.
+    """
+    return classes.select_related('teacher').annotate(
+        student_count=_count(ClassStudent.objects.filter(class_obj_id=OuterRef('pk'))),
+        exam_count=_count(Exam.objects.filter(class_obj_id=OuterRef('pk'))),
+    )
+
+
 class ClassListSerializer(serializers.ModelSerializer):
     """Serializer for listing classes with basic info"""
     teacher = UserProfileSerializer(read_only=True)
@@ -18,14 +50,39 @@ class ClassListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'teacher', 'created_at']
     
     def get_student_count(self, obj):
+        if hasattr(obj, 'student_count'):
+            return obj.student_count
         return obj.students.count()
     
     def get_exam_count(self, obj):
+        if hasattr(obj, 'exam_count'):
+            return obj.exam_count
         return obj.exams.count()
 
 
+class ClassExamSerializer(serializers.ModelSerializer):
+    """Serializer for the exams of a class"""
+    status = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Exam
+        fields = ['id', 'title', 'total_score', 'minutes', 'start_time', 'end_time', 'created_at', 'status']
+    
+    def get_status(self, obj):
+        now = timezone.now()
+        if now < obj.start_time:
+            return 'upcoming'
+        elif now <= obj.end_time:
+            return 'ongoing'
+        return 'completed'
+
+
 class ClassDetailSerializer(serializers.ModelSerializer):
-    """Serializer for class detail view"""
+    """
+    Serializer for class detail view. Students and exams are summarized as
+    a count, the first few rows and a link to the next page of the
+    ``students/`` and ``exams/`` sub-resources.
+    """
     teacher = UserProfileSerializer(read_only=True)
     students = serializers.SerializerMethodField()
     exams = serializers.SerializerMethodField()
@@ -36,12 +93,23 @@ class ClassDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'teacher', 'created_at']
     
     def get_students(self, obj):
-        class_students = obj.students.all()
-        return ClassStudentSerializer(class_students, many=True).data
+        count = obj.student_count if hasattr(obj, 'student_count') else obj.students.count()
+        class_students = obj.students.select_related('student')[:DETAIL_PREVIEW_SIZE]
+        return self._preview(obj, count, ClassStudentSerializer(class_students, many=True).data, 'classes:class_students')
     
     def get_exams(self, obj):
-        # This will be implemented when exams module is ready
-        return []
+        count = obj.exam_count if hasattr(obj, 'exam_count') else obj.exams.count()
+        exams = obj.exams.all()[:DETAIL_PREVIEW_SIZE]
+        return self._preview(obj, count, ClassExamSerializer(exams, many=True).data, 'classes:class_exams')
+    
+    def _preview(self, obj, count, results, url_name):
+        next_url = None
+        if count > DETAIL_PREVIEW_SIZE:
+            next_url = f'{reverse(url_name, args=[obj.id])}?page=2&page_size={DETAIL_PREVIEW_SIZE}'
+            request = self.context.get('request')
+            if request is not None:
+                next_url = request.build_absolute_uri(next_url)
+        return {'count': count, 'next': next_url, 'results': results}
 
 
 class ClassCreateUpdateSerializer(serializers.ModelSerializer):
@@ -90,6 +158,29 @@ class AddStudentSerializer(serializers.Serializer):
         return ClassStudent.objects.create(class_obj=class_obj, student=student)
 
 
+class BulkAddStudentsSerializer(serializers.Serializer):
+    """Serializer for enrolling many students from a list or CSV of emails"""
+    emails = serializers.ListField(child=serializers.CharField(max_length=254), required=False)
+    file = serializers.FileField(required=False)
+    
+    def validate(self, attrs):
+        emails = list(attrs.get('emails', []))
+        if 'file' in attrs:
+            try:
+                emails.extend(read_emails(attrs['file'].file))
+            except (UnicodeDecodeError, csv.Error):
+                raise serializers.ValidationError({'file': "The file must be a UTF-8 CSV."})
+        if not emails:
+            raise serializers.ValidationError("Send a list of emails or a CSV file.")
+        if len(emails) > MAX_BULK_EMAILS:
+            raise serializers.ValidationError(f"At most {MAX_BULK_EMAILS} emails per request.")
+        attrs['emails'] = emails
+        return attrs
+    
+    def save(self):
+        return enroll_students(self.context['class_obj'], self.validated_data['emails'])
+
+
 class StudentClassSerializer(serializers.ModelSerializer):
     """Serializer for student's enrolled classes"""
     className = serializers.CharField(source='class_obj.className', read_only=True)
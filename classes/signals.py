@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import ClassStudent
+from .membership import invalidate_membership
+
+
+@receiver(post_save, sender=ClassStudent)
+@receiver(post_delete, sender=ClassStudent)
+def invalidate_membership_on_enrollment_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_membership(user_ids=[instance.student_id], class_ids=[instance.class_obj_id])
@@ -1,3 +1,161 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase, APIClient
 
-# Create your tests here.
+from .models import Class, ClassStudent
+
+User = get_user_model()
+
+
+class BulkEnrollmentTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_bulk@example.com', email='teacher_bulk@example.com',
+            password='pass', fullName='Bulk Teacher', role='teacher'
+        )
+        self.students = [
+            User.objects.create_user(
+                username=f'bulk{i}@example.com', email=f'bulk{i}@example.com',
+                password='pass', fullName=f'Bulk Student {i}', role='student'
+            )
+            for i in range(3)
+        ]
+        self.class_obj = Class.objects.create(className='Bulk 10A', teacher=self.teacher)
+        ClassStudent.objects.create(class_obj=self.class_obj, student=self.students[0])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+        self.url = f'/classes/{self.class_obj.id}/students/bulk-add/'
+
+    def test_bulk_add_reports_each_email(self):
+        emails = [
+            'bulk0@example.com', 'BULK1@example.com', 'bulk1@example.com',
+            'teacher_bulk@example.com', 'not-an-email',
+        ]
+        # class + teacher, one user lookup, one enrollment lookup, one insert (inside a savepoint)
+        with self.assertNumQueries(7):
+            resp = self.client.post(self.url, {'emails': emails}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            [result['status'] for result in resp.data['data']['results']],
+            ['already_enrolled', 'enrolled', 'duplicate', 'not_found', 'invalid']
+        )
+
+        upload = SimpleUploadedFile('students.csv', b'name,email\nC,bulk2@example.com\nA,bulk0@example.com\n')
+        resp = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['data']['summary']['enrolled'], 1)
+        self.assertEqual(resp.data['data']['summary']['already_enrolled'], 1)
+        self.assertEqual(ClassStudent.objects.filter(class_obj=self.class_obj).count(), 3)
+
+    def test_bulk_add_matches_emails_stored_in_any_case(self):
+        student = User.objects.create_user(
+            username='Lan@X.com', email='Lan@X.com', password='pass', fullName='Lan', role='student'
+        )
+        resp = self.client.post(self.url, {'emails': ['lan@x.COM']}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['data']['results'][0]['status'], 'enrolled')
+        self.assertEqual(resp.data['data']['results'][0]['student_id'], student.id)
+
+
+class MembershipCacheTest(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.teacher = User.objects.create_user(
+            username='teacher_member@example.com', email='teacher_member@example.com',
+            password='pass', fullName='Member Teacher', role='teacher'
+        )
+        self.student = User.objects.create_user(
+            username='member@example.com', email='member@example.com',
+            password='pass', fullName='Member Student', role='student'
+        )
+        self.class_obj = Class.objects.create(className='Member 10A', teacher=self.teacher)
+
+    def test_membership_is_cached_and_follows_enrollment_changes(self):
+        from .membership import is_enrolled, class_roster
+
+        self.assertFalse(is_enrolled(self.student.id, self.class_obj.id))
+        enrollment = ClassStudent.objects.create(class_obj=self.class_obj, student=self.student)
+        self.assertTrue(is_enrolled(self.student.id, self.class_obj.id))
+        self.assertEqual(class_roster(self.class_obj.id), {self.student.id})
+
+        with self.assertNumQueries(0):
+            self.assertTrue(is_enrolled(self.student.id, self.class_obj.id))
+
+        enrollment.delete()
+        self.assertFalse(is_enrolled(self.student.id, self.class_obj.id))
+        self.assertEqual(class_roster(self.class_obj.id), frozenset())
+
+        self.client.force_authenticate(user=self.student)
+        resp = self.client.get(f'/classes/{self.class_obj.id}/students/')
+        self.assertEqual(resp.status_code, 403)
+
+
+class StudentClassListTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_list@example.com', email='teacher_list@example.com',
+            password='pass', fullName='List Teacher', role='teacher'
+        )
+        self.student = User.objects.create_user(
+            username='lister@example.com', email='lister@example.com',
+            password='pass', fullName='List Student', role='student'
+        )
+        for name in ['Math 10A', 'Math 10B', 'Physics 10A']:
+            class_obj = Class.objects.create(className=name, teacher=self.teacher)
+            ClassStudent.objects.create(class_obj=class_obj, student=self.student)
+        Class.objects.create(className='Math 11A', teacher=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def test_student_listing_is_searched_and_counted_in_sql(self):
+        # page count + page with annotated counts and teachers
+        with self.assertNumQueries(2):
+            resp = self.client.get('/classes/', {'search': 'math'})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.data['results']
+        self.assertEqual(sorted(item['className'] for item in results), ['Math 10A', 'Math 10B'])
+        self.assertEqual({(item['student_count'], item['exam_count']) for item in results}, {(1, 0)})
+
+
+class ClassDetailPreviewTest(APITestCase):
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from exams.models import Exam
+
+        self.teacher = User.objects.create_user(
+            username='teacher_detail@example.com', email='teacher_detail@example.com',
+            password='pass', fullName='Detail Teacher', role='teacher'
+        )
+        self.class_obj = Class.objects.create(className='Lecture 101', teacher=self.teacher)
+        for i in range(12):
+            student = User.objects.create_user(
+                username=f'detail{i}@example.com', email=f'detail{i}@example.com',
+                password='pass', fullName=f'Detail Student {i}', role='student'
+            )
+            ClassStudent.objects.create(class_obj=self.class_obj, student=student)
+        now = timezone.now()
+        Exam.objects.create(
+            class_obj=self.class_obj, title='Midterm', minutes=45, created_by=self.teacher,
+            start_time=now + timedelta(days=1), end_time=now + timedelta(days=1, hours=1)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_detail_summarizes_roster_and_exams(self):
+        resp = self.client.get(f'/classes/{self.class_obj.id}/')
+        self.assertEqual(resp.status_code, 200)
+        students = resp.data['data']['students']
+        self.assertEqual(students['count'], 12)
+        self.assertEqual(len(students['results']), 10)
+        self.assertTrue(students['next'].endswith(f'/classes/{self.class_obj.id}/students/?page=2&page_size=10'))
+        exams = resp.data['data']['exams']
+        self.assertEqual((exams['count'], exams['next']), (1, None))
+        self.assertEqual(exams['results'][0]['status'], 'upcoming')
+
+        resp = self.client.get(students['next'])
+        self.assertEqual(len(resp.data['results']), 2)
+        resp = self.client.get(f'/classes/{self.class_obj.id}/exams/')
+        self.assertEqual([exam['title'] for exam in resp.data['results']], ['Midterm'])
@@ -12,5 +12,9 @@ urlpatterns = [
     # Student management endpoints
     path('<int:class_id>/students/', views.class_students, name='class_students'),
     path('<int:class_id>/students/add/', views.add_student, name='add_student'),
+    path('<int:class_id>/students/bulk-add/', views.bulk_add_students, name='bulk_add_students'),
     path('<int:class_id>/students/<int:student_id>/', views.remove_student, name='remove_student'),
+    
+    # Exam listing endpoint
+    path('<int:class_id>/exams/', views.class_exams, name='class_exams'),
 ]
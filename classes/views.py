@@ -7,13 +7,17 @@ from django.db.models import Q
 from django.contrib.auth import get_user_model
 
 from .models import Class, ClassStudent
+from .membership import is_enrolled
 from .serializers import (
     ClassListSerializer,
     ClassDetailSerializer,
     ClassCreateUpdateSerializer,
     ClassStudentSerializer,
     AddStudentSerializer,
-    StudentClassSerializer
+    BulkAddStudentsSerializer,
+    StudentClassSerializer,
+    ClassExamSerializer,
+    annotate_counts
 )
 from .permissions import (
     IsTeacherOrReadOnly,
@@ -44,9 +48,9 @@ def class_list_create(request):
             # Teachers see all their classes
             classes = Class.objects.filter(teacher=request.user)
         else:
-            # Students see only their enrolled classes
-            class_students = ClassStudent.objects.filter(student=request.user)
-            classes = [cs.class_obj for cs in class_students]
+            # Students see only their enrolled classes (enrollments are unique, the join adds no duplicates)
+            classes = Class.objects.filter(students__student=request.user)
+        classes = annotate_counts(classes)
         
         # Apply search filter if provided
         search = request.GET.get('search', '')
@@ -66,7 +70,7 @@ def class_list_create(request):
             'success': True,
             'data': {
                 'results': serializer.data,
-                'count': len(classes)
+                'count': classes.count()
             }
         })
     
@@ -96,10 +100,10 @@ def class_detail(request, class_id):
     PUT: Update class (teachers only)
     DELETE: Delete class (teachers only)
     """
-    class_obj = get_object_or_404(Class, id=class_id)
+    class_obj = get_object_or_404(annotate_counts(Class.objects.all()), id=class_id)
     
     if request.method == 'GET':
-        serializer = ClassDetailSerializer(class_obj)
+        serializer = ClassDetailSerializer(class_obj, context={'request': request})
         return Response({
             'success': True,
             'data': serializer.data
@@ -116,7 +120,7 @@ def class_detail(request, class_id):
         serializer = ClassCreateUpdateSerializer(class_obj, data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
-            response_serializer = ClassDetailSerializer(class_obj)
+            response_serializer = ClassDetailSerializer(class_obj, context={'request': request})
             return Response({
                 'success': True,
                 'data': response_serializer.data,
@@ -154,7 +158,7 @@ def class_students(request, class_id):
     
     # Check if user has permission to view this class
     if request.user.role == 'student':
-        if not class_obj.students.filter(student=request.user).exists():
+        if not is_enrolled(request.user.id, class_obj.id):
             return Response({
                 'success': False,
                 'message': 'You are not enrolled in this class'
@@ -165,7 +169,7 @@ def class_students(request, class_id):
             'message': 'You can only view students in your own classes'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    class_students = class_obj.students.all()
+    class_students = class_obj.students.select_related('student')
     paginator = CustomPagination()
     page = paginator.paginate_queryset(class_students, request)
     
@@ -183,6 +187,45 @@ def class_students(request, class_id):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsStudentOrTeacher])
+def class_exams(request, class_id):
+    """
+    GET: Get the exams of a class
+    """
+    class_obj = get_object_or_404(Class, id=class_id)
+    
+    # Check if user has permission to view this class
+    if request.user.role == 'student':
+        if not is_enrolled(request.user.id, class_obj.id):
+            return Response({
+                'success': False,
+                'message': 'You are not enrolled in this class'
+            }, status=status.HTTP_403_FORBIDDEN)
+    elif request.user.role == 'teacher' and request.user.id != class_obj.teacher_id:
+        return Response({
+            'success': False,
+            'message': 'You can only view exams in your own classes'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    exams = class_obj.exams.all()
+    paginator = CustomPagination()
+    page = paginator.paginate_queryset(exams, request)
+    
+    if page is not None:
+        serializer = ClassExamSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    serializer = ClassExamSerializer(exams, many=True)
+    return Response({
+        'success': True,
+        'data': {
+            'results': serializer.data,
+            'count': exams.count()
+        }
+    })
+
+
 @api_view(['POST'])
 @permission_classes([CanManageStudents])
 def add_student(request, class_id):
@@ -215,6 +258,38 @@ def add_student(request, class_id):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([CanManageStudents])
+def bulk_add_students(request, class_id):
+    """
+    POST: Enroll many students from a list or CSV of emails (teachers only)
+    """
+    class_obj = get_object_or_404(Class, id=class_id)
+    
+    # Check if the current user is the teacher of this class
+    if request.user != class_obj.teacher:
+        return Response({
+            'success': False,
+            'message': 'You can only add students to your own classes'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = BulkAddStudentsSerializer(data=request.data, context={'class_obj': class_obj})
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors,
+            'message': 'Failed to add students to class'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    report = serializer.save()
+    summary = report['summary']
+    return Response({
+        'success': True,
+        'data': report,
+        'message': f"{summary['enrolled']} students added, {len(report['results']) - summary['enrolled']} skipped"
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['DELETE'])
 @permission_classes([CanManageStudents])
 def remove_student(request, class_id, student_id):
@@ -266,7 +341,7 @@ def my_classes(request):
         })
     
     elif request.user.role == 'teacher':
-        classes = Class.objects.filter(teacher=request.user)
+        classes = annotate_counts(Class.objects.filter(teacher=request.user))
         paginator = CustomPagination()
         page = paginator.paginate_queryset(classes, request)
         
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exam_sessions import regrade
+from exam_sessions.models import RegradeJob
+
+
+class Command(BaseCommand):
+    help = 'Run queued regrade jobs (resumes jobs left behind by a crashed worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--poll-interval', type=float, default=5.0)
+        parser.add_argument('--chunk-size', type=int, default=regrade.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--retry-failed', action='store_true', help='Requeue failed jobs from their cursor first')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = RegradeJob.objects.filter(status='failed').update(status='pending', error=None)
+            self.stdout.write(f'{requeued} failed jobs requeued')
+
+        while True:
+            job = regrade.claim_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Regrading question {job.question_id} (job {job.id}, from answer {job.cursor})')
+            try:
+                regrade.run_job(job, chunk_size=options['chunk_size'])
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Job {job.id} failed: {e}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(f'Job {job.id} done: {job.processed} answers regraded'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_sessions', '0001_initial'),
+        ('questions', '0003_question_similarity_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentanswer',
+            name='selected_answer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='student_selections', to='questions.questionanswer', verbose_name='Selected Answer'),
+        ),
+        migrations.CreateModel(
+            name='RegradeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(max_length=100, verbose_name='Reason')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='regrade_jobs', to='questions.question', verbose_name='Question')),
+            ],
+            options={
+                'verbose_name': 'Regrade Job',
+                'verbose_name_plural': 'Regrade Jobs',
+                'db_table': 'regrade_jobs',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
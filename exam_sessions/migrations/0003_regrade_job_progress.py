@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_sessions', '0002_regrade_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='regradejob',
+            name='cursor',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Last Regraded Answer ID'),
+        ),
+        migrations.AddField(
+            model_name='regradejob',
+            name='error',
+            field=models.TextField(blank=True, null=True, verbose_name='Error'),
+        ),
+        migrations.AddField(
+            model_name='regradejob',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Finished At'),
+        ),
+        migrations.AddField(
+            model_name='regradejob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Heartbeat At'),
+        ),
+        migrations.AddField(
+            model_name='regradejob',
+            name='processed',
+            field=models.PositiveIntegerField(default=0, verbose_name='Processed Answers'),
+        ),
+        migrations.AddField(
+            model_name='regradejob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Started At'),
+        ),
+        migrations.AddField(
+            model_name='regradejob',
+            name='total',
+            field=models.PositiveIntegerField(default=0, verbose_name='Total Answers'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_sessions', '0003_regrade_job_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examsession',
+            name='shuffle_seed',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Shuffle Seed'),
+        ),
+    ]
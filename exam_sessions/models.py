@@ -1,7 +1,7 @@
 from django.db import models
 from django.conf import settings
 from exams.models import Exam, ExamQuestion
-from questions.models import QuestionAnswer
+from questions.models import Question, QuestionAnswer
 
 
 class ExamSession(models.Model):
@@ -33,6 +33,7 @@ class ExamSession(models.Model):
     total_score = models.DecimalField(max_digits=5, decimal_places=2, default=0, verbose_name="Total Score")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress', verbose_name="Status")
     submitted_at = models.DateTimeField(null=True, blank=True, verbose_name="Submitted At")
+    shuffle_seed = models.PositiveIntegerField(null=True, blank=True, verbose_name="Shuffle Seed")
     
     class Meta:
         db_table = 'exam_sessions'
@@ -44,6 +45,13 @@ class ExamSession(models.Model):
     def __str__(self):
         return f"{self.student.fullName} - {self.exam.title} ({self.status})"
     
+    @property
+    def deadline(self):
+        """When the session must be submitted: the earlier of exam end time or session time limit"""
+        from datetime import timedelta
+        
+        return min(self.exam.end_time, self.start_time + timedelta(minutes=self.exam.minutes))
+    
     @property
     def time_remaining(self):
         """Calculate remaining time in seconds"""
@@ -51,14 +59,9 @@ class ExamSession(models.Model):
             return 0
         
         from django.utils import timezone
-        from datetime import timedelta
         
         now = timezone.now()
-        exam_end_time = self.exam.end_time
-        session_end_time = self.start_time + timedelta(minutes=self.exam.minutes)
-        
-        # Use the earlier of exam end time or session time limit
-        actual_end_time = min(exam_end_time, session_end_time)
+        actual_end_time = self.deadline
         
         if now >= actual_end_time:
             return 0
@@ -91,7 +94,7 @@ class StudentAnswer(models.Model):
     )
     selected_answer = models.ForeignKey(
         QuestionAnswer, 
-        on_delete=models.CASCADE, 
+        on_delete=models.SET_NULL, 
         null=True, blank=True,
         related_name='student_selections',
         verbose_name="Selected Answer"
@@ -185,4 +188,51 @@ class ExamLog(models.Model):
         ordering = ['-timestamp']
     
     def __str__(self):
-        return f"{self.student.fullName} - {self.actions} - {self.timestamp}"
\ No newline at end of file
+        return f"{self.student.fullName} - {self.actions} - {self.timestamp}"
+
+
+class RegradeJob(models.Model):
+    """
+    Model representing a queued recomputation of scores after a question's answer key changed
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    question = models.ForeignKey(
+        Question, 
+        on_delete=models.CASCADE, 
+        related_name='regrade_jobs',
+        verbose_name="Question"
+    )
+    reason = models.CharField(max_length=100, verbose_name="Reason")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Status")
+    cursor = models.PositiveBigIntegerField(default=0, verbose_name="Last Regraded Answer ID")
+    processed = models.PositiveIntegerField(default=0, verbose_name="Processed Answers")
+    total = models.PositiveIntegerField(default=0, verbose_name="Total Answers")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Started At")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Heartbeat At")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finished At")
+    
+    class Meta:
+        db_table = 'regrade_jobs'
+        verbose_name = "Regrade Job"
+        verbose_name_plural = "Regrade Jobs"
+        ordering = ['created_at']
+    
+    def __str__(self):
+        return f"Regrade question {self.question_id} ({self.status})"
+    
+    @property
+    def progress(self):
+        """Percentage of affected answers regraded so far"""
+        if self.status == 'completed':
+            return 100.0
+        if self.total == 0:
+            return 0.0
+        return round(min(self.processed, self.total) / self.total * 100, 2)
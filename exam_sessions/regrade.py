@@ -0,0 +1,176 @@
+"""
+Regrading of student answers after a question's answer key changed.
+
+Changing which answers of a question are correct (or deleting a selected
+answer) queues a ``RegradeJob``. Workers (``manage.py process_regrades``)
+claim jobs and walk the affected ``StudentAnswer`` rows in id order, one
+chunk per transaction: each chunk rescores its answers with set-based
+UPDATEs, refreshes the totals of the sessions and results they belong to
+and advances the job's cursor. A worker that dies mid-job stops sending
+heartbeats, so another worker picks the job up again from its cursor.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Q, F, Case, When, Value, Exists, OuterRef, Subquery, Sum, Count,
+    DecimalField, IntegerField
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from questions.stats import refresh_question_stats
+from .models import RegradeJob, StudentAnswer, ExamSession, ExamResult
+
+AUTO_GRADED_TYPES = ('multiple_choice', 'true_false')
+DEFAULT_CHUNK_SIZE = 1000
+STALE_AFTER = timedelta(minutes=5)
+
+_SCORE = DecimalField(max_digits=5, decimal_places=2)
+
+
+def queue_regrade(question_id, reason):
+    """Queue a regrade of every session that answered the question, once per pending job"""
+    job = RegradeJob.objects.filter(question_id=question_id, status='pending').first()
+    if job is None:
+        job = RegradeJob.objects.create(question_id=question_id, reason=reason)
+    return job
+
+
+def _claimable():
+    stale = timezone.now() - STALE_AFTER
+    return Q(status='pending') | Q(status='running', heartbeat_at__lt=stale)
+
+
+def claim_job():
+    """
+    Take the oldest pending job, or a running one whose worker stopped
+    sending heartbeats. The conditional UPDATE makes the claim safe when
+    several workers run at once. Returns ``None`` when there is nothing to do.
+    """
+    candidates = RegradeJob.objects.filter(_claimable()).order_by('created_at').values_list('id', flat=True)[:10]
+    for job_id in candidates:
+        now = timezone.now()
+        claimed = RegradeJob.objects.filter(_claimable(), id=job_id).update(
+            status='running',
+            heartbeat_at=now,
+            started_at=Coalesce(F('started_at'), Value(now)),
+        )
+        if claimed:
+            return RegradeJob.objects.get(id=job_id)
+    return None
+
+
+def run_job(job, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Regrade the answers of a claimed job from its cursor to the end"""
+    try:
+        answers = StudentAnswer.objects.filter(exam_question__question_id=job.question_id)
+        if job.question.type not in AUTO_GRADED_TYPES:
+            # Essay answers are graded by hand, nothing to recompute
+            answers = answers.none()
+
+        if not job.total:
+            job.total = answers.count()
+            job.save(update_fields=['total'])
+
+        while True:
+            ids = list(
+                answers.filter(id__gt=job.cursor).order_by('id').values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                session_ids = regrade_answers(ids)
+                refresh_sessions(session_ids)
+                job.cursor = ids[-1]
+                job.processed += len(ids)
+                job.heartbeat_at = timezone.now()
+                job.save(update_fields=['cursor', 'processed', 'heartbeat_at'])
+
+        refresh_question_stats([job.question_id], include_attempts=True)
+        job.status = 'completed'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at'])
+
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+        job.save(update_fields=['status', 'error'])
+        raise
+
+    return job
+
+
+def _points_per_question(exam_ids):
+    """Score of one correct answer per exam, as in ``submit_answer``"""
+    from exams.models import Exam
+
+    exams = Exam.objects.filter(id__in=exam_ids).annotate(question_count=Count('exam_questions'))
+    return {
+        exam.id: (Decimal(exam.total_score) / exam.question_count).quantize(Decimal('0.01'))
+        if exam.question_count else Decimal('0')
+        for exam in exams
+    }
+
+
+def regrade_answers(answer_ids):
+    """
+    Recompute ``is_correct`` and ``score`` of the given answers against the
+    current answer key, with one UPDATE per exam involved. Returns the ids
+    of the sessions the answers belong to.
+    """
+    from questions.models import QuestionAnswer
+
+    rows = StudentAnswer.objects.filter(id__in=answer_ids)
+    exam_ids = set(rows.order_by().values_list('exam_question__exam_id', flat=True).distinct())
+    selected_is_correct = Exists(
+        QuestionAnswer.objects.filter(id=OuterRef('selected_answer_id'), is_correct=True)
+    )
+
+    for exam_id, points in _points_per_question(exam_ids).items():
+        rows.filter(exam_question__exam_id=exam_id).update(
+            is_correct=selected_is_correct,
+            score=Case(When(selected_is_correct, then=Value(points)), default=Value(Decimal('0')), output_field=_SCORE),
+        )
+
+    return set(rows.order_by().values_list('session_id', flat=True).distinct())
+
+
+def refresh_sessions(session_ids):
+    """Recompute totals of submitted sessions and their results from the answer rows"""
+    from exams.models import Exam
+
+    answers = StudentAnswer.objects.filter(session_id=OuterRef('session_id')).order_by().values('session_id')
+    total_score = Coalesce(
+        Subquery(answers.annotate(total=Sum('score')).values('total'), output_field=_SCORE),
+        Value(Decimal('0')), output_field=_SCORE
+    )
+    answer_count = Coalesce(
+        Subquery(answers.annotate(n=Count('id')).values('n'), output_field=IntegerField()), Value(0)
+    )
+    correct_count = Coalesce(
+        Subquery(answers.filter(is_correct=True).annotate(n=Count('id')).values('n'), output_field=IntegerField()),
+        Value(0)
+    )
+    exam_total = Subquery(Exam.objects.filter(id=OuterRef('exam_id')).values('total_score')[:1])
+    exam_has_points = Exists(Exam.objects.filter(id=OuterRef('exam_id'), total_score__gt=0))
+
+    session_answers = StudentAnswer.objects.filter(session_id=OuterRef('pk')).order_by().values('session_id')
+    ExamSession.objects.filter(id__in=session_ids, status='completed').update(
+        total_score=Coalesce(
+            Subquery(session_answers.annotate(total=Sum('score')).values('total'), output_field=_SCORE),
+            Value(Decimal('0')), output_field=_SCORE
+        )
+    )
+    ExamResult.objects.filter(session_id__in=session_ids).update(
+        total_score=total_score,
+        correct_count=correct_count,
+        wrong_count=answer_count - correct_count,
+        percentage=Case(
+            When(exam_has_points, then=total_score * Value(100) / exam_total),
+            default=Value(Decimal('0')),
+            output_field=_SCORE,
+        ),
+    )
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from django.utils import timezone
 from datetime import timedelta
-from .models import ExamSession, StudentAnswer, ExamResult, ExamLog
+from .models import ExamSession, StudentAnswer, ExamResult, ExamLog, RegradeJob
 from exams.models import Exam, ExamQuestion
 from questions.models import Question, QuestionAnswer
 from accounts.models import User
@@ -105,6 +105,17 @@ class ExamSessionSerializer(serializers.ModelSerializer):
         return int((actual_end_time - now).total_seconds())
 
 
+class ExamSessionStartSerializer(ExamSessionSerializer):
+    """
+    Serializer for a session just started: the paper is sent as ``questions``
+    in the student's order, so the canonical ``answers`` rows are left out
+    """
+    answers = None
+    
+    class Meta(ExamSessionSerializer.Meta):
+        fields = [field for field in ExamSessionSerializer.Meta.fields if field != 'answers']
+
+
 class ExamSessionCreateSerializer(serializers.Serializer):
     """Serializer for creating exam sessions"""
     exam_id = serializers.IntegerField()
@@ -138,25 +149,23 @@ class StudentAnswerCreateSerializer(serializers.Serializer):
         selected_answer_id = data.get('selected_answer_id')
         answer_text = data.get('answer_text', '')
         
-        try:
-            exam_question = ExamQuestion.objects.get(id=exam_question_id)
-        except ExamQuestion.DoesNotExist:
+        # The exam's cached paper holds question types and answer ids
+        key = self.context['paper']['key'].get(exam_question_id)
+        if key is None:
             raise serializers.ValidationError("Exam question does not exist")
         
-        question = exam_question.question
-        
         # Validate based on question type
-        if question.type in ['multiple_choice', 'true_false']:
+        if key['type'] in ['multiple_choice', 'true_false']:
             if not selected_answer_id:
                 raise serializers.ValidationError("selected_answer_id is required for this question type")
             
             # Validate that the selected answer belongs to this question
-            try:
-                answer = QuestionAnswer.objects.get(id=selected_answer_id, question=question)
-            except QuestionAnswer.DoesNotExist:
+            if selected_answer_id not in key['answer_ids']:
                 raise serializers.ValidationError("Selected answer does not belong to this question")
         
-        elif question.type in ['fill_blank', 'essay']:
+        elif key['type'] in ['fill_blank', 'essay']:
+            if selected_answer_id is not None:
+                raise serializers.ValidationError("selected_answer_id is not allowed for this question type")
             if not answer_text.strip():
                 raise serializers.ValidationError("answer_text is required for this question type")
         
@@ -338,3 +347,14 @@ class ExamSessionStatisticsSerializer(serializers.Serializer):
     exam = serializers.DictField()
     sessions = serializers.DictField()
     statistics = serializers.DictField()
+
+
+class RegradeJobSerializer(serializers.ModelSerializer):
+    """Serializer for regrade job progress"""
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = RegradeJob
+        fields = ['id', 'question', 'reason', 'status', 'processed', 'total', 'progress', 'error',
+                 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,84 @@
+"""
+Per-student paper variants.
+
+Each session stores a single ``shuffle_seed``; the order of the questions
+and of each question's answers is derived from it deterministically by
+permuting the cached canonical paper (``exams.papers``) in memory. Answer
+ids are never renumbered, so grading only has to look the submitted id up
+in the paper's answer key. Sessions without a seed see the canonical order.
+"""
+import random
+
+MAX_SEED = 2 ** 31 - 1
+AUTO_GRADED_TYPES = ('multiple_choice', 'true_false')
+
+
+def new_seed():
+    return random.SystemRandom().randint(1, MAX_SEED)
+
+
+def shuffle_paper(paper, seed):
+    """Questions of the paper in the order seen by the session with ``seed``"""
+    if seed is None:
+        return paper['questions']
+
+    rng = random.Random(seed)
+    questions = list(paper['questions'])
+    rng.shuffle(questions)
+
+    shuffled = []
+    for exam_question in questions:
+        answers = list(exam_question['question']['answers'])
+        rng.shuffle(answers)
+        shuffled.append({
+            **exam_question,
+            'question': {**exam_question['question'], 'answers': answers},
+        })
+    return shuffled
+
+
+def session_questions(paper, seed, answers=()):
+    """
+    The session's paper in its order, with the student's answers merged in.
+    ``answers`` are ``StudentAnswer`` rows as dicts (see ``ANSWER_FIELDS``).
+    """
+    by_question = {answer['exam_question_id']: answer for answer in answers}
+    questions = []
+    for position, exam_question in enumerate(shuffle_paper(paper, seed), start=1):
+        answer = by_question.get(exam_question['id'], {})
+        questions.append({
+            'id': exam_question['id'],
+            'position': position,
+            'answer_id': answer.get('id'),
+            'exam_question': exam_question,
+            'selected_answer': answer.get('selected_answer_id'),
+            'answer_text': answer.get('answer_text'),
+            'score': float(answer.get('score') or 0),
+            'answered_at': answer.get('answered_at'),
+            'is_correct': answer.get('is_correct', False),
+        })
+    return questions
+
+
+ANSWER_FIELDS = ('id', 'exam_question_id', 'selected_answer_id', 'answer_text', 'score', 'answered_at', 'is_correct')
+
+
+class InvalidAnswer(Exception):
+    pass
+
+
+def grade_answer(paper, exam_question_id, selected_answer_id):
+    """
+    ``(is_correct, score)`` of a submitted choice, from the paper's answer key.
+    Raises ``InvalidAnswer`` when the question is not on the paper or the
+    answer does not belong to it.
+    """
+    key = paper['key'].get(exam_question_id)
+    if key is None:
+        raise InvalidAnswer('Question not found in this exam')
+    if selected_answer_id is not None and selected_answer_id not in key['answer_ids']:
+        raise InvalidAnswer('Selected answer does not belong to this question')
+
+    if key['type'] in AUTO_GRADED_TYPES and selected_answer_id in key['correct_ids']:
+        return True, paper['points']
+    return False, 0.0
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from accounts.models import User
@@ -121,3 +122,254 @@ class ResultsFlowTest(APITestCase):
         self.assertTrue(resp.data.get('success'))
 
 # Create your tests here.
+
+
+class RegradeTest(APITestCase):
+    def setUp(self):
+        from exam_sessions.models import ExamSession, StudentAnswer, ExamResult
+
+        self.teacher = User.objects.create_user(
+            username='teacher_regrade@example.com', email='teacher_regrade@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        now = timezone.now()
+        exam = Exam.objects.create(
+            class_obj=Class.objects.create(className='Regrade', teacher=self.teacher),
+            title='Quiz', minutes=10, total_score=10, start_time=now,
+            end_time=now + timezone.timedelta(hours=1), created_by=self.teacher,
+        )
+        self.question = Question.objects.create(question_text='Capital of Australia?', teacher=self.teacher)
+        self.canberra = QuestionAnswer.objects.create(question=self.question, text='Canberra')
+        self.sydney = QuestionAnswer.objects.create(question=self.question, text='Sydney', is_correct=True)
+        other = Question.objects.create(question_text='2 + 2 = ?', teacher=self.teacher)
+        four = QuestionAnswer.objects.create(question=other, text='4', is_correct=True)
+        eq1 = ExamQuestion.objects.create(exam=exam, question=self.question, order=1)
+        eq2 = ExamQuestion.objects.create(exam=exam, question=other, order=2)
+
+        self.results = []
+        for i, picked in enumerate([self.canberra, self.sydney, self.canberra]):
+            student = User.objects.create_user(
+                username=f'student_regrade{i}@example.com', email=f'student_regrade{i}@example.com',
+                password='pass', fullName='Student', role='student'
+            )
+            session = ExamSession.objects.create(
+                exam=exam, student=student, code=f'REGRADE-{i}', start_time=now,
+                status='completed', total_score=10 if picked.is_correct else 5,
+            )
+            StudentAnswer.objects.create(
+                session=session, exam_question=eq1, selected_answer=picked,
+                is_correct=picked.is_correct, score=5 if picked.is_correct else 0,
+            )
+            StudentAnswer.objects.create(
+                session=session, exam_question=eq2, selected_answer=four, is_correct=True, score=5
+            )
+            self.results.append(ExamResult.objects.create(
+                session=session, student=student, exam=exam,
+                total_score=session.total_score, correct_count=2 if picked.is_correct else 1,
+                wrong_count=0 if picked.is_correct else 1, submitted_at=now,
+                percentage=session.total_score * 10,
+            ))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_answer_key_change_regrades_results(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from exam_sessions.models import RegradeJob
+
+        resp = self.client.put(f'/questions/{self.question.id}/', {
+            'question_text': 'Capital of Australia?',
+            'answers': [
+                {'id': self.canberra.id, 'text': 'Canberra', 'is_correct': True},
+                {'id': self.sydney.id, 'text': 'Sydney', 'is_correct': False},
+            ],
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        job = RegradeJob.objects.get(question=self.question)
+        self.assertEqual(job.status, 'pending')
+
+        # Small chunks so the job goes through several cursor steps
+        call_command('process_regrades', once=True, chunk_size=1, stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.total), ('completed', 3, 3))
+        for result in self.results:
+            result.refresh_from_db()
+        self.assertEqual(
+            [(float(r.total_score), r.correct_count, r.wrong_count, float(r.percentage)) for r in self.results],
+            [(10.0, 2, 0, 100.0), (5.0, 1, 1, 50.0), (10.0, 2, 0, 100.0)],
+        )
+        self.results[1].session.refresh_from_db()
+        self.assertEqual(float(self.results[1].session.total_score), 5.0)
+
+        resp = self.client.get(f'/results/regrades/{job.id}/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['data']['progress'], 100.0)
+
+    def test_stale_running_job_is_resumed_from_cursor(self):
+        from exam_sessions import regrade
+        from exam_sessions.models import RegradeJob
+
+        self.canberra.is_correct = True
+        self.canberra.save()
+        job = RegradeJob.objects.create(
+            question=self.question, reason='answer_key_changed', status='running',
+            heartbeat_at=timezone.now() - regrade.STALE_AFTER * 2,
+        )
+        claimed = regrade.claim_job()
+        self.assertEqual(claimed.id, job.id)
+        # A freshly claimed job is not handed to a second worker
+        self.assertIsNone(regrade.claim_job())
+        regrade.run_job(claimed)
+        self.results[0].refresh_from_db()
+        self.assertEqual(float(self.results[0].percentage), 100.0)
+
+
+class ShuffledPaperTest(APITestCase):
+    def setUp(self):
+        # Papers cached by other tests may belong to reused ids
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username='teacher_shuffle@example.com', email='teacher_shuffle@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        self.student = User.objects.create_user(
+            username='student_shuffle@example.com', email='student_shuffle@example.com',
+            password='pass', fullName='Student', role='student'
+        )
+        class_obj = Class.objects.create(className='Shuffle', teacher=self.teacher)
+        ClassStudent.objects.create(class_obj=class_obj, student=self.student)
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            class_obj=class_obj, title='Shuffled', minutes=30, total_score=10,
+            start_time=now - timezone.timedelta(minutes=5), end_time=now + timezone.timedelta(hours=1),
+            created_by=self.teacher,
+        )
+        self.correct = {}
+        for i in range(5):
+            question = Question.objects.create(question_text=f'Question {i}', teacher=self.teacher)
+            answers = [
+                QuestionAnswer.objects.create(question=question, text=f'{i}.{j}', is_correct=(j == 0))
+                for j in range(4)
+            ]
+            exam_question = ExamQuestion.objects.create(exam=self.exam, question=question, order=i + 1)
+            self.correct[exam_question.id] = answers[0].id
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def test_paper_is_derived_from_session_seed_and_graded_from_key(self):
+        from exam_sessions.models import ExamSession
+        from exam_sessions.shuffle import shuffle_paper, grade_answer
+        from exams.papers import get_paper
+
+        resp = self.client.post('/sessions/start/', {'exam_id': self.exam.id}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        session = ExamSession.objects.get(id=resp.data['data']['id'])
+        self.assertIsNotNone(session.shuffle_seed)
+
+        served = [
+            (q['id'], [a['id'] for a in q['exam_question']['question']['answers']])
+            for q in resp.data['data']['questions']
+        ]
+        derived = [
+            (q['id'], [a['id'] for a in q['question']['answers']])
+            for q in shuffle_paper(get_paper(self.exam.id), session.shuffle_seed)
+        ]
+        self.assertEqual(served, derived)
+        self.assertCountEqual([exam_question_id for exam_question_id, _ in served], self.correct)
+        answers = resp.data['data']['questions'][0]['exam_question']['question']['answers']
+        self.assertEqual(set(answers[0]), {'id', 'text'})
+        self.assertEqual(session.answers.count(), 5)
+
+        exam_question_id = served[0][0]
+        # The answer key comes from the cached paper
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                grade_answer(get_paper(self.exam.id), exam_question_id, self.correct[exam_question_id]),
+                (True, 2.0),
+            )
+
+        resp = self.client.post(f'/sessions/{session.id}/answers/', {
+                'exam_question_id': exam_question_id,
+                'selected_answer_id': self.correct[exam_question_id],
+            }, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertTrue(resp.data['data']['is_correct'])
+        self.assertEqual(float(resp.data['data']['score']), 2.0)
+
+        wrong = next(a for a in served[0][1] if a != self.correct[exam_question_id])
+        resp = self.client.post(f'/sessions/{session.id}/answers/', {
+            'exam_question_id': exam_question_id, 'selected_answer_id': wrong,
+        }, format='json')
+        self.assertFalse(resp.data['data']['is_correct'])
+
+    def test_cached_paper_follows_answer_key_changes(self):
+        from exams.papers import get_paper
+
+        exam_question_id, correct_id = next(iter(self.correct.items()))
+        self.assertEqual(get_paper(self.exam.id)['key'][exam_question_id]['correct_ids'], {correct_id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionAnswer.objects.filter(id=correct_id).get().delete()
+        self.assertEqual(get_paper(self.exam.id)['key'][exam_question_id]['correct_ids'], set())
+
+
+class SessionPaperOrderTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username='teacher_paper@example.com', email='teacher_paper@example.com',
+            password='pass', fullName='Paper Teacher', role='teacher'
+        )
+        self.student = User.objects.create_user(
+            username='student_paper@example.com', email='student_paper@example.com',
+            password='pass', fullName='Paper Student', role='student'
+        )
+        self.class_obj = Class.objects.create(className='Paper Class', teacher=self.teacher)
+        ClassStudent.objects.create(class_obj=self.class_obj, student=self.student)
+
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            class_obj=self.class_obj, title='Paper', total_score=100, minutes=60, created_by=self.teacher,
+            start_time=now - timezone.timedelta(minutes=5), end_time=now + timezone.timedelta(hours=1)
+        )
+        self.other_answer = None
+        for i in range(6):
+            question = Question.objects.create(
+                question_text=f'Question {i}', type='multiple_choice', difficulty='easy', teacher=self.teacher
+            )
+            for j in range(3):
+                answer = QuestionAnswer.objects.create(question=question, text=f'{i}.{j}', is_correct=j == 0)
+            self.other_answer = answer
+            ExamQuestion.objects.create(exam=self.exam, question=question, order=i + 1)
+        essay = Question.objects.create(question_text='Explain', type='essay', difficulty='easy', teacher=self.teacher)
+        self.essay = ExamQuestion.objects.create(exam=self.exam, question=essay, order=7)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def test_paper_order_survives_a_reload(self):
+        resp = self.client.post('/sessions/start/', {'exam_id': self.exam.id}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertNotIn('answers', resp.data['data'])
+        session_id = resp.data['data']['id']
+
+        def order(questions):
+            return [(q['id'], [a['id'] for a in q['exam_question']['question']['answers']]) for q in questions]
+
+        started = order(resp.data['data']['questions'])
+        resp = self.client.get('/sessions/active/')
+        self.assertEqual(order(resp.data['data']['questions']), started)
+        resp = self.client.get(f'/sessions/{session_id}/')
+        self.assertEqual(order(resp.data['data']['questions']), started)
+        self.assertEqual([a['exam_question']['id'] for a in resp.data['data']['answers']], [q for q, _ in started])
+
+    def test_essay_answer_with_a_choice_is_rejected(self):
+        resp = self.client.post('/sessions/start/', {'exam_id': self.exam.id}, format='json')
+        session_id = resp.data['data']['id']
+        resp = self.client.post(f'/sessions/{session_id}/answers/', {
+            'exam_question_id': self.essay.id, 'selected_answer_id': self.other_answer.id, 'answer_text': 'Because'
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
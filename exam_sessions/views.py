@@ -3,25 +3,30 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
-from django.db.models import Q, Count, Avg, Case, When, IntegerField
+from django.db.models import Q, Count, Avg, Case, When, IntegerField, Prefetch
 from django.db import transaction
 from datetime import timedelta
 import uuid
 
-from .models import ExamSession, StudentAnswer, ExamResult, ExamLog
+from .models import ExamSession, StudentAnswer, ExamResult, ExamLog, RegradeJob
 from .serializers import (
-    ExamSessionSerializer, ExamSessionCreateSerializer, ExamSessionDetailSerializer,
+    ExamSessionStartSerializer, ExamSessionCreateSerializer, ExamSessionDetailSerializer,
     ExamSessionListSerializer, ExamSessionActiveSerializer, StudentAnswerCreateSerializer,
     StudentAnswerUpdateSerializer, StudentAnswerSerializer, ExamResultSerializer,
-    ExamSessionStatisticsSerializer
+    ExamSessionStatisticsSerializer, RegradeJobSerializer
 )
+from .shuffle import new_seed, session_questions, grade_answer, InvalidAnswer, ANSWER_FIELDS
 from .permissions import (
     IsStudentOrReadOnly, IsSessionOwnerOrTeacher, IsSessionOwner,
     CanViewClassSessions, CanViewExamSessions
 )
-from exams.models import Exam, ExamQuestion
-from questions.models import QuestionAnswer
+from exams.models import Exam
+from exams.papers import get_paper
+from questions.stats import record_attempts
 from classes.models import ClassStudent
+from classes.membership import is_enrolled
+from notifications.events import publish_to_users
+from accounts.authentication import EXAM_ID_CLAIM
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -55,10 +60,7 @@ def start_exam_session(request):
         }, status=status.HTTP_404_NOT_FOUND)
     
     # Check if student is enrolled in the class
-    if not ClassStudent.objects.filter(
-        class_obj=exam.class_obj, 
-        student=request.user
-    ).exists():
+    if not is_enrolled(request.user.id, exam.class_obj_id):
         return Response({
             'success': False,
             'message': 'You are not enrolled in this class'
@@ -79,21 +81,22 @@ def start_exam_session(request):
     
     # Create new session
     session_code = f"EXAM_{timezone.now().strftime('%Y%m%d')}_{str(uuid.uuid4())[:8].upper()}"
+    paper = get_paper(exam.id)
     
     with transaction.atomic():
         session = ExamSession.objects.create(
             exam=exam,
             student=request.user,
             code=session_code,
-            start_time=timezone.now()
+            start_time=timezone.now(),
+            shuffle_seed=new_seed()
         )
         
         # Create student answer records for all questions
-        for exam_question in exam.exam_questions.all():
-            StudentAnswer.objects.create(
-                session=session,
-                exam_question=exam_question
-            )
+        StudentAnswer.objects.bulk_create([
+            StudentAnswer(session=session, exam_question_id=exam_question['id'])
+            for exam_question in paper['questions']
+        ])
         
         # Log session start
         ExamLog.objects.create(
@@ -102,43 +105,15 @@ def start_exam_session(request):
             actions='exam_started',
             detail='Student started the exam'
         )
+        
+        # Lets the student's event streams time the warnings
+        publish_to_users([request.user.id], 'session.started', {
+            'session_id': session.id, 'exam_id': exam.id, 'deadline': session.deadline.isoformat()
+        })
     
-    # Serialize response with questions
-    response_data = ExamSessionSerializer(session).data
-    
-    # Add questions with answers
-    questions = []
-    for exam_question in exam.exam_questions.all().order_by('order'):
-        question_data = {
-            'id': exam_question.id,
-            'exam_question': {
-                'id': exam_question.id,
-                'order': exam_question.order,
-                'code': exam_question.code,
-                'question': {
-                    'id': exam_question.question.id,
-                    'question_text': exam_question.question.question_text,
-                    'type': exam_question.question.type,
-                    'difficulty': exam_question.question.difficulty,
-                    'image_url': exam_question.question.image_url,
-                    'answers': [
-                        {
-                            'id': answer.id,
-                            'text': answer.text,
-                            'is_correct': answer.is_correct
-                        } for answer in exam_question.question.answers.all()
-                    ]
-                }
-            },
-            'selected_answer': None,
-            'answer_text': None,
-            'score': 0.0,
-            'answered_at': None,
-            'is_correct': False
-        }
-        questions.append(question_data)
-    
-    response_data['questions'] = questions
+    # Serialize response with the questions in this student's shuffled order
+    response_data = ExamSessionStartSerializer(session).data
+    response_data['questions'] = session_questions(paper, session.shuffle_seed)
     
     return Response({
         'success': True,
@@ -153,10 +128,12 @@ def get_active_session(request):
     """
     Get the current active session for the student
     """
-    active_session = ExamSession.objects.filter(
-        student=request.user,
-        status='in_progress'
-    ).first()
+    active_sessions = ExamSession.objects.filter(student=request.user, status='in_progress')
+    # A token issued for one exam only sees that exam's session
+    exam_id = request.auth.get(EXAM_ID_CLAIM) if request.auth is not None else None
+    if exam_id is not None:
+        active_sessions = active_sessions.filter(exam_id=exam_id)
+    active_session = active_sessions.select_related('exam').first()
     
     if not active_session:
         return Response({
@@ -164,10 +141,15 @@ def get_active_session(request):
             'message': 'No active session found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    serializer = ExamSessionActiveSerializer(active_session)
+    data = ExamSessionActiveSerializer(active_session).data
+    # Same paper order as at start, so a reload mid-exam shows the same paper
+    data['questions'] = session_questions(
+        get_paper(active_session.exam_id), active_session.shuffle_seed,
+        active_session.answers.values(*ANSWER_FIELDS)
+    )
     return Response({
         'success': True,
-        'data': serializer.data
+        'data': data
     })
 
 
@@ -191,7 +173,9 @@ def submit_answer(request, session_id):
             'message': 'Session is not active'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    serializer = StudentAnswerCreateSerializer(data=request.data)
+    # Validate and grade against the cached paper of the exam
+    paper = get_paper(session.exam_id)
+    serializer = StudentAnswerCreateSerializer(data=request.data, context={'paper': paper})
     if not serializer.is_valid():
         return Response({
             'success': False,
@@ -202,23 +186,24 @@ def submit_answer(request, session_id):
     exam_question_id = serializer.validated_data['exam_question_id']
     selected_answer_id = serializer.validated_data.get('selected_answer_id')
     answer_text = serializer.validated_data.get('answer_text', '')
-    
     try:
-        exam_question = ExamQuestion.objects.get(id=exam_question_id, exam=session.exam)
-    except ExamQuestion.DoesNotExist:
+        is_correct, score = grade_answer(paper, exam_question_id, selected_answer_id)
+    except InvalidAnswer as e:
         return Response({
             'success': False,
-            'message': 'Question not found in this exam'
-        }, status=status.HTTP_404_NOT_FOUND)
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     # Get or create student answer
     student_answer, created = StudentAnswer.objects.get_or_create(
         session=session,
-        exam_question=exam_question,
+        exam_question_id=exam_question_id,
         defaults={
             'selected_answer_id': selected_answer_id,
             'answer_text': answer_text,
-            'answered_at': timezone.now()
+            'answered_at': timezone.now(),
+            'is_correct': is_correct,
+            'score': score
         }
     )
     
@@ -227,28 +212,11 @@ def submit_answer(request, session_id):
         student_answer.selected_answer_id = selected_answer_id
         student_answer.answer_text = answer_text
         student_answer.answered_at = timezone.now()
+        student_answer.is_correct = is_correct
+        student_answer.score = score
         student_answer.save()
     
-    # Calculate score and correctness
-    question = exam_question.question
-    is_correct = False
-    score = 0.0
-    
-    if question.type in ['multiple_choice', 'true_false']:
-        if selected_answer_id:
-            try:
-                selected_answer = QuestionAnswer.objects.get(id=selected_answer_id)
-                is_correct = selected_answer.is_correct
-                if is_correct:
-                    # Calculate score based on question order and total questions
-                    total_questions = session.exam.exam_questions.count()
-                    score = (session.exam.total_score / total_questions) if total_questions > 0 else 0
-            except QuestionAnswer.DoesNotExist:
-                pass
-    
-    student_answer.is_correct = is_correct
-    student_answer.score = score
-    student_answer.save()
+    exam_question = student_answer.exam_question
     
     # Log answer submission
     ExamLog.objects.create(
@@ -315,17 +283,16 @@ def update_answer(request, session_id, answer_id):
     
     student_answer.answered_at = timezone.now()
     
-    # Recalculate score and correctness
-    question = student_answer.exam_question.question
-    is_correct = False
-    score = 0.0
-    
-    if question.type in ['multiple_choice', 'true_false']:
-        if student_answer.selected_answer:
-            is_correct = student_answer.selected_answer.is_correct
-            if is_correct:
-                total_questions = session.exam.exam_questions.count()
-                score = (session.exam.total_score / total_questions) if total_questions > 0 else 0
+    # Recalculate score and correctness against the cached answer key
+    try:
+        is_correct, score = grade_answer(
+            get_paper(session.exam_id), student_answer.exam_question_id, student_answer.selected_answer_id
+        )
+    except InvalidAnswer as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     student_answer.is_correct = is_correct
     student_answer.score = score
@@ -396,6 +363,13 @@ def submit_exam(request, session_id):
             percentage=percentage
         )
         
+        # Count the attempt in the questions' statistics
+        answered = list(session.answers.values_list('exam_question__question_id', 'is_correct'))
+        record_attempts(
+            [question_id for question_id, _ in answered],
+            [question_id for question_id, is_correct in answered if is_correct]
+        )
+        
         # Log exam submission
         ExamLog.objects.create(
             session=session,
@@ -403,6 +377,10 @@ def submit_exam(request, session_id):
             actions='exam_submitted',
             detail='Student submitted the exam'
         )
+        
+        publish_to_users([request.user.id], 'session.submitted', {
+            'session_id': session.id, 'exam_id': session.exam_id, 'result_id': result.id
+        })
     
     result_serializer = ExamResultSerializer(result)
     
@@ -419,8 +397,11 @@ def get_session_detail(request, session_id):
     """
     Get detailed information about a session
     """
+    answers = StudentAnswer.objects.select_related('selected_answer', 'exam_question__question').prefetch_related(
+        'exam_question__question__answers'
+    )
     try:
-        session = ExamSession.objects.get(id=session_id)
+        session = ExamSession.objects.prefetch_related(Prefetch('answers', queryset=answers)).get(id=session_id)
     except ExamSession.DoesNotExist:
         return Response({
             'success': False,
@@ -437,9 +418,19 @@ def get_session_detail(request, session_id):
         }, status=status.HTTP_403_FORBIDDEN)
     
     serializer = ExamSessionDetailSerializer(session)
+    data = serializer.data
+    
+    # Answers and questions in the order of this student's paper
+    questions = session_questions(
+        get_paper(session.exam_id), session.shuffle_seed,
+        [{field: getattr(answer, field) for field in ANSWER_FIELDS} for answer in session.answers.all()]
+    )
+    positions = {question['id']: question['position'] for question in questions}
+    data['answers'] = sorted(data['answers'], key=lambda answer: positions.get(answer['exam_question']['id'], 0))
+    data['questions'] = questions
     return Response({
         'success': True,
-        'data': serializer.data
+        'data': data
     })
 
 
@@ -927,6 +918,35 @@ def get_exam_results(request, exam_id):
     })
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def publish_exam_results(request, exam_id):
+    """
+    Announce an exam's results to the students who took it (exam's teacher or admin).
+    Notifications are created by the ``process_notifications`` worker; publishing
+    again returns the existing job.
+    """
+    from notifications.fanout import queue_fanout
+    from notifications.serializers import FanoutJobSerializer
+
+    try:
+        exam = Exam.objects.select_related('class_obj').get(id=exam_id)
+    except Exam.DoesNotExist:
+        return Response({'success': False, 'message': 'Exam not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.user.role not in ['teacher', 'admin']:
+        return Response({'success': False, 'message': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    if request.user.role == 'teacher' and exam.class_obj.teacher_id != request.user.id:
+        return Response({'success': False, 'message': 'You can only publish results for your own exams'}, status=status.HTTP_403_FORBIDDEN)
+
+    job, created = queue_fanout(exam, 'results_published')
+    return Response({
+        'success': True,
+        'data': FanoutJobSerializer(job).data,
+        'message': 'Results published, notifications are being sent' if created else 'Results already published'
+    }, status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_student_results(request, student_id):
@@ -1063,4 +1083,62 @@ def get_result_detail(request, result_id):
     return Response({
         'success': True,
         'data': serializer.data
-    })
\ No newline at end of file
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def get_regrade_jobs(request):
+    """
+    List regrade jobs for the teacher's questions (all jobs for admins).
+    Supports filters: question_id, status
+    """
+    if request.user.role not in ['teacher', 'admin']:
+        return Response({'success': False, 'message': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+
+    jobs_qs = RegradeJob.objects.all()
+    if request.user.role == 'teacher':
+        jobs_qs = jobs_qs.filter(question__teacher=request.user)
+
+    question_id = request.GET.get('question_id')
+    status_filter = request.GET.get('status')
+    if question_id:
+        jobs_qs = jobs_qs.filter(question_id=question_id)
+    if status_filter:
+        jobs_qs = jobs_qs.filter(status=status_filter)
+
+    paginator = StandardResultsSetPagination()
+    page = paginator.paginate_queryset(jobs_qs.order_by('-created_at'), request)
+    serializer = RegradeJobSerializer(page if page is not None else jobs_qs, many=True)
+
+    if page is not None:
+        return paginator.get_paginated_response(serializer.data)
+
+    return Response({
+        'success': True,
+        'data': {
+            'results': serializer.data,
+            'count': jobs_qs.count()
+        }
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def get_regrade_job(request, job_id):
+    """
+    Get the progress of a regrade job (question owner or admin).
+    """
+    try:
+        job = RegradeJob.objects.select_related('question').get(id=job_id)
+    except RegradeJob.DoesNotExist:
+        return Response({'success': False, 'message': 'Regrade job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if not (request.user.role == 'admin' or job.question.teacher_id == request.user.id):
+        return Response({'success': False, 'message': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+
+    serializer = RegradeJobSerializer(job)
+    return Response({
+        'success': True,
+        'data': serializer.data
+    })
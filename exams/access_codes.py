@@ -0,0 +1,110 @@
+"""
+Pre-issued exam sign-in codes.
+
+Before an exam, the teacher issues one random code per student of the
+class in a single batch. On exam day a student exchanges the code for an
+access token valid until the end of the exam: a keyed hash lookup on a
+unique index instead of a PBKDF2 password check, and no refresh token
+rows to write. Codes are single-use and only the keyed hash is stored.
+"""
+import hashlib
+import hmac
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import EXAM_ID_CLAIM
+from classes.membership import class_roster, is_enrolled
+from .models import ExamAccessCode
+
+User = get_user_model()
+
+# No 0/O, 1/I/L: codes are read off paper
+CODE_ALPHABET = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+CODE_LENGTH = 10
+EARLY_ACCESS = timedelta(minutes=30)
+
+
+class AccessCodeError(Exception):
+    pass
+
+
+def normalize_code(code):
+    return ''.join(code.split()).replace('-', '').upper()
+
+
+def hash_code(code):
+    key = settings.SECRET_KEY.encode('utf-8')
+    return hmac.new(key, normalize_code(code).encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def _new_code():
+    code = ''.join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+    return f'{code[:5]}-{code[5:]}'
+
+
+def issue_codes(exam, student_ids=None):
+    """
+    Issue new codes for the enrolled students of the exam's class (or the
+    given subset), replacing their previous codes. Returns the plain codes,
+    which are not stored: ``[{'student_id', 'email', 'fullName', 'code'}]``.
+    """
+    roster = class_roster(exam.class_obj_id)
+    student_ids = sorted(roster if student_ids is None else set(student_ids))
+    not_enrolled = [student_id for student_id in student_ids if student_id not in roster]
+    if not_enrolled:
+        raise AccessCodeError(f'Students not enrolled in this class: {not_enrolled}')
+
+    codes = {student_id: _new_code() for student_id in student_ids}
+    with transaction.atomic():
+        ExamAccessCode.objects.filter(exam=exam, student_id__in=student_ids).delete()
+        ExamAccessCode.objects.bulk_create([
+            ExamAccessCode(
+                exam=exam, student_id=student_id, code_hash=hash_code(code),
+                valid_from=exam.start_time - EARLY_ACCESS, expires_at=exam.end_time
+            )
+            for student_id, code in codes.items()
+        ], batch_size=500)
+
+    students = User.objects.filter(id__in=student_ids).order_by('fullName', 'id').values('id', 'email', 'fullName')
+    return [
+        {'student_id': student['id'], 'email': student['email'], 'fullName': student['fullName'],
+         'code': codes[student['id']]}
+        for student in students
+    ]
+
+
+def redeem_code(code):
+    """
+    Exchange a code for ``(student, exam, access_token)``.
+    Raises ``AccessCodeError`` for unknown, used, expired or early codes.
+    """
+    now = timezone.now()
+    try:
+        access = ExamAccessCode.objects.select_related('student', 'exam').get(code_hash=hash_code(code))
+    except ExamAccessCode.DoesNotExist:
+        raise AccessCodeError('Invalid exam code')
+
+    if now < access.valid_from:
+        raise AccessCodeError('This exam code is not valid yet')
+    if now > access.expires_at:
+        raise AccessCodeError('This exam code has expired')
+    student = access.student
+    if not student.is_active or not is_enrolled(student.id, access.exam.class_obj_id):
+        raise AccessCodeError('Invalid exam code')
+
+    # Conditional UPDATE: of two concurrent exchanges only one wins
+    if not ExamAccessCode.objects.filter(pk=access.pk, used_at__isnull=True).update(used_at=now):
+        raise AccessCodeError('This exam code has already been used')
+
+    token = AccessToken.for_user(student)
+    token.set_exp(from_time=now, lifetime=max(access.expires_at - now, timedelta(minutes=1)))
+    token['role'] = student.role
+    # Restricts the token to this exam's session endpoints
+    token[EXAM_ID_CLAIM] = access.exam_id
+    return student, access.exam, str(token)
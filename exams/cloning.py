@@ -0,0 +1,63 @@
+from django.db import connection, transaction
+
+from questions.stats import schedule_refresh
+from .models import Exam, ExamQuestion
+
+
+def _copy_exam_questions(source_exam_id, target_exam_ids):
+    """
+    Copy every question link of the source exam to each target exam with a
+    single INSERT ... SELECT, so the rows never travel through Python.
+    """
+    qn = connection.ops.quote_name
+    exam_questions = qn(ExamQuestion._meta.db_table)
+    exams = qn(Exam._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(target_exam_ids))
+
+    sql = (
+        f"INSERT INTO {exam_questions} ({qn('exam_id')}, {qn('question_id')}, {qn('order')}, {qn('code')}) "
+        f"SELECT e.{qn('id')}, eq.{qn('question_id')}, eq.{qn('order')}, eq.{qn('code')} "
+        f"FROM {exam_questions} eq CROSS JOIN {exams} e "
+        f"WHERE eq.{qn('exam_id')} = %s AND e.{qn('id')} IN ({placeholders})"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [source_exam_id, *target_exam_ids])
+        return cursor.rowcount
+
+
+def clone_exam(exam, target_classes, created_by, time_shift=None):
+    """
+    Clone an exam and its question links into each of the target classes.
+
+    The exam row itself is created once per target class (its primary key is
+    needed and MySQL does not return keys from bulk inserts); all question
+    links are copied in one set-based statement. ``time_shift`` moves the
+    start and end of the exam window. Returns a list of
+    ``{'class_id', 'exam_id'}`` mappings in target order.
+    """
+    start_time = exam.start_time
+    end_time = exam.end_time
+    if time_shift:
+        start_time += time_shift
+        end_time += time_shift
+
+    with transaction.atomic():
+        clones = [
+            Exam.objects.create(
+                class_obj=class_obj,
+                title=exam.title,
+                description=exam.description,
+                total_score=exam.total_score,
+                minutes=exam.minutes,
+                start_time=start_time,
+                end_time=end_time,
+                created_by=created_by,
+            )
+            for class_obj in target_classes
+        ]
+        if clones:
+            _copy_exam_questions(exam.id, [clone.id for clone in clones])
+            # The raw copy bypasses signals, so refresh the usage counters here
+            schedule_refresh(exam.exam_questions.values_list('question_id', flat=True))
+
+    return [{'class_id': clone.class_obj_id, 'exam_id': clone.id} for clone in clones]
@@ -0,0 +1,119 @@
+"""
+Random exam generation from the question bank.
+
+Instead of ``ORDER BY RAND()`` over the whole bank, the ids of each
+(type, difficulty, owner) pool are read once through the composite
+question indexes, cached as a sorted list and sampled in Python with a
+seeded ``random.Random``. The same seed over the same bank always picks
+the same questions, so a generated exam can be reproduced.
+"""
+import random
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from questions.models import Question
+from questions.stats import schedule_refresh
+from questions.tags import tagged_question_ids
+from .models import ExamQuestion
+from .papers import invalidate_papers
+
+POOL_CACHE_TTL = 120
+MAX_SEED = 2 ** 31 - 1
+
+
+class ExamGenerationError(Exception):
+    pass
+
+
+def _pool_cache_key(difficulty, question_type, teacher_id):
+    return f'exams:generator:pool:{question_type or "*"}:{difficulty}:{teacher_id or "*"}'
+
+
+def question_pool(difficulty, question_type=None, teacher_id=None):
+    """Sorted ids of the questions matching the filters, cached briefly"""
+    def load():
+        questions = Question.objects.filter(difficulty=difficulty)
+        if question_type:
+            questions = questions.filter(type=question_type)
+        if teacher_id:
+            questions = questions.filter(teacher_id=teacher_id)
+        return list(questions.order_by('id').values_list('id', flat=True))
+
+    return cache.get_or_set(_pool_cache_key(difficulty, question_type, teacher_id), load, POOL_CACHE_TTL)
+
+
+def sample_questions(distribution, question_type=None, teacher_id=None, seed=None, exclude_ids=(),
+                     tags=(), tag_mode='all'):
+    """
+    Pick question ids per difficulty, e.g. ``{'easy': 15, 'medium': 20, 'hard': 5}``.
+    ``tags`` restricts the pools to questions matching the tag query.
+    Returns ``(seed, question_ids)``; raises ``ExamGenerationError`` when a pool is too small.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randint(0, MAX_SEED)
+    rng = random.Random(seed)
+    exclude_ids = set(exclude_ids)
+    tagged = set(tagged_question_ids(tags, tag_mode)) if tags else None
+
+    picked = []
+    shortages = {}
+    # Fixed difficulty order keeps the draw sequence independent of the dict order
+    for difficulty, _ in Question.DIFFICULTY_CHOICES:
+        count = distribution.get(difficulty, 0)
+        if not count:
+            continue
+        pool = [
+            qid for qid in question_pool(difficulty, question_type, teacher_id)
+            if qid not in exclude_ids and (tagged is None or qid in tagged)
+        ]
+        if len(pool) < count:
+            shortages[difficulty] = len(pool)
+            continue
+        picked.extend(rng.sample(pool, count))
+
+    if shortages:
+        details = ', '.join(f'{difficulty}: only {available} available' for difficulty, available in shortages.items())
+        raise ExamGenerationError(f'Not enough questions in the bank ({details})')
+
+    return seed, picked
+
+
+def generate_exam_questions(exam, distribution, question_type=None, teacher_id=None, seed=None,
+                            tags=(), tag_mode='all'):
+    """
+    Append randomly sampled questions to ``exam``, skipping questions it already
+    has. Returns ``(seed, exam_questions)``.
+    """
+    with transaction.atomic():
+        existing = set(exam.exam_questions.values_list('question_id', flat=True))
+        for _ in range(2):
+            seed, question_ids = sample_questions(
+                distribution, question_type=question_type, teacher_id=teacher_id, seed=seed, exclude_ids=existing,
+                tags=tags, tag_mode=tag_mode
+            )
+            # Cached pools may still hold questions deleted since they were loaded
+            alive = Question.objects.filter(id__in=question_ids).count()
+            if alive == len(question_ids):
+                break
+            for difficulty in distribution:
+                cache.delete(_pool_cache_key(difficulty, question_type, teacher_id))
+        else:
+            raise ExamGenerationError('The question bank changed during generation, please retry')
+
+        start = exam.exam_questions.aggregate(last=Max('order'))['last'] or 0
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=exam, question_id=question_id, order=start + position, code=f'Q{start + position}')
+            for position, question_id in enumerate(question_ids, start=1)
+        ])
+        invalidate_papers([exam.id])
+        schedule_refresh(question_ids)
+
+    # bulk_create does not return primary keys on MySQL, so reload the rows
+    exam_questions = list(
+        exam.exam_questions.filter(question_id__in=question_ids)
+        .select_related('question__teacher')
+        .prefetch_related('question__answers')
+    )
+    return seed, exam_questions
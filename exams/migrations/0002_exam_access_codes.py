@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAccessCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code_hash', models.CharField(max_length=64, unique=True, verbose_name='Code Hash')),
+                ('valid_from', models.DateTimeField(verbose_name='Valid From')),
+                ('expires_at', models.DateTimeField(verbose_name='Expires At')),
+                ('used_at', models.DateTimeField(blank=True, null=True, verbose_name='Used At')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_codes', to='exams.exam', verbose_name='Exam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_access_codes', to=settings.AUTH_USER_MODEL, verbose_name='Student')),
+            ],
+            options={
+                'verbose_name': 'Exam Access Code',
+                'verbose_name_plural': 'Exam Access Codes',
+                'db_table': 'exam_access_codes',
+                'unique_together': {('exam', 'student')},
+            },
+        ),
+    ]
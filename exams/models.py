@@ -94,4 +94,36 @@ class ExamFavorite(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.user.fullName} favorites {self.exam.title}"
\ No newline at end of file
+        return f"{self.user.fullName} favorites {self.exam.title}"
+
+
+class ExamAccessCode(models.Model):
+    """
+    Model representing a one-time sign-in code of a student for an exam
+    """
+    exam = models.ForeignKey(
+        Exam, 
+        on_delete=models.CASCADE, 
+        related_name='access_codes',
+        verbose_name="Exam"
+    )
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL, 
+        on_delete=models.CASCADE, 
+        related_name='exam_access_codes',
+        verbose_name="Student"
+    )
+    code_hash = models.CharField(max_length=64, unique=True, verbose_name="Code Hash")
+    valid_from = models.DateTimeField(verbose_name="Valid From")
+    expires_at = models.DateTimeField(verbose_name="Expires At")
+    used_at = models.DateTimeField(null=True, blank=True, verbose_name="Used At")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+    
+    class Meta:
+        db_table = 'exam_access_codes'
+        verbose_name = "Exam Access Code"
+        verbose_name_plural = "Exam Access Codes"
+        unique_together = ['exam', 'student']
+    
+    def __str__(self):
+        return f"Access code of {self.student.fullName} for {self.exam.title}"
@@ -0,0 +1,89 @@
+"""
+Cached canonical papers.
+
+A paper is the exam's question list (in exam order, answers by id, as
+students see it) with the answer key, built with two queries and cached per exam. Session start
+and grading read it instead of walking ``exam_questions`` row by row, and
+``exams.signals`` drops it whenever the exam, its questions or their
+answers change. Only a shared cache carries that to other processes: with
+a per-process one papers are kept for a few seconds, so an edited answer
+key is not graded against for an hour.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from myproject.cache import shared_ttl
+from .models import Exam, ExamQuestion
+
+PAPER_CACHE_TTL = 60 * 60
+
+
+def _cache_key(exam_id):
+    return f'exams:paper:{exam_id}'
+
+
+def _build_paper(exam_id):
+    exam = Exam.objects.get(id=exam_id)
+    exam_questions = list(
+        ExamQuestion.objects.filter(exam_id=exam_id)
+        .select_related('question')
+        .prefetch_related('question__answers')
+        .order_by('order', 'id')
+    )
+    total_questions = len(exam_questions)
+
+    questions = []
+    key = {}
+    for exam_question in exam_questions:
+        question = exam_question.question
+        answers = sorted(question.answers.all(), key=lambda answer: answer.id)
+        questions.append({
+            'id': exam_question.id,
+            'order': exam_question.order,
+            'code': exam_question.code,
+            'question': {
+                'id': question.id,
+                'question_text': question.question_text,
+                'type': question.type,
+                'difficulty': question.difficulty,
+                'image_url': question.image_url,
+                # Served to students: correctness stays in the key
+                'answers': [{'id': answer.id, 'text': answer.text} for answer in answers],
+            },
+        })
+        key[exam_question.id] = {
+            'type': question.type,
+            'answer_ids': {answer.id for answer in answers},
+            'correct_ids': {answer.id for answer in answers if answer.is_correct},
+        }
+
+    return {
+        'exam_id': exam_id,
+        # Same per-question score as submit_answer has always used
+        'points': (exam.total_score / total_questions) if total_questions > 0 else 0,
+        'questions': questions,
+        'key': key,
+    }
+
+
+def get_paper(exam_id):
+    """Canonical paper of an exam: ``{'exam_id', 'points', 'questions', 'key'}``"""
+    paper = cache.get(_cache_key(exam_id))
+    if paper is None:
+        paper = _build_paper(exam_id)
+        cache.set(_cache_key(exam_id), paper, shared_ttl(PAPER_CACHE_TTL))
+    return paper
+
+
+def invalidate_papers(exam_ids):
+    """Drop cached papers once the current transaction commits"""
+    keys = [_cache_key(exam_id) for exam_id in set(exam_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_question_papers(question_ids):
+    """Drop the cached papers of every exam using the given questions"""
+    invalidate_papers(
+        ExamQuestion.objects.filter(question_id__in=question_ids).values_list('exam_id', flat=True).distinct()
+    )
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from classes.membership import is_enrolled
+
 
 class IsTeacherOrReadOnly(permissions.BasePermission):
     """
@@ -28,7 +30,7 @@ class IsExamOwner(permissions.BasePermission):
             if request.user.role == 'teacher':
                 return request.user == obj.created_by
             elif request.user.role == 'student':
-                return obj.class_obj.students.filter(student=request.user).exists()
+                return is_enrolled(request.user.id, obj.class_obj_id)
             return False
         
         # Write permissions only for the exam owner (teacher)
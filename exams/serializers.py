@@ -1,10 +1,17 @@
+from collections import Counter
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, When, Value, F, Exists, OuterRef, PositiveIntegerField
 from django.utils import timezone
 from datetime import timedelta
 from .models import Exam, ExamQuestion, ExamFavorite
+from .papers import invalidate_papers
+from questions.stats import schedule_refresh
 from classes.models import Class
 from questions.models import Question
+from questions.tags import TAG_MODES, parse_tags
+from classes.membership import class_roster
 from accounts.serializers import UserProfileSerializer
 from classes.serializers import ClassListSerializer
 from questions.serializers import QuestionListSerializer
@@ -47,6 +54,152 @@ class ExamQuestionCreateUpdateSerializer(serializers.Serializer):
         return instance
 
 
+class ExamQuestionBulkItemSerializer(serializers.Serializer):
+    """Serializer for a single entry of a bulk add request"""
+    question_id = serializers.IntegerField()
+    order = serializers.IntegerField(min_value=0)
+    code = serializers.CharField(max_length=50, required=False, allow_blank=True)
+
+
+class ExamQuestionBulkCreateSerializer(serializers.Serializer):
+    """Serializer for adding many questions to an exam in one request"""
+    questions = ExamQuestionBulkItemSerializer(many=True, allow_empty=False)
+    
+    def validate_questions(self, value):
+        exam = self.context['exam']
+        question_ids = [item['question_id'] for item in value]
+        
+        duplicated = sorted(qid for qid, seen in Counter(question_ids).items() if seen > 1)
+        if duplicated:
+            raise serializers.ValidationError(f"Duplicate question ids in request: {duplicated}")
+        
+        # Existence and "already in this exam" are resolved in a single query
+        found = dict(
+            Question.objects.filter(id__in=question_ids)
+            .annotate(in_exam=Exists(
+                ExamQuestion.objects.filter(exam=exam, question=OuterRef('pk'))
+            ))
+            .values_list('id', 'in_exam')
+        )
+        
+        missing = [qid for qid in question_ids if qid not in found]
+        if missing:
+            raise serializers.ValidationError(f"Questions do not exist: {missing}")
+        
+        already_added = [qid for qid in question_ids if found[qid]]
+        if already_added:
+            raise serializers.ValidationError(f"Questions are already in this exam: {already_added}")
+        
+        return value
+    
+    def create(self, validated_data):
+        exam = self.context['exam']
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(
+                exam=exam,
+                question_id=item['question_id'],
+                order=item['order'],
+                code=item.get('code', '')
+            )
+            for item in validated_data['questions']
+        ])
+        # bulk_create does not return primary keys on MySQL, so reload the rows
+        question_ids = [item['question_id'] for item in validated_data['questions']]
+        
+        # bulk_create skips post_save, so drop the cached paper and refresh counters here
+        invalidate_papers([exam.id])
+        schedule_refresh(question_ids)
+        return list(
+            exam.exam_questions.filter(question_id__in=question_ids)
+            .select_related('question__teacher')
+            .prefetch_related('question__answers')
+        )
+
+
+class ExamQuestionReorderSerializer(serializers.Serializer):
+    """Serializer for renumbering every question of an exam"""
+    exam_question_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    
+    def validate_exam_question_ids(self, value):
+        exam = self.context['exam']
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Each exam question may only appear once.")
+        
+        current_ids = set(exam.exam_questions.values_list('id', flat=True))
+        if set(value) != current_ids:
+            raise serializers.ValidationError("The list must contain every question of this exam exactly once.")
+        return value
+    
+    def save(self):
+        exam = self.context['exam']
+        exam_question_ids = self.validated_data['exam_question_ids']
+        
+        # Renumber all rows with a single UPDATE ... CASE statement
+        with transaction.atomic():
+            invalidate_papers([exam.id])
+            return ExamQuestion.objects.filter(exam=exam).update(
+                order=Case(
+                    *[When(id=eq_id, then=Value(position))
+                      for position, eq_id in enumerate(exam_question_ids, start=1)],
+                    default=F('order'),
+                    output_field=PositiveIntegerField()
+                )
+            )
+
+
+class ExamAccessCodeIssueSerializer(serializers.Serializer):
+    """Serializer for issuing exam sign-in codes"""
+    student_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=5000
+    )
+
+
+class ExamCloneSerializer(serializers.Serializer):
+    """Serializer for cloning an exam into other classes"""
+    class_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    shift_minutes = serializers.IntegerField(required=False, default=0)
+    
+    def validate_class_ids(self, value):
+        user = self.context['request'].user
+        # Keep the requested order but drop repeated ids
+        class_ids = list(dict.fromkeys(value))
+        
+        classes = Class.objects.in_bulk(class_ids)
+        missing = [class_id for class_id in class_ids if class_id not in classes]
+        if missing:
+            raise serializers.ValidationError(f"Classes do not exist: {missing}")
+        
+        not_owned = [class_id for class_id in class_ids if classes[class_id].teacher_id != user.id]
+        if not_owned:
+            raise serializers.ValidationError(f"You can only clone exams into your own classes: {not_owned}")
+        
+        return [classes[class_id] for class_id in class_ids]
+
+
+class ExamGenerateSerializer(serializers.Serializer):
+    """Serializer for generating random exam questions from the bank"""
+    easy = serializers.IntegerField(min_value=0, required=False, default=0)
+    medium = serializers.IntegerField(min_value=0, required=False, default=0)
+    hard = serializers.IntegerField(min_value=0, required=False, default=0)
+    type = serializers.ChoiceField(choices=Question.TYPE_CHOICES, required=False)
+    mine = serializers.BooleanField(required=False, default=False)
+    seed = serializers.IntegerField(min_value=0, max_value=2 ** 31 - 1, required=False)
+    tags = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+    tag_mode = serializers.ChoiceField(choices=TAG_MODES, required=False, default='all')
+    
+    def validate_tags(self, value):
+        return parse_tags(','.join(value))
+    
+    def validate(self, attrs):
+        if not (attrs['easy'] or attrs['medium'] or attrs['hard']):
+            raise serializers.ValidationError("Ask for at least one question.")
+        return attrs
+    
+    @property
+    def distribution(self):
+        return {difficulty: self.validated_data[difficulty] for difficulty in ('easy', 'medium', 'hard')}
+
+
 class ExamListSerializer(serializers.ModelSerializer):
     """Serializer for listing exams with basic info"""
     class_obj = ClassListSerializer(read_only=True)
@@ -67,7 +220,7 @@ class ExamListSerializer(serializers.ModelSerializer):
         return obj.exam_questions.count()
     
     def get_student_count(self, obj):
-        return obj.class_obj.students.count()
+        return len(class_roster(obj.class_obj_id))
     
     def get_session_count(self, obj):
         # This will be implemented when exam_sessions module is ready
@@ -293,7 +446,7 @@ class ExamStatisticsSerializer(serializers.Serializer):
     def get_statistics(self, obj):
         # This will be implemented when exam_sessions module is ready
         return {
-            'total_students': obj.class_obj.students.count(),
+            'total_students': len(class_roster(obj.class_obj_id)),
             'completed_sessions': 0,
             'in_progress_sessions': 0,
             'abandoned_sessions': 0,
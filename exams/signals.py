@@ -0,0 +1,40 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from questions.models import Question, QuestionAnswer
+from questions.stats import schedule_refresh
+from .models import Exam, ExamQuestion
+from .papers import invalidate_papers, invalidate_question_papers
+
+
+@receiver(post_save, sender=Exam)
+def invalidate_paper_on_exam_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_papers([instance.pk])
+
+
+@receiver(post_save, sender=ExamQuestion)
+@receiver(post_delete, sender=ExamQuestion)
+def invalidate_paper_on_exam_question_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_papers([instance.exam_id])
+
+
+@receiver(post_save, sender=Question)
+def invalidate_papers_on_question_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_question_papers([instance.pk])
+
+
+@receiver(post_save, sender=QuestionAnswer)
+@receiver(post_delete, sender=QuestionAnswer)
+def invalidate_papers_on_answer_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_question_papers([instance.question_id])
+
+
+@receiver(post_save, sender=ExamQuestion)
+@receiver(post_delete, sender=ExamQuestion)
+def refresh_usage_on_exam_question_change(sender, instance, raw=False, created=True, **kwargs):
+    if not raw and created:
+        schedule_refresh([instance.question_id])
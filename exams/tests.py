@@ -0,0 +1,264 @@
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from accounts.models import User
+from classes.models import Class
+from questions.models import Question
+from exams.models import Exam, ExamQuestion
+
+
+class ExamQuestionBulkTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_bulk@example.com', email='teacher_bulk@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        self.class_obj = Class.objects.create(className='Bulk Class', teacher=self.teacher)
+
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            class_obj=self.class_obj,
+            title='Final',
+            minutes=60,
+            start_time=now,
+            end_time=now + timezone.timedelta(hours=2),
+            created_by=self.teacher,
+        )
+        self.questions = [
+            Question.objects.create(question_text=f'Question {i}', teacher=self.teacher)
+            for i in range(3)
+        ]
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_bulk_add_and_reorder(self):
+        payload = {
+            'questions': [
+                {'question_id': q.id, 'order': i + 1, 'code': f'Q{i + 1}'}
+                for i, q in enumerate(self.questions)
+            ]
+        }
+        resp = self.client.post(f'/exams/{self.exam.id}/questions/bulk/', payload, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['data']['count'], 3)
+
+        # Adding the same questions again is rejected as a whole
+        resp = self.client.post(f'/exams/{self.exam.id}/questions/bulk/', payload, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.exam.exam_questions.count(), 3)
+
+        ids = list(self.exam.exam_questions.order_by('order').values_list('id', flat=True))
+        resp = self.client.put(
+            f'/exams/{self.exam.id}/questions/reorder/',
+            {'exam_question_ids': list(reversed(ids))},
+            format='json',
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            list(self.exam.exam_questions.order_by('order').values_list('id', flat=True)),
+            list(reversed(ids)),
+        )
+
+        # A partial list would leave the numbering ambiguous
+        resp = self.client.put(
+            f'/exams/{self.exam.id}/questions/reorder/',
+            {'exam_question_ids': ids[:2]},
+            format='json',
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_bulk_add_rejects_unknown_and_duplicate_ids(self):
+        resp = self.client.post(
+            f'/exams/{self.exam.id}/questions/bulk/',
+            {'questions': [{'question_id': 999999, 'order': 1}]},
+            format='json',
+        )
+        self.assertEqual(resp.status_code, 400)
+
+        q = self.questions[0]
+        resp = self.client.post(
+            f'/exams/{self.exam.id}/questions/bulk/',
+            {'questions': [{'question_id': q.id, 'order': 1}, {'question_id': q.id, 'order': 2}]},
+            format='json',
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(ExamQuestion.objects.filter(exam=self.exam).exists())
+
+
+class ExamCloneTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_clone@example.com', email='teacher_clone@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        self.source_class = Class.objects.create(className='Source', teacher=self.teacher)
+        self.targets = [
+            Class.objects.create(className=f'Target {i}', teacher=self.teacher) for i in range(2)
+        ]
+
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            class_obj=self.source_class,
+            title='Quiz',
+            minutes=30,
+            start_time=now,
+            end_time=now + timezone.timedelta(hours=1),
+            created_by=self.teacher,
+        )
+        for i in range(3):
+            question = Question.objects.create(question_text=f'Question {i}', teacher=self.teacher)
+            ExamQuestion.objects.create(exam=self.exam, question=question, order=i + 1, code=f'Q{i + 1}')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_clone_copies_questions_and_shifts_window(self):
+        resp = self.client.post(
+            f'/exams/{self.exam.id}/clone/',
+            {'class_ids': [c.id for c in self.targets], 'shift_minutes': 60},
+            format='json',
+        )
+        self.assertEqual(resp.status_code, 201)
+        exam_ids = resp.data['data']['exam_ids']
+        self.assertEqual(len(exam_ids), 2)
+
+        for exam_id, class_obj in zip(exam_ids, self.targets):
+            clone = Exam.objects.get(id=exam_id)
+            self.assertEqual(clone.class_obj, class_obj)
+            self.assertEqual(clone.start_time, self.exam.start_time + timezone.timedelta(minutes=60))
+            self.assertEqual(
+                list(clone.exam_questions.values_list('question_id', 'order', 'code')),
+                list(self.exam.exam_questions.values_list('question_id', 'order', 'code')),
+            )
+
+    def test_clone_into_foreign_class_is_rejected(self):
+        other = User.objects.create_user(
+            username='other_teacher@example.com', email='other_teacher@example.com',
+            password='pass', fullName='Other', role='teacher'
+        )
+        foreign_class = Class.objects.create(className='Foreign', teacher=other)
+        resp = self.client.post(
+            f'/exams/{self.exam.id}/clone/', {'class_ids': [foreign_class.id]}, format='json'
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(Exam.objects.filter(class_obj=foreign_class).exists())
+
+
+class ExamGenerateTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_generate@example.com', email='teacher_generate@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        class_obj = Class.objects.create(className='Generate', teacher=self.teacher)
+        now = timezone.now()
+        self.exams = [
+            Exam.objects.create(
+                class_obj=class_obj, title=f'Random {i}', minutes=30, start_time=now,
+                end_time=now + timezone.timedelta(hours=1), created_by=self.teacher,
+            )
+            for i in range(2)
+        ]
+        for difficulty, count in [('easy', 6), ('medium', 6), ('hard', 2)]:
+            for i in range(count):
+                Question.objects.create(
+                    question_text=f'{difficulty} {i}', difficulty=difficulty, teacher=self.teacher
+                )
+        Question.objects.create(question_text='essay', type='essay', difficulty='hard', teacher=self.teacher)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def generate(self, exam, **payload):
+        return self.client.post(f'/exams/{exam.id}/questions/generate/', payload, format='json')
+
+    def test_generation_follows_distribution_and_seed(self):
+        resp = self.generate(self.exams[0], easy=3, medium=2, hard=1, type='multiple_choice')
+        self.assertEqual(resp.status_code, 201)
+        seed = resp.data['data']['seed']
+        picked = list(self.exams[0].exam_questions.order_by('order').values_list('question__difficulty', flat=True))
+        self.assertEqual(sorted(picked), ['easy'] * 3 + ['hard'] + ['medium'] * 2)
+        self.assertFalse(self.exams[0].exam_questions.filter(question__type='essay').exists())
+
+        resp = self.generate(self.exams[1], easy=3, medium=2, hard=1, type='multiple_choice', seed=seed)
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(
+            list(self.exams[1].exam_questions.order_by('order').values_list('question_id', flat=True)),
+            list(self.exams[0].exam_questions.order_by('order').values_list('question_id', flat=True)),
+        )
+
+    def test_generation_skips_existing_questions_and_reports_shortage(self):
+        self.assertEqual(self.generate(self.exams[0], hard=1, type='multiple_choice').status_code, 201)
+        self.assertEqual(self.generate(self.exams[0], hard=1, type='multiple_choice').status_code, 201)
+        self.assertEqual(self.exams[0].exam_questions.count(), 2)
+        self.assertEqual(
+            list(self.exams[0].exam_questions.order_by('order').values_list('order', 'code')),
+            [(1, 'Q1'), (2, 'Q2')],
+        )
+
+        resp = self.generate(self.exams[0], hard=1, type='multiple_choice')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.exams[0].exam_questions.count(), 2)
+
+
+class ExamAccessCodeTest(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from classes.models import ClassStudent
+        cache.clear()
+
+        self.teacher = User.objects.create_user(
+            username='teacher_codes@example.com', email='teacher_codes@example.com',
+            password='pass', fullName='Code Teacher', role='teacher'
+        )
+        self.class_obj = Class.objects.create(className='Code Class', teacher=self.teacher)
+        self.students = []
+        for i in range(2):
+            student = User.objects.create_user(
+                username=f'coder{i}@example.com', email=f'coder{i}@example.com',
+                password='pass', fullName=f'Coder {i}', role='student'
+            )
+            ClassStudent.objects.create(class_obj=self.class_obj, student=student)
+            self.students.append(student)
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            class_obj=self.class_obj, title='Exam Day', minutes=60, created_by=self.teacher,
+            start_time=now + timezone.timedelta(minutes=10), end_time=now + timezone.timedelta(hours=2)
+        )
+        self.client = APIClient()
+
+    def test_codes_are_issued_for_the_roster_and_redeemed_once(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        self.client.force_authenticate(user=self.teacher)
+        resp = self.client.post(f'/exams/{self.exam.id}/access-codes/', {}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        codes = {item['student_id']: item['code'] for item in resp.data['data']['codes']}
+        self.assertEqual(set(codes), {student.id for student in self.students})
+
+        self.client.force_authenticate(user=None)
+        code = codes[self.students[0].id].lower()
+        # Code lookup, enrollment check (cold membership cache), conditional update; no password hashing
+        with self.assertNumQueries(3):
+            resp = self.client.post('/auth/exam-code/', {'code': code}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        token = AccessToken(resp.data['data']['access'])
+        self.assertEqual((token['user_id'], token['exam_id']), (self.students[0].id, self.exam.id))
+
+        resp = self.client.post('/auth/exam-code/', {'code': code}, format='json')
+        self.assertEqual(resp.status_code, 401)
+
+        # The token only reaches the session endpoints of its exam
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/auth/profile/').status_code, 403)
+        self.assertEqual(self.client.get('/results/my-results/').status_code, 403)
+        # Same url name as the session view, another app's view
+        resp = self.client.put('/questions/1/answers/1/update/', {}, format='json')
+        self.assertEqual((resp.status_code, str(resp.data['detail'])), (403, 'This access token is only valid for its exam'))
+        self.assertEqual(self.client.get('/sessions/active/').status_code, 404)
+        other = Exam.objects.create(
+            class_obj=self.class_obj, title='Other', minutes=60, created_by=self.teacher,
+            start_time=self.exam.start_time, end_time=self.exam.end_time
+        )
+        resp = self.client.post('/sessions/start/', {'exam_id': other.id}, format='json')
+        self.assertEqual(resp.status_code, 403)
@@ -8,9 +8,14 @@ urlpatterns = [
     path('', views.exam_list_create, name='exam-list-create'),
     path('<int:exam_id>/', views.exam_detail, name='exam-detail'),
     path('available/', views.exam_available, name='exam-available'),
+    path('<int:exam_id>/clone/', views.clone_exam, name='clone-exam'),
+    path('<int:exam_id>/access-codes/', views.issue_access_codes, name='issue-access-codes'),
     
     # Exam question management endpoints
     path('<int:exam_id>/questions/', views.add_question_to_exam, name='add-question-to-exam'),
+    path('<int:exam_id>/questions/bulk/', views.bulk_add_questions_to_exam, name='bulk-add-questions-to-exam'),
+    path('<int:exam_id>/questions/generate/', views.generate_exam_questions, name='generate-exam-questions'),
+    path('<int:exam_id>/questions/reorder/', views.reorder_exam_questions, name='reorder-exam-questions'),
     path('<int:exam_id>/questions/<int:exam_question_id>/', views.update_exam_question, name='update-exam-question'),
     path('<int:exam_id>/questions/<int:exam_question_id>/delete/', views.remove_question_from_exam, name='remove-question-from-exam'),
     
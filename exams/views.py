@@ -6,15 +6,26 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from datetime import timedelta
+
+from classes.membership import user_class_ids
 
 from .models import Exam, ExamQuestion, ExamFavorite
+from .cloning import clone_exam as clone_exam_to_classes
+from .access_codes import issue_codes, AccessCodeError, EARLY_ACCESS
+from .generator import generate_exam_questions as generate_from_bank, ExamGenerationError
 from .serializers import (
     ExamListSerializer,
     ExamDetailSerializer,
     ExamCreateUpdateSerializer,
+    ExamCloneSerializer,
+    ExamAccessCodeIssueSerializer,
+    ExamGenerateSerializer,
     ExamAvailableSerializer,
     ExamQuestionSerializer,
     ExamQuestionCreateUpdateSerializer,
+    ExamQuestionBulkCreateSerializer,
+    ExamQuestionReorderSerializer,
     ExamFavoriteSerializer,
     ExamFavoriteListSerializer,
     ExamStatisticsSerializer
@@ -174,6 +185,95 @@ def exam_detail(request, exam_id):
         })
 
 
+@api_view(['POST'])
+@permission_classes([IsTeacherOrReadOnly])
+def clone_exam(request, exam_id):
+    """
+    POST: Clone an exam and its questions into one or more classes (teachers only)
+    """
+    exam = get_object_or_404(Exam, id=exam_id)
+    
+    # Check if user is the teacher who created this exam
+    if request.user != exam.created_by:
+        return Response({
+            'success': False,
+            'message': 'You can only clone your own exams'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = ExamCloneSerializer(data=request.data, context={'request': request})
+    if serializer.is_valid():
+        clones = clone_exam_to_classes(
+            exam,
+            serializer.validated_data['class_ids'],
+            created_by=request.user,
+            time_shift=timedelta(minutes=serializer.validated_data['shift_minutes'])
+        )
+        return Response({
+            'success': True,
+            'data': {
+                'source_exam_id': exam.id,
+                'exams': clones,
+                'exam_ids': [clone['exam_id'] for clone in clones]
+            },
+            'message': 'Exam cloned successfully'
+        }, status=status.HTTP_201_CREATED)
+    
+    return Response({
+        'success': False,
+        'errors': serializer.errors,
+        'message': 'Exam cloning failed'
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsTeacherOrReadOnly])
+def issue_access_codes(request, exam_id):
+    """
+    POST: Issue one-time sign-in codes for the students of the exam's class (teachers only)
+    """
+    exam = get_object_or_404(Exam, id=exam_id)
+    
+    # Check if user is the teacher who created this exam
+    if request.user != exam.created_by:
+        return Response({
+            'success': False,
+            'message': 'You can only issue codes for your own exams'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if exam.end_time <= timezone.now():
+        return Response({
+            'success': False,
+            'message': 'This exam has already ended'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = ExamAccessCodeIssueSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors,
+            'message': 'Invalid request data'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        codes = issue_codes(exam, serializer.validated_data.get('student_ids'))
+    except AccessCodeError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'data': {
+            'exam_id': exam.id,
+            'valid_from': exam.start_time - EARLY_ACCESS,
+            'expires_at': exam.end_time,
+            'codes': codes
+        },
+        'message': f'{len(codes)} access codes issued'
+    }, status=status.HTTP_201_CREATED)
+
+
 @api_view(['GET'])
 @permission_classes([CanAccessAvailableExams])
 def exam_available(request):
@@ -181,8 +281,7 @@ def exam_available(request):
     GET: Get available exams for students
     """
     # Get all classes where the student is enrolled
-    from classes.models import ClassStudent
-    enrolled_classes = ClassStudent.objects.filter(student=request.user).values_list('class_obj', flat=True)
+    enrolled_classes = user_class_ids(request.user.id)
     
     # Get exams for those classes
     now = timezone.now()
@@ -282,6 +381,125 @@ def add_question_to_exam(request, exam_id):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([CanManageExamQuestions])
+def bulk_add_questions_to_exam(request, exam_id):
+    """
+    POST: Add many questions to an exam in one request (teachers only)
+    """
+    exam = get_object_or_404(Exam, id=exam_id)
+    
+    # Check if user is the teacher who created this exam
+    if request.user != exam.created_by:
+        return Response({
+            'success': False,
+            'message': 'You can only add questions to your own exams'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = ExamQuestionBulkCreateSerializer(data=request.data, context={'exam': exam})
+    if serializer.is_valid():
+        exam_questions = serializer.save()
+        response_serializer = ExamQuestionSerializer(exam_questions, many=True)
+        return Response({
+            'success': True,
+            'data': {
+                'results': response_serializer.data,
+                'count': len(exam_questions)
+            },
+            'message': 'Questions added to exam successfully'
+        }, status=status.HTTP_201_CREATED)
+    
+    return Response({
+        'success': False,
+        'errors': serializer.errors,
+        'message': 'Failed to add questions to exam'
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([CanManageExamQuestions])
+def generate_exam_questions(request, exam_id):
+    """
+    POST: Add randomly picked questions to an exam by difficulty (teachers only)
+    """
+    exam = get_object_or_404(Exam, id=exam_id)
+    
+    # Check if user is the teacher who created this exam
+    if request.user != exam.created_by:
+        return Response({
+            'success': False,
+            'message': 'You can only add questions to your own exams'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = ExamGenerateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors,
+            'message': 'Failed to generate exam questions'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        seed, exam_questions = generate_from_bank(
+            exam,
+            serializer.distribution,
+            question_type=serializer.validated_data.get('type'),
+            teacher_id=request.user.id if serializer.validated_data['mine'] else None,
+            seed=serializer.validated_data.get('seed'),
+            tags=serializer.validated_data['tags'],
+            tag_mode=serializer.validated_data['tag_mode'],
+        )
+    except ExamGenerationError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    response_serializer = ExamQuestionSerializer(exam_questions, many=True)
+    return Response({
+        'success': True,
+        'data': {
+            'seed': seed,
+            'results': response_serializer.data,
+            'count': len(exam_questions)
+        },
+        'message': 'Exam questions generated successfully'
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['PUT'])
+@permission_classes([CanManageExamQuestions])
+def reorder_exam_questions(request, exam_id):
+    """
+    PUT: Renumber all questions of an exam atomically (teachers only)
+    """
+    exam = get_object_or_404(Exam, id=exam_id)
+    
+    # Check if user is the teacher who created this exam
+    if request.user != exam.created_by:
+        return Response({
+            'success': False,
+            'message': 'You can only reorder questions in your own exams'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = ExamQuestionReorderSerializer(data=request.data, context={'exam': exam})
+    if serializer.is_valid():
+        updated_count = serializer.save()
+        return Response({
+            'success': True,
+            'data': {
+                'updated_count': updated_count
+            },
+            'message': 'Exam questions reordered successfully'
+        })
+    
+    return Response({
+        'success': False,
+        'errors': serializer.errors,
+        'message': 'Exam question reorder failed'
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['DELETE'])
 @permission_classes([CanManageExamQuestions])
 def remove_question_from_exam(request, exam_id, exam_question_id):
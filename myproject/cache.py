@@ -0,0 +1,21 @@
+"""
+Helpers for entries that are invalidated through the Django cache.
+
+Invalidation only reaches other processes through a shared backend (see
+``CACHES``). With a per-process cache such as ``LocMemCache`` each process
+drops only its own entries, so long-lived entries are kept briefly instead.
+"""
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+LOCAL_TTL = 5
+
+
+def cache_is_shared():
+    """Whether other processes see this process's cache writes and deletes"""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def shared_ttl(timeout):
+    """``timeout`` with a shared cache, ``LOCAL_TTL`` with a per-process one"""
+    return timeout if cache_is_shared() else min(timeout, LOCAL_TTL)
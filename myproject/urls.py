@@ -18,6 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
+    # Admin API first, the admin site would catch every other path under admin/
+    path('admin/', include('accounts.admin_urls')),
     path('admin/', admin.site.urls),
     path('auth/', include('accounts.urls')),
     path('classes/', include('classes.urls')),
@@ -25,4 +27,5 @@ urlpatterns = [
     path('exams/', include('exams.urls')),
     path('sessions/', include('exam_sessions.urls')),
     path('results/', include('exam_sessions.results_urls')),
+    path('notifications/', include('notifications.urls')),
 ]
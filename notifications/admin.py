@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Notification
+from django.db import transaction
+from .counters import delete_notifications
+from .models import Notification, NotificationCounter, FanoutJob
 
 
 @admin.register(Notification)
@@ -8,4 +10,29 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ('is_read', 'created_at', 'related_exam')
     search_fields = ('user__fullName', 'title', 'message')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    readonly_fields = ('created_at',)
+
+    # Deleting unread notifications must lower their users' counters
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            delete_notifications(Notification.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            delete_notifications(queryset)
+
+
+@admin.register(FanoutJob)
+class FanoutJobAdmin(admin.ModelAdmin):
+    list_display = ('exam', 'event', 'status', 'processed', 'total', 'created_at', 'finished_at')
+    list_filter = ('event', 'status', 'created_at')
+    search_fields = ('exam__title',)
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'started_at', 'heartbeat_at', 'finished_at')
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread_count')
+    search_fields = ('user__fullName', 'user__email')
+    readonly_fields = ('user', 'unread_count')
@@ -0,0 +1,90 @@
+"""
+Per-user unread notification counters.
+
+``unread_count`` is read from a ``NotificationCounter`` row instead of a
+COUNT over the user's notifications. Every write that creates or reads
+notifications adjusts the counters in the same transaction with a single
+relative UPDATE (``unread_count = unread_count + n``), so concurrent
+writers never overwrite each other. Notifications deleted with their exam
+are recounted from the table (see ``signals``); other deletes go through
+``delete_notifications`` (the admin does), which recounts too.
+"""
+from django.db.models import F, Value, Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce, Greatest
+
+from .events import publish_to_users
+from .models import Notification, NotificationCounter
+
+
+def unread_count(user_id):
+    return NotificationCounter.objects.filter(user_id=user_id).values_list('unread_count', flat=True).first() or 0
+
+
+def increment_unread(user_ids):
+    """Add one unread notification for each of the given (distinct) users"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+    )
+    NotificationCounter.objects.filter(user_id__in=user_ids).update(unread_count=F('unread_count') + 1)
+
+
+def decrement_unread(user_id, count):
+    if count:
+        NotificationCounter.objects.filter(user_id=user_id).update(
+            unread_count=Greatest(F('unread_count') - count, Value(0))
+        )
+
+
+def notification_event(notification):
+    """Payload of the ``notification`` push event"""
+    return {
+        'id': notification.pk, 'title': notification.title, 'message': notification.message,
+        'created_at': notification.created_at, 'related_exam_id': notification.related_exam_id,
+    }
+
+
+def create_notification(**fields):
+    """Create one notification, count it and push it, call inside a transaction"""
+    notification = Notification.objects.create(**fields)
+    increment_unread([notification.user_id])
+    publish_to_users([notification.user_id], 'notification', notification_event(notification))
+    return notification
+
+
+def mark_read(user_id, notification_ids=None):
+    """
+    Mark the user's unread notifications (all of them, or the given ids)
+    as read; one UPDATE for the rows and one for the counter. Call inside
+    a transaction. Returns the number of notifications marked.
+    """
+    unread = Notification.objects.filter(user_id=user_id, is_read=False)
+    if notification_ids is not None:
+        unread = unread.filter(id__in=notification_ids)
+    updated = unread.update(is_read=True)
+    decrement_unread(user_id, updated)
+    return updated
+
+
+def recount_unread(user_ids):
+    """Recompute the counters of the given users from their notifications, in one UPDATE"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    unread = (
+        Notification.objects.filter(user_id=OuterRef('user_id'), is_read=False)
+        .order_by().values('user_id').annotate(n=Count('id')).values('n')
+    )
+    return NotificationCounter.objects.filter(user_id__in=user_ids).update(
+        unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0))
+    )
+
+
+def delete_notifications(notifications):
+    """Delete a queryset of notifications and recount the counters of their unread recipients"""
+    user_ids = list(notifications.filter(is_read=False).order_by().values_list('user_id', flat=True).distinct())
+    deleted = notifications.delete()[0]
+    recount_unread(user_ids)
+    return deleted
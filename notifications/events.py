@@ -0,0 +1,159 @@
+"""
+Push events for the notification stream.
+
+Code that changes something a connected client shows (a new notification,
+a session started or submitted) publishes an event on the user's channel
+after its transaction commits. ``GET /notifications/stream/`` subscribes
+to the channel and forwards events as server-sent events.
+
+The broker is pluggable (``NOTIFICATION_BROKER`` setting, a dotted path to
+a ``Broker`` subclass). The default ``InProcessBroker`` only reaches
+streams served by the publishing process: with several web processes, or
+for events from the ``process_notifications`` worker, configure a broker
+backed by a shared message bus (``shared = True``). Publishers that only
+run outside the web processes check ``publishes_across_processes`` first.
+
+A subscription is an ``asyncio.Queue`` bound to the event loop of its
+stream, so an idle stream costs one queue and no thread. ``publish`` may
+be called from any thread; events for a subscriber whose queue is full are
+dropped and the stream tells the client to resynchronize instead.
+"""
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = 'notifications.events.InProcessBroker'
+QUEUE_SIZE = 100
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def format_event(name, data):
+    """Encode one server-sent event"""
+    return f'event: {name}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+class Subscription:
+    """The events of one channel, for one stream. Create it from inside the stream's event loop."""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflowed = False
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def deliver(self, event):
+        """Hand an event over to the stream's loop, from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop is closed, the stream is gone
+            self.close()
+
+    async def get(self, timeout):
+        """The next event, or ``None`` if none arrives within ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker(ABC):
+    """Delivers the events published on a channel to the channel's subscriptions"""
+    # Whether events published in one process reach streams served by another
+    shared = False
+
+    @abstractmethod
+    def subscribe(self, channel):
+        """Return a new ``Subscription`` to ``channel``, created on the running event loop"""
+
+    @abstractmethod
+    def unsubscribe(self, subscription):
+        """Stop delivering to ``subscription``"""
+
+    @abstractmethod
+    def publish(self, channel, event):
+        """Deliver ``event`` to the subscriptions of ``channel``, from any thread"""
+
+
+class InProcessBroker(Broker):
+    """Delivers events to the subscriptions of this process"""
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+        return len(subscriptions)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'NOTIFICATION_BROKER', DEFAULT_BROKER))()
+    return _broker
+
+
+def publishes_across_processes():
+    return get_broker().shared
+
+
+def publish_on_commit(events):
+    """Publish ``(user_id, name, data)`` events to the users' channels once the current transaction commits"""
+    events = [(user_id, {'event': name, 'data': data}) for user_id, name, data in events]
+
+    def publish():
+        broker = get_broker()
+        for user_id, event in events:
+            broker.publish(user_channel(user_id), event)
+
+    if events:
+        transaction.on_commit(publish, robust=True)
+
+
+def publish_to_users(user_ids, name, data):
+    """Publish the same event to each user's channel once the current transaction commits"""
+    publish_on_commit((user_id, name, data) for user_id in user_ids)
@@ -0,0 +1,165 @@
+"""
+Fan-out of exam lifecycle notifications.
+
+An exam event (the exam was created, it started, its results were
+published) queues one ``FanoutJob`` per exam and event; the request that
+caused it only inserts that row. Workers (``manage.py process_notifications``)
+claim jobs and walk the recipients in user id order, one chunk per
+transaction: each chunk bulk-creates its notifications, bumps the
+recipients' unread counters and advances the job's cursor in the same
+transaction (and pushes the notifications to open streams when the broker
+is shared across processes), so a job resumed by another worker
+after a crash neither skips nor duplicates recipients.
+
+Exam starts have no request to hook into: the worker queues them itself
+with ``queue_started_exams`` for exams that are currently running.
+"""
+from datetime import timedelta
+
+from django.db import transaction, IntegrityError
+from django.db.models import Q, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .counters import increment_unread, notification_event
+from .events import publish_on_commit, publishes_across_processes
+from .models import FanoutJob, Notification
+
+DEFAULT_CHUNK_SIZE = 1000
+STALE_AFTER = timedelta(minutes=5)
+
+MESSAGES = {
+    'exam_created': (
+        'New Exam Available',
+        "A new exam '{exam}' is now available for your class '{class_name}'",
+    ),
+    'exam_started': (
+        'Exam Started',
+        "The exam '{exam}' for your class '{class_name}' has started",
+    ),
+    'results_published': (
+        'Exam Result Ready',
+        "Your exam result for '{exam}' is now available",
+    ),
+}
+
+
+def _new_job(exam, event):
+    title, message = MESSAGES[event]
+    return FanoutJob(
+        exam=exam, event=event, title=title,
+        message=message.format(exam=exam.title, class_name=exam.class_obj.className),
+    )
+
+
+def queue_fanout(exam, event):
+    """
+    Queue the notifications of an exam event, once per exam and event.
+    Returns ``(job, created)``.
+    """
+    job = FanoutJob.objects.filter(exam=exam, event=event).first()
+    if job is not None:
+        return job, False
+    try:
+        with transaction.atomic():
+            job = _new_job(exam, event)
+            job.save()
+    except IntegrityError:
+        # Queued concurrently
+        return FanoutJob.objects.get(exam=exam, event=event), False
+    return job, True
+
+
+def queue_started_exams(now=None):
+    """Queue ``exam_started`` jobs for running exams that have none yet, returns how many"""
+    from exams.models import Exam
+
+    now = now or timezone.now()
+    exams = (
+        Exam.objects.filter(start_time__lte=now, end_time__gt=now)
+        .exclude(fanout_jobs__event='exam_started')
+        .select_related('class_obj')
+    )
+    jobs = [_new_job(exam, 'exam_started') for exam in exams]
+    # A concurrent worker may have queued some of them meanwhile
+    FanoutJob.objects.bulk_create(jobs, ignore_conflicts=True)
+    return len(jobs)
+
+
+def recipients(job):
+    """Ids of the users to notify, as a queryset of ``student_id`` values"""
+    from classes.models import ClassStudent
+    from exam_sessions.models import ExamResult
+
+    if job.event == 'results_published':
+        rows = ExamResult.objects.filter(exam_id=job.exam_id)
+    else:
+        rows = ClassStudent.objects.filter(class_obj_id=job.exam.class_obj_id)
+    return rows.filter(student__is_active=True).order_by('student_id').values_list('student_id', flat=True).distinct()
+
+
+def _claimable():
+    stale = timezone.now() - STALE_AFTER
+    return Q(status='pending') | Q(status='running', heartbeat_at__lt=stale)
+
+
+def claim_job():
+    """
+    Take the oldest pending job, or a running one whose worker stopped
+    sending heartbeats. Returns ``None`` when there is nothing to do.
+    """
+    candidates = FanoutJob.objects.filter(_claimable()).order_by('created_at').values_list('id', flat=True)[:10]
+    for job_id in candidates:
+        now = timezone.now()
+        claimed = FanoutJob.objects.filter(_claimable(), id=job_id).update(
+            status='running',
+            heartbeat_at=now,
+            started_at=Coalesce(F('started_at'), Value(now)),
+        )
+        if claimed:
+            return FanoutJob.objects.select_related('exam').get(id=job_id)
+    return None
+
+
+def run_job(job, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Create the notifications of a claimed job from its cursor to the end"""
+    # The worker is a process of its own: with an in-process broker no stream would see its events
+    push = publishes_across_processes()
+    try:
+        users = recipients(job)
+        if not job.total:
+            job.total = users.count()
+            job.save(update_fields=['total'])
+
+        while True:
+            user_ids = list(users.filter(student_id__gt=job.cursor)[:chunk_size])
+            if not user_ids:
+                break
+
+            with transaction.atomic():
+                notifications = Notification.objects.bulk_create([
+                    Notification(user_id=user_id, title=job.title, message=job.message, related_exam_id=job.exam_id)
+                    for user_id in user_ids
+                ])
+                increment_unread(user_ids)
+                if push:
+                    publish_on_commit(
+                        (notification.user_id, 'notification', notification_event(notification))
+                        for notification in notifications
+                    )
+                job.cursor = user_ids[-1]
+                job.processed += len(user_ids)
+                job.heartbeat_at = timezone.now()
+                job.save(update_fields=['cursor', 'processed', 'heartbeat_at'])
+
+        job.status = 'completed'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at'])
+
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+        job.save(update_fields=['status', 'error'])
+        raise
+
+    return job
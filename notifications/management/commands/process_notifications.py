@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications import fanout
+from notifications.models import FanoutJob
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued exam notifications and announce exams that have started'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--poll-interval', type=float, default=5.0)
+        parser.add_argument('--chunk-size', type=int, default=fanout.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--retry-failed', action='store_true', help='Requeue failed jobs from their cursor first')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = FanoutJob.objects.filter(status='failed').update(status='pending', error=None)
+            self.stdout.write(f'{requeued} failed jobs requeued')
+
+        while True:
+            started = fanout.queue_started_exams()
+            if started:
+                self.stdout.write(f'{started} started exams queued')
+
+            job = fanout.claim_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Notifying {job.event} of exam {job.exam_id} (job {job.id}, from user {job.cursor})')
+            try:
+                fanout.run_job(job, chunk_size=options['chunk_size'])
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Job {job.id} failed: {e}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(f'Job {job.id} done: {job.processed} notifications created'))
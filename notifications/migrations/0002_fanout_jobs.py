@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0002_exam_access_codes'),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FanoutJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('exam_created', 'Exam Created'), ('exam_started', 'Exam Started'), ('results_published', 'Results Published')], max_length=30, verbose_name='Event')),
+                ('title', models.CharField(max_length=255, verbose_name='Title')),
+                ('message', models.TextField(verbose_name='Message')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('cursor', models.PositiveBigIntegerField(default=0, verbose_name='Last Notified User ID')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Notifications Created')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total Recipients')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Heartbeat At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fanout_jobs', to='exams.exam', verbose_name='Exam')),
+            ],
+            options={
+                'verbose_name': 'Fan-out Job',
+                'verbose_name_plural': 'Fan-out Jobs',
+                'db_table': 'notification_fanout_jobs',
+                'ordering': ['created_at'],
+                'unique_together': {('exam', 'event')},
+            },
+        ),
+    ]
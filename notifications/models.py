@@ -30,6 +30,87 @@ class Notification(models.Model):
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
         ordering = ['-created_at']
+        indexes = [
+            # A user's notifications, optionally by read status, newest first
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notifications_user_read_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.user.fullName} - {self.title}"
\ No newline at end of file
+        return f"{self.user.fullName} - {self.title}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Model holding a user's number of unread notifications, kept in step
+    with the notifications by ``notifications.counters``
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, 
+        on_delete=models.CASCADE, 
+        primary_key=True,
+        related_name='notification_counter',
+        verbose_name="User"
+    )
+    unread_count = models.PositiveIntegerField(default=0, verbose_name="Unread Count")
+    
+    class Meta:
+        db_table = 'notification_counters'
+        verbose_name = "Notification Counter"
+        verbose_name_plural = "Notification Counters"
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count} unread"
+
+class FanoutJob(models.Model):
+    """
+    Model representing a queued delivery of one notification to every recipient of an exam event
+    """
+    EVENT_CHOICES = [
+        ('exam_created', 'Exam Created'),
+        ('exam_started', 'Exam Started'),
+        ('results_published', 'Results Published'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    exam = models.ForeignKey(
+        Exam, 
+        on_delete=models.CASCADE, 
+        related_name='fanout_jobs',
+        verbose_name="Exam"
+    )
+    event = models.CharField(max_length=30, choices=EVENT_CHOICES, verbose_name="Event")
+    title = models.CharField(max_length=255, verbose_name="Title")
+    message = models.TextField(verbose_name="Message")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Status")
+    cursor = models.PositiveBigIntegerField(default=0, verbose_name="Last Notified User ID")
+    processed = models.PositiveIntegerField(default=0, verbose_name="Notifications Created")
+    total = models.PositiveIntegerField(default=0, verbose_name="Total Recipients")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Started At")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Heartbeat At")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finished At")
+    
+    class Meta:
+        db_table = 'notification_fanout_jobs'
+        verbose_name = "Fan-out Job"
+        verbose_name_plural = "Fan-out Jobs"
+        unique_together = ['exam', 'event']
+        ordering = ['created_at']
+    
+    def __str__(self):
+        return f"{self.get_event_display()} - exam {self.exam_id} ({self.status})"
+    
+    @property
+    def progress(self):
+        """Percentage of recipients notified so far"""
+        if self.status == 'completed':
+            return 100.0
+        if self.total == 0:
+            return 0.0
+        return round(min(self.processed, self.total) / self.total * 100, 2)
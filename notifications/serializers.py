@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from classes.membership import user_class_ids
+from exams.models import Exam
+from .models import Notification, FanoutJob
+
+User = get_user_model()
+
+
+class NotificationUserSerializer(serializers.ModelSerializer):
+    """Serializer for the recipient of a notification"""
+    
+    class Meta:
+        model = User
+        fields = ['id', 'fullName', 'email']
+
+
+class NotificationExamSerializer(serializers.ModelSerializer):
+    """Serializer for the exam a notification refers to"""
+    class_obj = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Exam
+        fields = ['id', 'title', 'class_obj']
+    
+    def get_class_obj(self, obj):
+        return {'id': obj.class_obj_id, 'className': obj.class_obj.className}
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Serializer for notifications"""
+    user = NotificationUserSerializer(read_only=True)
+    related_exam = NotificationExamSerializer(read_only=True)
+    
+    class Meta:
+        model = Notification
+        fields = ['id', 'user', 'title', 'message', 'created_at', 'is_read', 'related_exam']
+        read_only_fields = fields
+
+
+class NotificationCreateSerializer(serializers.Serializer):
+    """
+    Serializer for creating a notification. Teachers may only notify
+    students of their classes, about exams of their classes.
+    """
+    user_id = serializers.IntegerField()
+    title = serializers.CharField(max_length=255)
+    message = serializers.CharField()
+    related_exam_id = serializers.IntegerField(required=False, allow_null=True)
+    
+    def validate(self, attrs):
+        sender = self.context['request'].user
+        try:
+            recipient = User.objects.get(id=attrs['user_id'], is_active=True)
+        except User.DoesNotExist:
+            raise serializers.ValidationError({'user_id': 'User does not exist.'})
+        
+        exam = None
+        if attrs.get('related_exam_id') is not None:
+            try:
+                exam = Exam.objects.select_related('class_obj').get(id=attrs['related_exam_id'])
+            except Exam.DoesNotExist:
+                raise serializers.ValidationError({'related_exam_id': 'Exam does not exist.'})
+        
+        if sender.role == 'teacher':
+            teacher_class_ids = set(sender.taught_classes.values_list('id', flat=True))
+            if not teacher_class_ids & user_class_ids(recipient.id):
+                raise serializers.ValidationError({'user_id': 'You can only notify students of your classes.'})
+            if exam is not None and exam.class_obj.teacher_id != sender.id:
+                raise serializers.ValidationError({'related_exam_id': 'You can only refer to exams of your classes.'})
+        
+        attrs['user'] = recipient
+        attrs['related_exam'] = exam
+        return attrs
+
+
+class FanoutJobSerializer(serializers.ModelSerializer):
+    """Serializer for notification fan-out progress"""
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = FanoutJob
+        fields = ['id', 'exam', 'event', 'status', 'processed', 'total', 'progress', 'error',
+                 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from exams.models import Exam
+from .counters import recount_unread
+from .fanout import queue_fanout
+from .models import Notification
+
+
+@receiver(post_save, sender=Exam)
+def announce_new_exam(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        # After commit, so a rolled back exam is not announced; robust, so a
+        # failure to queue does not fail the teacher's request
+        transaction.on_commit(lambda: queue_fanout(instance, 'exam_created'), robust=True)
+
+
+@receiver(pre_delete, sender=Exam)
+def remember_unread_recipients(sender, instance, **kwargs):
+    instance._unread_user_ids = list(
+        Notification.objects.filter(related_exam=instance, is_read=False)
+        .order_by().values_list('user_id', flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=Exam)
+def recount_after_exam_delete(sender, instance, **kwargs):
+    # The exam's notifications are deleted by now, in the same transaction
+    recount_unread(getattr(instance, '_unread_user_ids', ()))
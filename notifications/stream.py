@@ -0,0 +1,217 @@
+"""
+Server-sent events stream of a user's notifications and exam sessions.
+
+Besides forwarding the events published on the user's channel (see
+``events``), the stream keeps the deadlines of the user's active sessions
+and emits ``session.time_warning`` a few minutes before a deadline and
+``session.time_up`` when it passes, from timers rather than queries. An
+idle stream touches the database only when it connects. The access token
+is only checked then too, so the stream ends with ``token_expired`` once
+the token expires and the client reconnects with a fresh one.
+
+``EventSource`` cannot send headers, and access tokens in query strings
+end up in proxy and access logs. Browsers first exchange their access
+token for a stream ticket (``POST /notifications/stream/ticket/``): a
+random, single-use key in the shared cache that expires after
+``STREAM_TICKET_TTL`` seconds.
+"""
+import secrets
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from accounts.authentication import CachedJWTAuthentication, EXAM_ID_CLAIM
+from accounts.user_cache import get_cached_user
+from .counters import unread_count
+from .events import format_event, get_broker, user_channel
+
+KEEPALIVE_INTERVAL = 15
+RETRY_MS = 5000
+STREAM_TICKET_TTL = 30
+# Seconds before a session's deadline at which a time warning is sent
+TIME_WARNINGS = (300, 60)
+
+
+class SessionTimers:
+    """Deadlines of the user's active sessions and the warnings still to send"""
+
+    def __init__(self):
+        self.sessions = {}
+
+    def start(self, session_id, exam_id, deadline):
+        now = timezone.now()
+        pending = [seconds for seconds in TIME_WARNINGS if (deadline - now).total_seconds() > seconds]
+        self.sessions[session_id] = {'exam_id': exam_id, 'deadline': deadline, 'pending': pending}
+
+    def stop(self, session_id):
+        self.sessions.pop(session_id, None)
+
+    def next_wakeup(self, now):
+        """Seconds until the next warning or deadline, ``None`` without active sessions"""
+        moments = []
+        for session in self.sessions.values():
+            remaining = (session['deadline'] - now).total_seconds()
+            moments += [remaining - seconds for seconds in session['pending']]
+            moments.append(remaining)
+        return max(0.0, min(moments)) if moments else None
+
+    def due_events(self, now):
+        events = []
+        for session_id, session in list(self.sessions.items()):
+            remaining = (session['deadline'] - now).total_seconds()
+            if remaining <= 0:
+                events.append(('session.time_up', {'session_id': session_id, 'exam_id': session['exam_id']}))
+                self.stop(session_id)
+                continue
+            due = [seconds for seconds in session['pending'] if remaining <= seconds]
+            if due:
+                session['pending'] = [seconds for seconds in session['pending'] if remaining > seconds]
+                events.append(('session.time_warning', {
+                    'session_id': session_id, 'exam_id': session['exam_id'], 'seconds_remaining': int(remaining)
+                }))
+        return events
+
+
+def _ticket_key(ticket):
+    return f'notifications:stream_ticket:{ticket}'
+
+
+def issue_ticket(user, validated_token):
+    """A single-use ticket opening a stream for ``user`` until the access token expires"""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(_ticket_key(ticket), {'user_id': user.id, 'exp': validated_token['exp']}, STREAM_TICKET_TTL)
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """The ticket's ``{'user_id', 'exp'}``, or None when unknown, expired or already used"""
+    key = _ticket_key(ticket)
+    data = cache.get(key)
+    # Only the request whose delete removed the key gets to use it
+    if data is None or not cache.delete(key):
+        return None
+    return data
+
+
+def authenticate(request):
+    """
+    The user and expiry of the stream, from the access token in the
+    ``Authorization`` header or the stream ticket in the ``ticket`` parameter
+    """
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        ticket = request.GET.get('ticket')
+        data = redeem_ticket(ticket) if ticket else None
+        if data is None:
+            raise AuthenticationFailed('Authentication credentials were not provided.')
+        user = get_cached_user(data['user_id'])
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('User not found or inactive')
+        return user, datetime_from_epoch(data['exp'])
+
+    raw_token = authentication.get_raw_token(header)
+    if not raw_token:
+        raise AuthenticationFailed('Authentication credentials were not provided.')
+    validated_token = authentication.get_validated_token(raw_token)
+    if EXAM_ID_CLAIM in validated_token:
+        # Exam code tokens are limited to their exam's session endpoints
+        raise AuthenticationFailed('This access token is only valid for its exam')
+    return authentication.get_user(validated_token), datetime_from_epoch(validated_token['exp'])
+
+
+def load_state(user):
+    from exam_sessions.models import ExamSession
+
+    sessions = ExamSession.objects.filter(student=user, status='in_progress').select_related('exam')
+    return unread_count(user.id), [(session.id, session.exam_id, session.deadline) for session in sessions]
+
+
+class EventStream:
+    """
+    The body of a stream response. Django calls ``close`` once the response
+    is finished, including when the client disconnected, which drops the
+    subscription.
+    """
+
+    def __init__(self, subscription, unread, active_sessions, expires_at):
+        self.subscription = subscription
+        self.unread = unread
+        self.expires_at = expires_at
+        self.timers = SessionTimers()
+        for session_id, exam_id, deadline in active_sessions:
+            self.timers.start(session_id, exam_id, deadline)
+
+    def __aiter__(self):
+        return self.events()
+
+    def close(self):
+        self.subscription.close()
+
+    async def events(self):
+        subscription, timers = self.subscription, self.timers
+        yield f'retry: {RETRY_MS}\n\n'
+        yield format_event('unread_count', {'unread_count': self.unread})
+        while True:
+            now = timezone.now()
+            expires_in = (self.expires_at - now).total_seconds()
+            if expires_in <= 0:
+                yield format_event('token_expired', {})
+                return
+            wakeup = timers.next_wakeup(now)
+            timeout = min(KEEPALIVE_INTERVAL, expires_in, KEEPALIVE_INTERVAL if wakeup is None else wakeup)
+            event = await subscription.get(timeout)
+
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield format_event('resync', {})
+
+            if event is not None:
+                data = event['data']
+                if event['event'] == 'session.started':
+                    timers.start(data['session_id'], data['exam_id'], datetime.fromisoformat(data['deadline']))
+                elif event['event'] == 'session.submitted':
+                    timers.stop(data['session_id'])
+                yield format_event(event['event'], data)
+
+            # Also after an event: on a busy channel the wait rarely times out
+            now = timezone.now()
+            due = timers.due_events(now)
+            for name, data in due:
+                yield format_event(name, data)
+            if event is None and not due and now < self.expires_at:
+                yield ': keepalive\n\n'
+
+
+async def notification_stream(request):
+    """
+    GET: Stream the user's notification and session events (server-sent events).
+    Serve under ASGI: under WSGI every open stream holds a worker thread.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'Method not allowed'}, status=405)
+
+    try:
+        user, expires_at = await sync_to_async(authenticate)(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return JsonResponse({'success': False, 'message': 'Invalid or missing access token or ticket'}, status=401)
+
+    # Subscribe before loading the state, so nothing published in between is missed
+    subscription = get_broker().subscribe(user_channel(user.id))
+    try:
+        unread, active_sessions = await sync_to_async(load_state)(user)
+    except Exception:
+        subscription.close()
+        raise
+
+    response = StreamingHttpResponse(
+        EventStream(subscription, unread, active_sessions, expires_at), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,3 +1,260 @@
-from django.test import TestCase
+import asyncio
 
-# Create your tests here.
+from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import User
+from classes.models import Class, ClassStudent
+from exams.models import Exam
+from notifications import fanout
+from notifications.admin import NotificationAdmin
+from notifications.counters import create_notification, unread_count
+from notifications.events import get_broker, user_channel
+from notifications.models import FanoutJob, Notification
+from notifications.stream import EventStream, SessionTimers
+
+
+class NotificationFanoutTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_fanout@example.com', email='teacher_fanout@example.com',
+            password='pass', fullName='Fanout Teacher', role='teacher'
+        )
+        self.class_obj = Class.objects.create(className='Fanout Class', teacher=self.teacher)
+        self.students = []
+        for i in range(5):
+            student = User.objects.create_user(
+                username=f'fanout{i}@example.com', email=f'fanout{i}@example.com',
+                password='pass', fullName=f'Fanout {i}', role='student'
+            )
+            ClassStudent.objects.create(class_obj=self.class_obj, student=student)
+            self.students.append(student)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def create_exam(self, start_offset):
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            return Exam.objects.create(
+                class_obj=self.class_obj, title='Fanout Exam', minutes=60, created_by=self.teacher,
+                start_time=now + start_offset, end_time=now + start_offset + timezone.timedelta(hours=1)
+            )
+
+    def test_new_exam_is_fanned_out_in_chunks_by_the_worker(self):
+        exam = self.create_exam(timezone.timedelta(days=1))
+        # Creating the exam only queues the job
+        self.assertFalse(Notification.objects.exists())
+        job = FanoutJob.objects.get(exam=exam, event='exam_created')
+
+        claimed = fanout.claim_job()
+        self.assertEqual(claimed.id, job.id)
+        with self.assertNumQueries(2 + 3 * 7 + 2), self.captureOnCommitCallbacks() as callbacks:
+            # count and save the total; per chunk of two: select, savepoint, insert,
+            # create and bump counters, update cursor, release; an empty select; mark completed
+            job = fanout.run_job(claimed, chunk_size=2)
+        # No stream of the worker's own in-process broker could receive the events
+        self.assertEqual(callbacks, [])
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.processed, job.total), (5, 5))
+
+        notifications = Notification.objects.filter(related_exam=exam)
+        self.assertEqual(set(notifications.values_list('user_id', flat=True)), {s.id for s in self.students})
+        self.assertEqual(notifications.first().title, 'New Exam Available')
+        self.assertIn("'Fanout Class'", notifications.first().message)
+        self.assertIsNone(fanout.claim_job())
+
+    def test_started_exams_are_queued_once_and_results_are_published(self):
+        exam = self.create_exam(-timezone.timedelta(minutes=5))
+        self.assertEqual(fanout.queue_started_exams(), 1)
+        self.assertEqual(fanout.queue_started_exams(), 0)
+        self.assertTrue(FanoutJob.objects.filter(exam=exam, event='exam_started').exists())
+
+        resp = self.client.post(f'/results/exam/{exam.id}/publish/')
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(resp.data['data']['event'], 'results_published')
+        resp = self.client.post(f'/results/exam/{exam.id}/publish/')
+        self.assertEqual(resp.status_code, 200)
+
+        other = User.objects.create_user(
+            username='teacher_other@example.com', email='teacher_other@example.com',
+            password='pass', fullName='Other Teacher', role='teacher'
+        )
+        self.client.force_authenticate(user=other)
+        resp = self.client.post(f'/results/exam/{exam.id}/publish/')
+        self.assertEqual(resp.status_code, 403)
+
+
+class NotificationCounterTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_counter@example.com', email='teacher_counter@example.com',
+            password='pass', fullName='Counter Teacher', role='teacher'
+        )
+        self.student = User.objects.create_user(
+            username='counter@example.com', email='counter@example.com',
+            password='pass', fullName='Counter Student', role='student'
+        )
+        self.class_obj = Class.objects.create(className='Counter Class', teacher=self.teacher)
+        ClassStudent.objects.create(class_obj=self.class_obj, student=self.student)
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            class_obj=self.class_obj, title='Counter Exam', minutes=60, created_by=self.teacher,
+            start_time=now, end_time=now + timezone.timedelta(hours=1)
+        )
+        self.client = APIClient()
+
+    def unread(self):
+        resp = self.client.get('/notifications/unread-count/')
+        return resp.data['data']['unread_count']
+
+    def test_counter_follows_create_read_and_exam_delete(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client.force_authenticate(user=self.teacher)
+        ids = []
+        for i in range(3):
+            resp = self.client.post('/notifications/', {
+                'user_id': self.student.id, 'title': f'Note {i}', 'message': 'Hello', 'related_exam_id': self.exam.id
+            }, format='json')
+            self.assertEqual(resp.status_code, 201)
+            ids.append(resp.data['data']['id'])
+        self.assertEqual(resp.data['data']['related_exam']['class_obj']['className'], 'Counter Class')
+
+        self.client.force_authenticate(user=self.student)
+        self.assertEqual(self.unread(), 3)
+        with self.assertNumQueries(2):
+            # page rows and counter, no COUNT over the user's notifications
+            resp = self.client.get('/notifications/?is_read=false&page_size=2')
+        self.assertEqual(len(resp.data['data']['results']), 2)
+        self.assertEqual(resp.data['data']['unread_count'], 3)
+        resp = self.client.get(resp.data['data']['next'])
+        self.assertEqual(len(resp.data['data']['results']), 1)
+        self.assertIsNone(resp.data['data']['next'])
+
+        resp = self.client.put(f'/notifications/{ids[0]}/read/')
+        self.assertTrue(resp.data['data']['is_read'])
+        # Reading twice does not count twice
+        self.client.put(f'/notifications/{ids[0]}/read/')
+        self.assertEqual(self.unread(), 2)
+
+        resp = self.client.put('/notifications/mark-all-read/', {'notification_ids': [ids[1]]}, format='json')
+        self.assertEqual(resp.data['data']['updated_count'], 1)
+        self.assertEqual(self.unread(), 1)
+
+        self.exam.delete()
+        self.assertEqual(self.unread(), 0)
+        self.assertEqual(self.client.put(f'/notifications/{ids[2]}/read/').status_code, 404)
+
+    def test_admin_deletes_recount_the_counter(self):
+        with transaction.atomic():
+            notifications = [
+                create_notification(user=self.student, title=f'Note {i}', message='Hello') for i in range(3)
+            ]
+        model_admin = NotificationAdmin(Notification, admin.site)
+        model_admin.delete_model(None, notifications[0])
+        model_admin.delete_queryset(None, Notification.objects.filter(id=notifications[1].id))
+        self.assertEqual(unread_count(self.student.id), 1)
+
+    def test_only_own_students_can_be_notified(self):
+        other = User.objects.create_user(
+            username='outsider@example.com', email='outsider@example.com',
+            password='pass', fullName='Outsider', role='student'
+        )
+        self.client.force_authenticate(user=self.teacher)
+        resp = self.client.post('/notifications/', {'user_id': other.id, 'title': 'Hi', 'message': 'Hi'}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+        self.client.force_authenticate(user=self.student)
+        resp = self.client.post('/notifications/', {'user_id': self.student.id, 'title': 'Hi', 'message': 'Hi'}, format='json')
+        self.assertEqual(resp.status_code, 403)
+
+
+class NotificationStreamTest(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            username='streamer@example.com', email='streamer@example.com',
+            password='pass', fullName='Streamer', role='student'
+        )
+
+    async def test_stream_forwards_events_of_the_users_channel(self):
+        resp = await self.async_client.get('/notifications/stream/')
+        self.assertEqual(resp.status_code, 401)
+
+        token = str(AccessToken.for_user(self.student))
+        # Access tokens are not accepted in the url, EventSource uses a single-use ticket
+        resp = await self.async_client.get(f'/notifications/stream/?token={token}')
+        self.assertEqual(resp.status_code, 401)
+        resp = await self.async_client.post('/notifications/stream/ticket/', headers={'authorization': f'Bearer {token}'})
+        self.assertEqual(resp.status_code, 201)
+        ticket = resp.json()['data']['ticket']
+
+        resp = await self.async_client.get(f'/notifications/stream/?ticket={ticket}')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+
+        chunks = aiter(resp.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 5000\n\n')
+        self.assertEqual(await anext(chunks), b'event: unread_count\ndata: {"unread_count": 0}\n\n')
+
+        delivered = get_broker().publish(user_channel(self.student.id), {'event': 'notification', 'data': {'id': 7}})
+        self.assertEqual(delivered, 1)
+        self.assertEqual(await anext(chunks), b'event: notification\ndata: {"id": 7}\n\n')
+
+        await chunks.aclose()
+        # As the server does once the client is gone
+        resp.close()
+        reused = await self.async_client.get(f'/notifications/stream/?ticket={ticket}')
+        self.assertEqual(reused.status_code, 401)
+        self.assertEqual(get_broker().publish(user_channel(self.student.id), {'event': 'noop', 'data': {}}), 0)
+
+    async def test_stream_ends_when_the_token_expires(self):
+        subscription = get_broker().subscribe(user_channel(self.student.id))
+        stream = EventStream(subscription, 0, [], timezone.now() + timezone.timedelta(seconds=0.2))
+        self.addCleanup(stream.close)
+        events = aiter(stream)
+        self.assertEqual(await anext(events), 'retry: 5000\n\n')
+        await anext(events)
+        # The wait is cut short at the expiry rather than the keepalive interval
+        self.assertEqual(await anext(events), 'event: token_expired\ndata: {}\n\n')
+        with self.assertRaises(StopAsyncIteration):
+            await anext(events)
+
+    async def test_session_timers_fire_between_events(self):
+        subscription = get_broker().subscribe(user_channel(self.student.id))
+        now = timezone.now()
+        stream = EventStream(
+            subscription, 0, [(1, 2, now + timezone.timedelta(minutes=30))], now + timezone.timedelta(hours=1)
+        )
+        self.addCleanup(stream.close)
+        events = aiter(stream)
+        await anext(events)
+        await anext(events)
+        for i in range(2):
+            get_broker().publish(user_channel(self.student.id), {'event': 'notification', 'data': {'id': i}})
+        await asyncio.sleep(0)
+
+        self.assertEqual(await anext(events), 'event: notification\ndata: {"id": 0}\n\n')
+        stream.timers.sessions[1]['deadline'] = timezone.now()
+        # The deadline passed while events keep arriving: reported before the next one
+        self.assertTrue((await anext(events)).startswith('event: session.time_up\n'))
+        self.assertEqual(await anext(events), 'event: notification\ndata: {"id": 1}\n\n')
+
+    def test_session_timers_warn_then_time_up(self):
+        now = timezone.now()
+        timers = SessionTimers()
+        timers.start(1, 2, now + timezone.timedelta(seconds=120))
+        # The five minute warning has already passed, the next wakeup is the one minute warning
+        self.assertAlmostEqual(timers.next_wakeup(now), 60, delta=1)
+        self.assertEqual(timers.due_events(now), [])
+
+        events = timers.due_events(now + timezone.timedelta(seconds=61))
+        self.assertEqual([name for name, _ in events], ['session.time_warning'])
+        self.assertEqual(events[0][1]['seconds_remaining'], 59)
+        self.assertEqual(timers.due_events(now + timezone.timedelta(seconds=62)), [])
+
+        events = timers.due_events(now + timezone.timedelta(seconds=120))
+        self.assertEqual(events, [('session.time_up', {'session_id': 1, 'exam_id': 2})])
+        self.assertIsNone(timers.next_wakeup(now))
@@ -0,0 +1,14 @@
+from django.urls import path
+from . import views
+from .stream import notification_stream
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('', views.notification_list_create, name='notification_list_create'),
+    path('unread-count/', views.get_unread_count, name='get_unread_count'),
+    path('stream/', notification_stream, name='notification_stream'),
+    path('stream/ticket/', views.create_stream_ticket, name='create_stream_ticket'),
+    path('mark-all-read/', views.mark_all_read, name='mark_all_read'),
+    path('<int:notification_id>/read/', views.mark_notification_read, name='mark_notification_read'),
+]
@@ -1,3 +1,149 @@
-from django.shortcuts import render
+from rest_framework import status, permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
+from django.db import transaction
 
-# Create your views here.
+from .models import Notification
+from .counters import unread_count, create_notification, mark_read
+from .serializers import NotificationSerializer, NotificationCreateSerializer
+from .stream import STREAM_TICKET_TTL, issue_ticket
+
+
+class CustomPagination(CursorPagination):
+    """
+    Keyset pagination for notifications (newest first): pages are read off
+    the (user, is_read, created_at) index without counting the user's rows
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+    
+    def get_paginated_response(self, data, unread=0):
+        return Response({
+            'success': True,
+            'data': {
+                'results': data,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'unread_count': unread
+            }
+        })
+
+
+def parse_bool(value):
+    return value.lower() in ('true', '1', 'yes')
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def notification_list_create(request):
+    """
+    GET: List the user's notifications, newest first (filters: is_read, related_exam_id)
+    POST: Create a notification (teachers and admins)
+    """
+    if request.method == 'GET':
+        # Served by the (user, is_read, created_at) index
+        notifications = Notification.objects.filter(user=request.user).select_related(
+            'user', 'related_exam__class_obj'
+        )
+        
+        is_read = request.GET.get('is_read')
+        if is_read is not None:
+            notifications = notifications.filter(is_read=parse_bool(is_read))
+        related_exam_id = request.GET.get('related_exam_id')
+        if related_exam_id:
+            notifications = notifications.filter(related_exam_id=related_exam_id)
+        
+        paginator = CustomPagination()
+        page = paginator.paginate_queryset(notifications, request)
+        serializer = NotificationSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data, unread=unread_count(request.user.id))
+    
+    if request.user.role not in ['teacher', 'admin']:
+        return Response({'success': False, 'message': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = NotificationCreateSerializer(data=request.data, context={'request': request})
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors,
+            'message': 'Notification creation failed'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    with transaction.atomic():
+        notification = create_notification(
+            user=data['user'], title=data['title'], message=data['message'], related_exam=data['related_exam']
+        )
+    return Response({
+        'success': True,
+        'data': NotificationSerializer(notification).data,
+        'message': 'Notification created successfully'
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['PUT'])
+@permission_classes([permissions.IsAuthenticated])
+def mark_notification_read(request, notification_id):
+    """Mark one of the user's notifications as read"""
+    with transaction.atomic():
+        if not mark_read(request.user.id, [notification_id]):
+            if not Notification.objects.filter(id=notification_id, user=request.user).exists():
+                return Response({'success': False, 'message': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    notification = Notification.objects.select_related('user', 'related_exam__class_obj').get(id=notification_id)
+    return Response({
+        'success': True,
+        'data': NotificationSerializer(notification).data,
+        'message': 'Notification marked as read'
+    })
+
+
+@api_view(['PUT'])
+@permission_classes([permissions.IsAuthenticated])
+def mark_all_read(request):
+    """
+    Mark all of the user's unread notifications as read, or only those
+    listed in ``notification_ids``
+    """
+    notification_ids = request.data.get('notification_ids')
+    if notification_ids is not None:
+        if not isinstance(notification_ids, list) or not all(isinstance(i, int) for i in notification_ids):
+            return Response({
+                'success': False,
+                'errors': {'notification_ids': ['Expected a list of notification ids.']},
+                'message': 'Invalid notification ids'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
+    with transaction.atomic():
+        updated = mark_read(request.user.id, notification_ids)
+    return Response({
+        'success': True,
+        'data': {'updated_count': updated},
+        'message': 'All notifications marked as read' if notification_ids is None else 'Notifications marked as read'
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def get_unread_count(request):
+    """Get the user's number of unread notifications"""
+    return Response({
+        'success': True,
+        'data': {'unread_count': unread_count(request.user.id)}
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def create_stream_ticket(request):
+    """
+    POST: Exchange the access token for a single-use ticket opening
+    GET /notifications/stream/?ticket=<ticket> with EventSource
+    """
+    return Response({
+        'success': True,
+        'data': {'ticket': issue_ticket(request.user, request.auth), 'expires_in': STREAM_TICKET_TTL}
+    }, status=status.HTTP_201_CREATED)
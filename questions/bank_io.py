@@ -0,0 +1,233 @@
+"""
+Streaming import and export of question banks.
+
+Two formats are supported, both with one question per record:
+
+* ``jsonl``: ``{"question_text", "type", "difficulty", "image_url", "answers": [{"text", "is_correct"}], "tags": [names]}``
+* ``csv``: columns ``question_text,type,difficulty,image_url,answers,tags`` where
+  ``answers`` and ``tags`` hold the same lists JSON-encoded.
+
+Imports are validated in chunks with ``QuestionCreateUpdateSerializer`` and
+written with ``bulk_create``; invalid rows are reported and skipped.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .models import Question, QuestionAnswer
+from .serializers import QuestionCreateUpdateSerializer
+from .tags import add_tags_bulk
+from . import search, similarity, stats
+
+FORMATS = ('jsonl', 'csv')
+CSV_COLUMNS = ['question_text', 'type', 'difficulty', 'image_url', 'answers', 'tags']
+JSON_COLUMNS = ('answers', 'tags')
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+
+class BankImportError(Exception):
+    pass
+
+
+def detect_format(filename, default='jsonl'):
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in FORMATS:
+        return extension
+    if extension == 'json':
+        return 'jsonl'
+    return default
+
+
+def read_records(stream, file_format):
+    """
+    Yield ``(row_number, record)`` pairs from a text stream.
+    Rows that cannot be parsed yield a ``BankImportError`` as the record.
+    """
+    if file_format == 'jsonl':
+        for row_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, BankImportError(f'Invalid JSON: {e}')
+                continue
+            if not isinstance(record, dict):
+                yield row_number, BankImportError('Each line must be a JSON object')
+                continue
+            yield row_number, record
+
+    elif file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row_number, row in enumerate(reader, start=2):
+            record = {key: value for key, value in row.items() if key in CSV_COLUMNS and value != ''}
+            try:
+                for column in JSON_COLUMNS:
+                    if record.get(column):
+                        record[column] = json.loads(record[column])
+            except ValueError as e:
+                yield row_number, BankImportError(f'Invalid {column} JSON: {e}')
+                continue
+            yield row_number, record
+
+    else:
+        raise ValueError(f'Unsupported format: {file_format}')
+
+
+def import_questions(records, teacher, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Validate and insert question records for ``teacher``.
+
+    Returns a report ``{'created', 'failed', 'errors'}`` where ``errors`` lists
+    ``{'row', 'errors'}`` for rejected rows (capped at ``MAX_REPORTED_ERRORS``).
+    """
+    report = {'created': 0, 'failed': 0, 'errors': []}
+    records = iter(records)
+
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        valid = []
+        for row_number, record in chunk:
+            if isinstance(record, BankImportError):
+                _add_error(report, row_number, [str(record)])
+                continue
+            serializer = QuestionCreateUpdateSerializer(data=record)
+            if serializer.is_valid():
+                valid.append((row_number, serializer.validated_data))
+            else:
+                _add_error(report, row_number, serializer.errors)
+
+        if not valid:
+            continue
+        try:
+            report['created'] += _create_chunk([data for _, data in valid], teacher)
+        except BankImportError as e:
+            for row_number, _ in valid:
+                _add_error(report, row_number, [str(e)])
+
+    return report
+
+
+def _add_error(report, row_number, errors):
+    report['failed'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'row': row_number, 'errors': errors})
+
+
+def _create_chunk(validated_rows, teacher):
+    with transaction.atomic():
+        questions = [
+            Question(
+                teacher=teacher,
+                question_text=data['question_text'],
+                type=data.get('type', 'multiple_choice'),
+                difficulty=data.get('difficulty', 'medium'),
+                image_url=data.get('image_url'),
+            )
+            for data in validated_rows
+        ]
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            Question.objects.bulk_create(questions)
+        else:
+            _bulk_create_and_fetch_ids(questions, teacher)
+
+        QuestionAnswer.objects.bulk_create(
+            [
+                QuestionAnswer(question=question, **answer)
+                for question, data in zip(questions, validated_rows)
+                for answer in data.get('answers', [])
+            ],
+            batch_size=1000
+        )
+
+        add_tags_bulk({
+            question.pk: data['tags'] for question, data in zip(questions, validated_rows) if data.get('tags')
+        })
+
+        question_ids = [question.pk for question in questions]
+        transaction.on_commit(lambda: _index_imported(question_ids))
+
+    return len(questions)
+
+
+def _index_imported(question_ids):
+    # bulk_create skips post_save, so update the indexes and counters here
+    search.index_questions(question_ids)
+    similarity.index_questions(question_ids)
+    stats.refresh_question_stats(question_ids)
+
+
+def _bulk_create_and_fetch_ids(questions, teacher):
+    """
+    MySQL does not return keys from a multi-row INSERT, but the rows of one
+    statement receive increasing ids, so read them back above a watermark
+    and check them against the inserted texts.
+    """
+    watermark = Question.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    Question.objects.bulk_create(questions)
+
+    inserted = list(
+        Question.objects.filter(id__gt=watermark, teacher=teacher)
+        .order_by('id')
+        .values_list('id', 'question_text')[:len(questions)]
+    )
+    if [text for _, text in inserted] != [question.question_text for question in questions]:
+        raise BankImportError('Could not match inserted questions, please retry the import')
+
+    for question, (pk, _) in zip(questions, inserted):
+        question.pk = pk
+
+
+class _Echo:
+    """File-like object whose write() just returns the value, for streaming csv"""
+
+    def write(self, value):
+        return value
+
+
+def _record(question):
+    return {
+        'question_text': question.question_text,
+        'type': question.type,
+        'difficulty': question.difficulty,
+        'image_url': question.image_url,
+        'answers': [
+            {'text': answer.text, 'is_correct': answer.is_correct}
+            for answer in question.answers.all()
+        ],
+        'tags': [tag.name for tag in question.tags.all()],
+    }
+
+
+def export_questions(queryset, file_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the serialized question bank line by line"""
+    questions = queryset.order_by('id').prefetch_related('answers', 'tags').iterator(chunk_size=chunk_size)
+
+    if file_format == 'jsonl':
+        for question in questions:
+            yield json.dumps(_record(question), ensure_ascii=False) + '\n'
+
+    elif file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(CSV_COLUMNS)
+        for question in questions:
+            record = _record(question)
+            for column in JSON_COLUMNS:
+                record[column] = json.dumps(record[column], ensure_ascii=False)
+            yield writer.writerow([record[column] or '' for column in CSV_COLUMNS])
+
+    else:
+        raise ValueError(f'Unsupported format: {file_format}')
+
+
+def open_text(binary_file):
+    """Wrap an uploaded (binary) file for text reading, tolerating a UTF-8 BOM"""
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
@@ -0,0 +1,28 @@
+"""
+Index work batched per transaction.
+
+Signals fire once per row, so saving a question with its answers would
+reindex the same question once per answer. ``on_commit_once`` collects the
+ids scheduled for a function and, once the transaction commits, the first
+of its callbacks calls the function once with all of them; the others find
+nothing left to do. Ids left behind by a rolled back transaction are
+indexed with the next commit, which is harmless.
+"""
+import threading
+
+from django.db import transaction
+
+_pending = threading.local()
+
+
+def on_commit_once(func, ids):
+    """Call ``func(ids)`` after commit, with every id scheduled for ``func`` in the meantime"""
+    pending = _pending.__dict__.setdefault('ids', {})
+    pending.setdefault(func, set()).update(ids)
+    transaction.on_commit(lambda: _run(func))
+
+
+def _run(func):
+    ids = _pending.__dict__.get('ids', {}).pop(func, None)
+    if ids:
+        func(sorted(ids))
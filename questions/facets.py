@@ -0,0 +1,79 @@
+"""
+Facet counts for the question list filters.
+
+One GROUP BY (type, difficulty, teacher) over the searched bank returns
+every combination with its count; each facet is then summed in Python
+over the rows that match the *other* active filters, so a facet still
+shows the alternatives to its own selected value. The grouped rows only
+depend on the search text and tag query, so they are cached per query for
+a short time.
+"""
+import hashlib
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Question
+from .search import normalize, search_questions
+from .tags import filter_by_tags, normalize_mode
+
+FACETS_CACHE_TTL = 60
+FACET_FILTERS = ('type', 'difficulty', 'teacher_id')
+
+
+def _cache_key(search, tags, tag_mode):
+    signature = ' '.join(normalize(search).split())
+    if tags:
+        signature += f'|{normalize_mode(tag_mode)}:' + ','.join(sorted(tags))
+    return 'questions:facets:' + hashlib.md5(signature.encode('utf-8')).hexdigest()
+
+
+def _grouped_counts(search, tags=(), tag_mode='all'):
+    def load():
+        questions = filter_by_tags(Question.objects.all(), tags, tag_mode)
+        if search:
+            # Keep only the match filter, the rank annotation would split the groups
+            questions = questions.filter(pk__in=search_questions(Question.objects.all(), search).values('pk'))
+        return list(
+            questions.order_by()
+            .values('type', 'difficulty', 'teacher_id', 'teacher__fullName')
+            .annotate(count=Count('id'))
+        )
+
+    return cache.get_or_set(_cache_key(search, tags, tag_mode), load, FACETS_CACHE_TTL)
+
+
+def question_facets(filters, search='', tags=(), tag_mode='all'):
+    """
+    Counts per type, difficulty and teacher for the question list.
+    ``filters`` maps ``type``/``difficulty``/``teacher_id`` to the selected values.
+    """
+    selected = {name: str(value) for name, value in filters.items() if name in FACET_FILTERS and value}
+    rows = _grouped_counts(search, tags, tag_mode)
+
+    facets = {name: defaultdict(int) for name in FACET_FILTERS}
+    teacher_names = {}
+    for row in rows:
+        teacher_names[row['teacher_id']] = row['teacher__fullName']
+        for name in FACET_FILTERS:
+            if all(str(row[other]) == value for other, value in selected.items() if other != name):
+                facets[name][row[name]] += row['count']
+
+    return {
+        'type': [
+            {'value': value, 'label': label, 'count': facets['type'].get(value, 0)}
+            for value, label in Question.TYPE_CHOICES
+        ],
+        'difficulty': [
+            {'value': value, 'label': label, 'count': facets['difficulty'].get(value, 0)}
+            for value, label in Question.DIFFICULTY_CHOICES
+        ],
+        'teacher': sorted(
+            (
+                {'value': teacher_id, 'label': teacher_names[teacher_id], 'count': count}
+                for teacher_id, count in facets['teacher_id'].items()
+            ),
+            key=lambda facet: (-facet['count'], facet['value'])
+        ),
+    }
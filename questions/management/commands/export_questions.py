@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from questions import bank_io
+from questions.models import Question
+
+
+class Command(BaseCommand):
+    help = 'Export the question bank as CSV/JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, or '-' for stdout")
+        parser.add_argument('--format', dest='file_format', choices=bank_io.FORMATS)
+        parser.add_argument('--teacher', help='Only export questions of the teacher with this email')
+
+    def handle(self, *args, **options):
+        questions = Question.objects.all()
+        if options['teacher']:
+            questions = questions.filter(teacher__email=options['teacher'])
+
+        file_format = options['file_format'] or bank_io.detect_format(options['path'])
+        if options['path'] == '-':
+            self._write(sys.stdout, questions, file_format)
+        else:
+            with open(options['path'], 'w', encoding='utf-8', newline='') as stream:
+                self._write(stream, questions, file_format)
+
+    def _write(self, stream, questions, file_format):
+        for line in bank_io.export_questions(questions, file_format):
+            stream.write(line)
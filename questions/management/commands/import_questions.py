@@ -0,0 +1,38 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from questions import bank_io
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Import a CSV/JSONL question bank for a teacher'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--teacher', required=True, help='Email of the teacher who will own the questions')
+        parser.add_argument('--format', dest='file_format', choices=bank_io.FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=bank_io.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            teacher = User.objects.get(email=options['teacher'], role='teacher')
+        except User.DoesNotExist:
+            raise CommandError(f"Teacher {options['teacher']} does not exist")
+
+        file_format = options['file_format'] or bank_io.detect_format(options['path'])
+        started = time.monotonic()
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            report = bank_io.import_questions(
+                bank_io.read_records(stream, file_format), teacher, chunk_size=options['chunk_size']
+            )
+        elapsed = time.monotonic() - started
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} questions, rejected {report['failed']} rows in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from questions import similarity
+from questions.models import Question
+
+
+class Command(BaseCommand):
+    help = 'Report clusters of near-duplicate questions in the bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=similarity.DUPLICATE_THRESHOLD)
+
+    def handle(self, *args, **options):
+        clusters = similarity.duplicate_clusters(threshold=options['threshold'])
+        texts = dict(
+            Question.objects.filter(
+                id__in=[qid for cluster in clusters for qid in cluster['question_ids']]
+            ).values_list('id', 'question_text')
+        )
+        for cluster in clusters:
+            self.stdout.write(f"Cluster of {len(cluster['question_ids'])} (similarity >= {cluster['similarity']}):")
+            for question_id in cluster['question_ids']:
+                self.stdout.write(f"  #{question_id}: {texts.get(question_id, '')[:80]}")
+        self.stdout.write(self.style.SUCCESS(f'{len(clusters)} duplicate clusters found'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from questions import search, similarity
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search and near-duplicate indexes of the question bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=search.INDEX_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        indexed = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Search index: {indexed} questions'))
+        indexed = similarity.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Duplicate index: {indexed} questions'))
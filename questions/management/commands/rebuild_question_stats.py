@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from questions import stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the usage and correctness counters of every question'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=stats.REFRESH_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        updated = stats.rebuild_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Statistics refreshed for {updated} questions'))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, verbose_name='Token')),
+                ('weight', models.PositiveIntegerField(default=0, verbose_name='Weight')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='questions.question', verbose_name='Question')),
+            ],
+            options={
+                'verbose_name': 'Question Search Token',
+                'verbose_name_plural': 'Question Search Tokens',
+                'db_table': 'question_search_tokens',
+                'indexes': [models.Index(fields=['token', 'question'], name='question_search_token_idx')],
+                'unique_together': {('question', 'token')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0002_question_search_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSignature',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='questions.question', verbose_name='Question')),
+                ('signature', models.BinaryField(verbose_name='Signature')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Question Signature',
+                'verbose_name_plural': 'Question Signatures',
+                'db_table': 'question_signatures',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='Band')),
+                ('bucket', models.BigIntegerField(verbose_name='Bucket')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='questions.question', verbose_name='Question')),
+            ],
+            options={
+                'verbose_name': 'Question LSH Bucket',
+                'verbose_name_plural': 'Question LSH Buckets',
+                'db_table': 'question_lsh_buckets',
+                'indexes': [models.Index(fields=['band', 'bucket'], name='question_lsh_bucket_idx')],
+                'unique_together': {('question', 'band')},
+            },
+        ),
+    ]
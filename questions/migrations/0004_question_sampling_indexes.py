@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0003_question_similarity_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['type', 'difficulty'], name='question_type_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['teacher', 'type', 'difficulty'], name='question_owner_type_diff_idx'),
+        ),
+    ]
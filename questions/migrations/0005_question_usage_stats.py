@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:55
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_field).annotate(n=Count('pk')).values('n'),
+            output_field=IntegerField()
+        ),
+        Value(0)
+    )
+
+
+def backfill_stats(apps, schema_editor):
+    Question = apps.get_model('questions', 'Question')
+    QuestionAnswer = apps.get_model('questions', 'QuestionAnswer')
+    ExamQuestion = apps.get_model('exams', 'ExamQuestion')
+    StudentAnswer = apps.get_model('exam_sessions', 'StudentAnswer')
+
+    attempts = StudentAnswer.objects.filter(
+        exam_question__question_id=OuterRef('pk'), session__status='completed'
+    )
+    Question.objects.update(
+        usage_count=_count(ExamQuestion.objects.filter(question_id=OuterRef('pk')), 'question_id'),
+        answers_count=_count(QuestionAnswer.objects.filter(question_id=OuterRef('pk')), 'question_id'),
+        attempts_count=_count(attempts, 'exam_question__question_id'),
+        correct_count=_count(attempts.filter(is_correct=True), 'exam_question__question_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0004_question_sampling_indexes'),
+        ('exams', '0001_initial'),
+        ('exam_sessions', '0004_session_shuffle_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='answers_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Answers Count'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='attempts_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Attempts Count'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='correct_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Correct Count'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='usage_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Usage Count'),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
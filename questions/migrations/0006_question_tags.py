@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0005_question_usage_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Name')),
+                ('slug', models.SlugField(max_length=100, unique=True, verbose_name='Slug')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Tag',
+                'verbose_name_plural': 'Tags',
+                'db_table': 'tags',
+                'ordering': ['slug'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_tags', to='questions.question', verbose_name='Question')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_tags', to='questions.tag', verbose_name='Tag')),
+            ],
+            options={
+                'verbose_name': 'Question Tag',
+                'verbose_name_plural': 'Question Tags',
+                'db_table': 'question_tags',
+            },
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='questions', through='questions.QuestionTag', to='questions.tag', verbose_name='Tags'),
+        ),
+        migrations.AddIndex(
+            model_name='questiontag',
+            index=models.Index(fields=['tag', 'question'], name='question_tag_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='questiontag',
+            unique_together={('question', 'tag')},
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0006_question_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='question',
+            name='question_type_difficulty_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='question',
+            name='question_owner_type_diff_idx',
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['difficulty', 'type'], name='question_difficulty_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['teacher', 'difficulty', 'type'], name='question_owner_diff_type_idx'),
+        ),
+    ]
@@ -30,15 +30,40 @@ class Question(models.Model):
     type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='multiple_choice', verbose_name="Type")
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES, default='medium', verbose_name="Difficulty")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+    tags = models.ManyToManyField(
+        'Tag', 
+        through='QuestionTag', 
+        related_name='questions',
+        blank=True,
+        verbose_name="Tags"
+    )
+    
+    # Denormalized statistics, maintained by questions.stats
+    usage_count = models.PositiveIntegerField(default=0, verbose_name="Usage Count")
+    answers_count = models.PositiveIntegerField(default=0, verbose_name="Answers Count")
+    attempts_count = models.PositiveIntegerField(default=0, verbose_name="Attempts Count")
+    correct_count = models.PositiveIntegerField(default=0, verbose_name="Correct Count")
     
     class Meta:
         db_table = 'questions'
         verbose_name = "Question"
         verbose_name_plural = "Questions"
         ordering = ['-created_at']
+        indexes = [
+            # Pools sampled by exams.generator: always by difficulty, optionally by type
+            models.Index(fields=['difficulty', 'type'], name='question_difficulty_type_idx'),
+            models.Index(fields=['teacher', 'difficulty', 'type'], name='question_owner_diff_type_idx'),
+        ]
     
     def __str__(self):
         return f"{self.question_text[:50]}... - {self.teacher.fullName}"
+    
+    @property
+    def correct_rate(self):
+        """Share of submitted answers to this question that were correct"""
+        if not self.attempts_count:
+            return None
+        return round(self.correct_count / self.attempts_count * 100, 2)
 
 
 class QuestionAnswer(models.Model):
@@ -63,4 +88,127 @@ class QuestionAnswer(models.Model):
         ordering = ['id']
     
     def __str__(self):
-        return f"{self.text[:30]}... - {'✓' if self.is_correct else '✗'}"
\ No newline at end of file
+        return f"{self.text[:30]}... - {'✓' if self.is_correct else '✗'}"
+
+
+class Tag(models.Model):
+    """
+    Model representing a topic tag for questions
+    """
+    name = models.CharField(max_length=100, verbose_name="Name")
+    slug = models.SlugField(max_length=100, unique=True, verbose_name="Slug")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+    
+    class Meta:
+        db_table = 'tags'
+        verbose_name = "Tag"
+        verbose_name_plural = "Tags"
+        ordering = ['slug']
+    
+    def __str__(self):
+        return self.name
+
+
+class QuestionTag(models.Model):
+    """
+    Model representing the many-to-many relationship between questions and tags
+    """
+    question = models.ForeignKey(
+        Question, 
+        on_delete=models.CASCADE, 
+        related_name='question_tags',
+        verbose_name="Question"
+    )
+    tag = models.ForeignKey(
+        Tag, 
+        on_delete=models.CASCADE, 
+        related_name='question_tags',
+        verbose_name="Tag"
+    )
+    
+    class Meta:
+        db_table = 'question_tags'
+        verbose_name = "Question Tag"
+        verbose_name_plural = "Question Tags"
+        unique_together = ['question', 'tag']
+        indexes = [
+            models.Index(fields=['tag', 'question'], name='question_tag_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tag_id} -> {self.question_id}"
+
+
+class QuestionSearchToken(models.Model):
+    """
+    Inverted index entry for question search: one row per (question, token)
+    """
+    question = models.ForeignKey(
+        Question, 
+        on_delete=models.CASCADE, 
+        related_name='search_tokens',
+        verbose_name="Question"
+    )
+    token = models.CharField(max_length=64, verbose_name="Token")
+    weight = models.PositiveIntegerField(default=0, verbose_name="Weight")
+    
+    class Meta:
+        db_table = 'question_search_tokens'
+        verbose_name = "Question Search Token"
+        verbose_name_plural = "Question Search Tokens"
+        unique_together = ['question', 'token']
+        indexes = [
+            models.Index(fields=['token', 'question'], name='question_search_token_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.token} -> {self.question_id} ({self.weight})"
+
+
+class QuestionSignature(models.Model):
+    """
+    MinHash signature of a question's text, used for near-duplicate detection
+    """
+    question = models.OneToOneField(
+        Question, 
+        on_delete=models.CASCADE, 
+        primary_key=True,
+        related_name='signature',
+        verbose_name="Question"
+    )
+    signature = models.BinaryField(verbose_name="Signature")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+    
+    class Meta:
+        db_table = 'question_signatures'
+        verbose_name = "Question Signature"
+        verbose_name_plural = "Question Signatures"
+    
+    def __str__(self):
+        return f"Signature of question {self.question_id}"
+
+
+class QuestionLSHBucket(models.Model):
+    """
+    Locality-sensitive hashing bucket: questions sharing a (band, bucket) pair are duplicate candidates
+    """
+    question = models.ForeignKey(
+        Question, 
+        on_delete=models.CASCADE, 
+        related_name='lsh_buckets',
+        verbose_name="Question"
+    )
+    band = models.PositiveSmallIntegerField(verbose_name="Band")
+    bucket = models.BigIntegerField(verbose_name="Bucket")
+    
+    class Meta:
+        db_table = 'question_lsh_buckets'
+        verbose_name = "Question LSH Bucket"
+        verbose_name_plural = "Question LSH Buckets"
+        unique_together = ['question', 'band']
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='question_lsh_bucket_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Question {self.question_id} band {self.band}: {self.bucket}"
@@ -0,0 +1,156 @@
+"""
+Full-text search over the question bank.
+
+Questions are indexed into ``QuestionSearchToken`` rows (an inverted index kept
+in the database, so it works the same on MySQL and SQLite). Text is folded to
+lowercase ASCII so Vietnamese input matches with or without diacritics, and
+adjacent syllables are also indexed as bigrams ("hoc_sinh") because most
+Vietnamese words span several space-separated syllables.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, When, Value, F, Sum, Count, FloatField, IntegerField, OuterRef, Subquery
+
+from .batching import on_commit_once
+from .models import Question, QuestionAnswer, QuestionSearchToken
+
+QUESTION_TEXT_WEIGHT = 3
+ANSWER_TEXT_WEIGHT = 1
+MAX_TOKEN_LENGTH = 64
+INDEX_BATCH_SIZE = 500
+TOTAL_QUESTIONS_CACHE_KEY = 'questions:search:total'
+TOTAL_QUESTIONS_CACHE_TTL = 300
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Lowercase text and strip diacritics ('Hà Nội' -> 'ha noi')"""
+    text = (text or '').replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    """Split text into normalized word tokens"""
+    return [token[:MAX_TOKEN_LENGTH] for token in _WORD_RE.findall(normalize(text))]
+
+
+def bigrams(tokens):
+    """Join adjacent tokens so multi-syllable words rank higher"""
+    return [f"{a}_{b}"[:MAX_TOKEN_LENGTH] for a, b in zip(tokens, tokens[1:])]
+
+
+def _weigh(weights, text, field_weight):
+    tokens = tokenize(text)
+    for token in tokens:
+        weights[token] += field_weight
+    for token in bigrams(tokens):
+        weights[token] += field_weight
+
+
+def index_questions(question_ids):
+    """(Re)build the index rows of the given questions with bulk writes"""
+    question_ids = list(question_ids)
+    for start in range(0, len(question_ids), INDEX_BATCH_SIZE):
+        _index_batch(question_ids[start:start + INDEX_BATCH_SIZE])
+
+
+def _index_batch(question_ids):
+    texts = dict(Question.objects.filter(id__in=question_ids).values_list('id', 'question_text'))
+    answer_texts = defaultdict(list)
+    for question_id, text in QuestionAnswer.objects.filter(question_id__in=texts).values_list('question_id', 'text'):
+        answer_texts[question_id].append(text)
+
+    rows = []
+    for question_id, question_text in texts.items():
+        weights = Counter()
+        _weigh(weights, question_text, QUESTION_TEXT_WEIGHT)
+        for text in answer_texts[question_id]:
+            _weigh(weights, text, ANSWER_TEXT_WEIGHT)
+        rows.extend(
+            QuestionSearchToken(question_id=question_id, token=token, weight=weight)
+            for token, weight in weights.items()
+        )
+
+    with transaction.atomic():
+        QuestionSearchToken.objects.filter(question_id__in=question_ids).delete()
+        QuestionSearchToken.objects.bulk_create(rows, batch_size=1000)
+
+
+def schedule_index(question_id):
+    """Reindex a question once the current transaction commits, once per transaction"""
+    on_commit_once(index_questions, [question_id])
+
+
+def rebuild_index(batch_size=INDEX_BATCH_SIZE):
+    """Reindex the whole question bank, returns the number of questions indexed"""
+    indexed = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Question.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return indexed
+        _index_batch(ids)
+        indexed += len(ids)
+        last_id = ids[-1]
+
+
+def _total_questions():
+    return cache.get_or_set(TOTAL_QUESTIONS_CACHE_KEY, Question.objects.count, TOTAL_QUESTIONS_CACHE_TTL)
+
+
+def search_questions(queryset, query):
+    """
+    Restrict ``queryset`` to questions containing every word of ``query``.
+
+    Results are annotated with ``search_rank`` (weighted term frequency times
+    inverse document frequency, bigram matches add to the rank) and ordered by it.
+    """
+    tokens = tokenize(query)
+    terms = list(dict.fromkeys(tokens))
+    if not terms:
+        return queryset.none()
+    phrases = list(dict.fromkeys(bigrams(tokens)))
+
+    document_frequency = dict(
+        QuestionSearchToken.objects.filter(token__in=terms + phrases)
+        .values('token')
+        .annotate(n=Count('question_id'))
+        .values_list('token', 'n')
+    )
+    if any(term not in document_frequency for term in terms):
+        return queryset.none()
+
+    total = max(_total_questions(), 1)
+    idf = {token: math.log(1 + total / n) for token, n in document_frequency.items()}
+
+    matches = (
+        QuestionSearchToken.objects.filter(token__in=list(idf))
+        .values('question_id')
+        .annotate(
+            matched=Count(Case(When(token__in=terms, then=Value(1)), output_field=IntegerField())),
+            rank=Sum(Case(
+                *[When(token=token, then=F('weight') * Value(weight)) for token, weight in idf.items()],
+                default=Value(0.0),
+                output_field=FloatField()
+            ))
+        )
+        .filter(matched=len(terms))
+    )
+
+    return (
+        queryset.filter(id__in=matches.values('question_id'))
+        .annotate(search_rank=Subquery(
+            matches.filter(question_id=OuterRef('pk')).values('rank')[:1],
+            output_field=FloatField()
+        ))
+        .order_by('-search_rank', '-created_at')
+    )
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
 from .models import Question, QuestionAnswer
+from .tags import MAX_TAGS_PER_QUESTION, set_question_tags
 from accounts.serializers import UserProfileSerializer
 
 User = get_user_model()
@@ -25,48 +28,61 @@ class QuestionAnswerCreateUpdateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['question'] = self.context['question']
         return super().create(validated_data)
+    
+    def update(self, instance, validated_data):
+        was_correct = instance.is_correct
+        answer = super().update(instance, validated_data)
+        if answer.is_correct != was_correct:
+            regrade_if_selected(answer.question_id, [answer.id], 'answer_key_changed')
+        return answer
+
+
+class QuestionAnswerItemSerializer(QuestionAnswerCreateUpdateSerializer):
+    """Answer inside a question payload; ``id`` identifies an existing answer to keep"""
+    id = serializers.IntegerField(required=False)
+    
+    class Meta(QuestionAnswerCreateUpdateSerializer.Meta):
+        fields = ['id', 'text', 'is_correct']
 
 
 class QuestionListSerializer(serializers.ModelSerializer):
     """Serializer for listing questions with basic info"""
     teacher = UserProfileSerializer(read_only=True)
     answers = QuestionAnswerSerializer(many=True, read_only=True)
-    usage_count = serializers.SerializerMethodField()
+    tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+    correct_rate = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Question
         fields = ['id', 'question_text', 'type', 'difficulty', 'image_url', 
-                 'teacher', 'created_at', 'answers', 'usage_count']
-        read_only_fields = ['id', 'teacher', 'created_at']
-    
-    def get_usage_count(self, obj):
-        return obj.exam_questions.count()
+                 'teacher', 'created_at', 'answers', 'tags', 'usage_count', 'attempts_count', 'correct_rate']
+        read_only_fields = ['id', 'teacher', 'created_at', 'usage_count', 'attempts_count']
 
 
 class QuestionDetailSerializer(serializers.ModelSerializer):
     """Serializer for question detail view"""
     teacher = UserProfileSerializer(read_only=True)
     answers = QuestionAnswerSerializer(many=True, read_only=True)
-    usage_count = serializers.SerializerMethodField()
+    tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+    correct_rate = serializers.FloatField(read_only=True)
     used_in_exams = serializers.SerializerMethodField()
     
     class Meta:
         model = Question
         fields = ['id', 'question_text', 'type', 'difficulty', 'image_url', 
-                 'teacher', 'created_at', 'answers', 'usage_count', 'used_in_exams']
-        read_only_fields = ['id', 'teacher', 'created_at']
-    
-    def get_usage_count(self, obj):
-        return obj.exam_questions.count()
+                 'teacher', 'created_at', 'answers', 'tags', 'usage_count', 'attempts_count', 'correct_count',
+                 'correct_rate', 'used_in_exams']
+        read_only_fields = ['id', 'teacher', 'created_at', 'usage_count', 'attempts_count', 'correct_count']
     
     def get_used_in_exams(self, obj):
-        exam_questions = obj.exam_questions.all()
+        # One joined query instead of fetching each exam separately
+        exam_questions = obj.exam_questions.order_by('exam_id').values('exam_id', 'exam__title', 'order', 'code')
         return [
             {
-                'id': eq.exam.id,
-                'title': eq.exam.title,
-                'order': eq.order,
-                'code': eq.code
+                'id': eq['exam_id'],
+                'title': eq['exam__title'],
+                'order': eq['order'],
+                'code': eq['code']
             }
             for eq in exam_questions
         ]
@@ -74,56 +90,133 @@ class QuestionDetailSerializer(serializers.ModelSerializer):
 
 class QuestionCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating and updating questions"""
-    answers = QuestionAnswerCreateUpdateSerializer(many=True, required=False)
+    answers = QuestionAnswerItemSerializer(many=True, required=False)
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=100), required=False, max_length=MAX_TAGS_PER_QUESTION
+    )
     
     class Meta:
         model = Question
-        fields = ['question_text', 'type', 'difficulty', 'image_url', 'answers']
+        fields = ['question_text', 'type', 'difficulty', 'image_url', 'answers', 'tags']
+    
+    def validate_answers(self, value):
+        # Ids only matter when updating, new questions create every answer
+        if self.instance is None:
+            return value
+        ids = [answer['id'] for answer in value if answer.get('id') is not None]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each answer id can only appear once")
+        if ids:
+            known = set(self.instance.answers.filter(id__in=ids).values_list('id', flat=True))
+            unknown = sorted(set(ids) - known)
+            if unknown:
+                raise serializers.ValidationError(f"Answers {unknown} do not belong to this question")
+        return value
     
     def create(self, validated_data):
         answers_data = validated_data.pop('answers', [])
+        tags = validated_data.pop('tags', [])
         validated_data['teacher'] = self.context['request'].user
-        question = Question.objects.create(**validated_data)
         
-        # Create answers if provided
-        for answer_data in answers_data:
-            QuestionAnswer.objects.create(question=question, **answer_data)
+        with transaction.atomic():
+            question = Question.objects.create(**validated_data)
+            if tags:
+                set_question_tags(question, tags)
+            
+            # Create answers if provided
+            QuestionAnswer.objects.bulk_create([
+                QuestionAnswer(question=question, text=answer['text'], is_correct=answer.get('is_correct', False))
+                for answer in answers_data
+            ])
         
         return question
     
     def update(self, instance, validated_data):
         answers_data = validated_data.pop('answers', None)
+        tags = validated_data.pop('tags', None)
         
-        # Update question fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Update answers if provided
-        if answers_data is not None:
-            # Delete existing answers
-            instance.answers.all().delete()
+        with transaction.atomic():
+            # Update only the edited fields: a full save would write back the
+            # statistics as read at request start, undoing concurrent increments
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            if validated_data:
+                instance.save(update_fields=list(validated_data))
+            
+            if tags is not None:
+                set_question_tags(instance, tags)
             
-            # Create new answers
-            for answer_data in answers_data:
-                QuestionAnswer.objects.create(question=instance, **answer_data)
+            # Update answers if provided
+            if answers_data is not None:
+                self._sync_answers(instance, answers_data)
         
         return instance
+    
+    def _sync_answers(self, question, answers_data):
+        """
+        Diff the submitted answers against the stored ones: answers sent with
+        an ``id`` are updated in place, answers without one are created and
+        stored answers missing from the payload are deleted. Keeping ids stable
+        preserves students' selections of the answers that were only edited.
+        """
+        existing = {answer.id: answer for answer in question.answers.all()}
+        now = timezone.now()
+        to_update = []
+        to_create = []
+        flipped = []
+        
+        for answer_data in answers_data:
+            answer = existing.pop(answer_data.get('id'), None)
+            text = answer_data['text']
+            is_correct = answer_data.get('is_correct', False)
+            if answer is None:
+                to_create.append(QuestionAnswer(question=question, text=text, is_correct=is_correct))
+            elif answer.text != text or answer.is_correct != is_correct:
+                if answer.is_correct != is_correct:
+                    flipped.append(answer.id)
+                answer.text = text
+                answer.is_correct = is_correct
+                answer.updated_at = now
+                to_update.append(answer)
+        
+        if to_update:
+            QuestionAnswer.objects.bulk_update(to_update, ['text', 'is_correct', 'updated_at'])
+        if to_create:
+            QuestionAnswer.objects.bulk_create(to_create)
+        if flipped:
+            regrade_if_selected(question.id, flipped, 'answer_key_changed')
+        if existing:
+            delete_answers(question, list(existing))
+
+
+def regrade_if_selected(question_id, answer_ids, reason):
+    """Queue a regrade of the question when students selected any of the given answers"""
+    from exam_sessions.models import StudentAnswer
+    from exam_sessions.regrade import queue_regrade
+    
+    if StudentAnswer.objects.filter(selected_answer_id__in=answer_ids).exists():
+        queue_regrade(question_id, reason)
+
+
+def delete_answers(question, answer_ids):
+    """Delete answers, queueing a regrade when students had selected any of them"""
+    # Checked before deleting: StudentAnswer.selected_answer is SET_NULL, the rows survive unlinked
+    regrade_if_selected(question.id, answer_ids, 'answer_removed')
+    QuestionAnswer.objects.filter(id__in=answer_ids).delete()
 
 
 class QuestionMyQuestionsSerializer(serializers.ModelSerializer):
     """Serializer for teacher's own questions list"""
-    answers_count = serializers.SerializerMethodField()
-    usage_count = serializers.SerializerMethodField()
+    tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+    correct_rate = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Question
         fields = ['id', 'question_text', 'type', 'difficulty', 'image_url', 
-                 'created_at', 'answers_count', 'usage_count']
-        read_only_fields = ['id', 'created_at']
-    
-    def get_answers_count(self, obj):
-        return obj.answers.count()
-    
-    def get_usage_count(self, obj):
-        return obj.exam_questions.count()
+                 'created_at', 'tags', 'answers_count', 'usage_count', 'attempts_count', 'correct_rate']
+        read_only_fields = ['id', 'created_at', 'answers_count', 'usage_count', 'attempts_count']
+
+
+class DuplicateCheckSerializer(serializers.Serializer):
+    """Serializer for checking a question text against the bank"""
+    question_text = serializers.CharField()
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Question, QuestionAnswer, QuestionTag
+from . import search, similarity, stats, tags
+
+
+@receiver(post_save, sender=Question)
+def index_question_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.schedule_index(instance.pk)
+        similarity.schedule_index(instance.pk)
+        # Covers answers written in bulk by the question serializers
+        stats.schedule_refresh([instance.pk])
+
+
+@receiver(post_save, sender=QuestionAnswer)
+@receiver(post_delete, sender=QuestionAnswer)
+def index_question_on_answer_change(sender, instance, raw=False, **kwargs):
+    # Reindexing a question that was deleted meanwhile is a no-op
+    if not raw:
+        search.schedule_index(instance.question_id)
+
+
+@receiver(post_save, sender=QuestionAnswer)
+@receiver(post_delete, sender=QuestionAnswer)
+def refresh_stats_on_answer_change(sender, instance, raw=False, created=True, **kwargs):
+    if not raw and created:
+        stats.schedule_refresh([instance.question_id])
+
+
+@receiver(post_save, sender=QuestionTag)
+@receiver(post_delete, sender=QuestionTag)
+def invalidate_tag_postings(sender, instance, raw=False, **kwargs):
+    # Links written in bulk by set_question_tags invalidate their tags themselves
+    if not raw:
+        tags.invalidate_postings([instance.tag_id])
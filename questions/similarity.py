@@ -0,0 +1,255 @@
+"""
+Near-duplicate detection for question texts with MinHash and LSH.
+
+Each question text is normalized (see ``search.normalize``), split into
+character shingles and summarized as a MinHash signature of ``NUM_PERM``
+values. The signature is cut into ``BANDS`` bands of ``ROWS`` values; every
+band is hashed into a ``QuestionLSHBucket`` row. Two questions sharing any
+bucket are candidates, and candidates are confirmed by comparing signatures,
+whose agreement rate estimates the Jaccard similarity of the shingle sets.
+"""
+import hashlib
+import random
+import re
+import struct
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q, Exists, OuterRef
+
+from .batching import on_commit_once
+from .models import Question, QuestionSignature, QuestionLSHBucket
+from .search import normalize
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.7
+MAX_BUCKET_SIZE = 200
+INDEX_BATCH_SIZE = 500
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Fixed seed: signatures must stay comparable across processes and restarts
+_rng = random.Random(20240101)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def shingles(text):
+    """Set of character shingles of the normalized text"""
+    text = _WHITESPACE_RE.sub(' ', normalize(text)).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def compute_signature(text):
+    """MinHash signature of the text as a tuple of NUM_PERM integers"""
+    hashes = [_hash(shingle) for shingle in shingles(text)]
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def band_buckets(signature):
+    """(band, bucket) pairs of a signature"""
+    buckets = []
+    for band in range(BANDS):
+        chunk = struct.pack(f'<{ROWS}I', *signature[band * ROWS:(band + 1) * ROWS])
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'little', signed=True)))
+    return buckets
+
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / NUM_PERM
+
+
+def _pack(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def _unpack(data):
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+def index_questions(question_ids):
+    """(Re)build signatures and LSH buckets of the given questions"""
+    question_ids = list(question_ids)
+    for start in range(0, len(question_ids), INDEX_BATCH_SIZE):
+        _index_batch(question_ids[start:start + INDEX_BATCH_SIZE])
+
+
+def _index_batch(question_ids):
+    texts = Question.objects.filter(id__in=question_ids).values_list('id', 'question_text')
+
+    signatures = []
+    buckets = []
+    for question_id, text in texts:
+        signature = compute_signature(text)
+        signatures.append(QuestionSignature(question_id=question_id, signature=_pack(signature)))
+        buckets.extend(
+            QuestionLSHBucket(question_id=question_id, band=band, bucket=bucket)
+            for band, bucket in band_buckets(signature)
+        )
+
+    with transaction.atomic():
+        QuestionLSHBucket.objects.filter(question_id__in=question_ids).delete()
+        QuestionSignature.objects.filter(question_id__in=question_ids).delete()
+        QuestionSignature.objects.bulk_create(signatures, batch_size=1000)
+        QuestionLSHBucket.objects.bulk_create(buckets, batch_size=1000)
+
+
+def schedule_index(question_id):
+    """Reindex a question once the current transaction commits, once per transaction"""
+    on_commit_once(index_questions, [question_id])
+
+
+def rebuild_index(batch_size=INDEX_BATCH_SIZE):
+    """Rebuild signatures for the whole bank, returns the number of questions indexed"""
+    indexed = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Question.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return indexed
+        _index_batch(ids)
+        indexed += len(ids)
+        last_id = ids[-1]
+
+
+def find_similar(text, exclude_id=None, threshold=DUPLICATE_THRESHOLD, limit=10):
+    """
+    Questions whose text is a near duplicate of ``text``.
+    Returns ``[(question_id, similarity)]`` sorted by decreasing similarity.
+    """
+    signature = compute_signature(text)
+
+    bucket_filter = Q()
+    for band, bucket in band_buckets(signature):
+        bucket_filter |= Q(band=band, bucket=bucket)
+    candidates = QuestionLSHBucket.objects.filter(bucket_filter)
+    if exclude_id is not None:
+        candidates = candidates.exclude(question_id=exclude_id)
+
+    stored = QuestionSignature.objects.filter(
+        question_id__in=candidates.values('question_id')
+    ).values_list('question_id', 'signature')
+
+    matches = []
+    for question_id, data in stored:
+        score = similarity(signature, _unpack(data))
+        if score >= threshold:
+            matches.append((question_id, score))
+    matches.sort(key=lambda match: (-match[1], match[0]))
+    return matches[:limit]
+
+
+def possible_duplicates(text, exclude_id=None, threshold=DUPLICATE_THRESHOLD, limit=10):
+    """``find_similar`` results with the matching questions' text, for API responses"""
+    matches = find_similar(text, exclude_id=exclude_id, threshold=threshold, limit=limit)
+    questions = Question.objects.in_bulk([question_id for question_id, _ in matches])
+    return [
+        {
+            'id': question_id,
+            'question_text': questions[question_id].question_text,
+            'teacher_id': questions[question_id].teacher_id,
+            'similarity': round(score, 2),
+        }
+        for question_id, score in matches
+        if question_id in questions
+    ]
+
+
+def duplicate_clusters(threshold=DUPLICATE_THRESHOLD, queryset=None):
+    """
+    Group the bank into clusters of near-duplicate questions.
+
+    Only questions that share at least one LSH bucket are compared, so the
+    work grows with the number of candidate pairs instead of the bank size
+    squared. Returns a list of clusters ``{'question_ids', 'similarity'}``
+    where ``similarity`` is the lowest confirmed pair similarity inside it.
+    """
+    shared = QuestionLSHBucket.objects.filter(Exists(
+        QuestionLSHBucket.objects.filter(band=OuterRef('band'), bucket=OuterRef('bucket'))
+        .exclude(question_id=OuterRef('question_id'))
+    ))
+    if queryset is not None:
+        shared = shared.filter(question_id__in=queryset.values('id'))
+
+    members = defaultdict(list)
+    for band, bucket, question_id in shared.values_list('band', 'bucket', 'question_id').iterator():
+        members[(band, bucket)].append(question_id)
+
+    pairs = set()
+    for question_ids in members.values():
+        # Degenerate buckets (e.g. many empty texts) would explode into pairs
+        question_ids = sorted(question_ids)[:MAX_BUCKET_SIZE]
+        for i, a in enumerate(question_ids):
+            for b in question_ids[i + 1:]:
+                pairs.add((a, b))
+    if not pairs:
+        return []
+
+    candidate_ids = list({question_id for pair in pairs for question_id in pair})
+    signatures = {}
+    for start in range(0, len(candidate_ids), 1000):
+        stored = QuestionSignature.objects.filter(
+            question_id__in=candidate_ids[start:start + 1000]
+        ).values_list('question_id', 'signature')
+        for question_id, data in stored:
+            signatures[question_id] = _unpack(data)
+
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    confirmed = []
+    for a, b in pairs:
+        if a not in signatures or b not in signatures:
+            continue
+        score = similarity(signatures[a], signatures[b])
+        if score < threshold:
+            continue
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+        confirmed.append((a, score))
+
+    clusters = defaultdict(list)
+    for question_id in list(parent):
+        clusters[find(question_id)].append(question_id)
+
+    lowest = {}
+    for question_id, score in confirmed:
+        root = find(question_id)
+        lowest[root] = min(score, lowest.get(root, score))
+
+    report = [
+        {'question_ids': sorted(question_ids), 'similarity': round(lowest[root], 2)}
+        for root, question_ids in clusters.items()
+    ]
+    report.sort(key=lambda cluster: (-len(cluster['question_ids']), cluster['question_ids'][0]))
+    return report
@@ -0,0 +1,83 @@
+"""
+Denormalized usage statistics of questions.
+
+``Question`` carries ``usage_count`` (exams using it), ``answers_count``,
+``attempts_count`` (answers in submitted sessions) and ``correct_count``.
+Usage and answer counts are recomputed with one set-based UPDATE whenever a
+question, its answers or its exam links change. Attempts are incremented
+when a session is submitted and recomputed after a regrade, since counting
+every student answer on each submission would not scale.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value, IntegerField
+from django.db.models.functions import Coalesce
+
+from .models import Question, QuestionAnswer
+
+REFRESH_BATCH_SIZE = 500
+
+
+def _count(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_field).annotate(n=Count('pk')).values('n'),
+            output_field=IntegerField()
+        ),
+        Value(0)
+    )
+
+
+def stats_expressions(include_attempts=False):
+    """UPDATE expressions recomputing the counters of each question row"""
+    from exams.models import ExamQuestion
+    from exam_sessions.models import StudentAnswer
+
+    expressions = {
+        'usage_count': _count(ExamQuestion.objects.filter(question_id=OuterRef('pk')), 'question_id'),
+        'answers_count': _count(QuestionAnswer.objects.filter(question_id=OuterRef('pk')), 'question_id'),
+    }
+    if include_attempts:
+        attempts = StudentAnswer.objects.filter(
+            exam_question__question_id=OuterRef('pk'), session__status='completed'
+        )
+        expressions['attempts_count'] = _count(attempts, 'exam_question__question_id')
+        expressions['correct_count'] = _count(attempts.filter(is_correct=True), 'exam_question__question_id')
+    return expressions
+
+
+def refresh_question_stats(question_ids, include_attempts=False):
+    """Recompute the counters of the given questions"""
+    question_ids = list(question_ids)
+    for start in range(0, len(question_ids), REFRESH_BATCH_SIZE):
+        Question.objects.filter(id__in=question_ids[start:start + REFRESH_BATCH_SIZE]).update(
+            **stats_expressions(include_attempts)
+        )
+
+
+def schedule_refresh(question_ids, include_attempts=False):
+    """Refresh counters once the current transaction commits"""
+    question_ids = set(question_ids)
+    if question_ids:
+        transaction.on_commit(lambda: refresh_question_stats(question_ids, include_attempts))
+
+
+def record_attempts(question_ids, correct_question_ids):
+    """Count one submitted attempt for each question, and a correct one where it applies"""
+    Question.objects.filter(id__in=list(question_ids)).update(attempts_count=F('attempts_count') + 1)
+    if correct_question_ids:
+        Question.objects.filter(id__in=list(correct_question_ids)).update(correct_count=F('correct_count') + 1)
+
+
+def rebuild_stats(batch_size=REFRESH_BATCH_SIZE):
+    """Recompute every counter of the whole bank, returns the number of questions updated"""
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Question.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return updated
+        Question.objects.filter(id__in=ids).update(**stats_expressions(include_attempts=True))
+        updated += len(ids)
+        last_id = ids[-1]
@@ -0,0 +1,169 @@
+"""
+Question tags and the tag -> question inverted index.
+
+The ids of the questions carrying each tag are cached as a sorted tuple
+(the posting list). Multi-tag queries intersect or merge those lists in
+memory, smallest list first, instead of joining ``question_tags`` once per
+tag. Posting lists are dropped whenever a question gains or loses a tag.
+"""
+import re
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Tag, QuestionTag
+from .search import normalize
+
+POSTINGS_CACHE_TTL = 60 * 60
+MAX_INLINE_IDS = 1000
+MAX_TAGS_PER_QUESTION = 20
+TAG_MODES = ('all', 'any')
+
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+
+def slugify_tag(name):
+    """'Phương trình bậc 2' -> 'phuong-trinh-bac-2'"""
+    return _SLUG_RE.sub('-', normalize(name)).strip('-')[:100]
+
+
+def parse_tags(value):
+    """Split a comma separated query parameter into tag slugs"""
+    slugs = [slugify_tag(name) for name in (value or '').split(',')]
+    return list(dict.fromkeys(slug for slug in slugs if slug))
+
+
+def normalize_mode(mode):
+    """Unknown modes fall back to 'all'"""
+    return mode if mode in TAG_MODES else 'all'
+
+
+def _postings_key(tag_id):
+    return f'questions:tag:{tag_id}:postings'
+
+
+def postings(tag_ids):
+    """``{tag_id: sorted tuple of question ids}``, loading cache misses in one query"""
+    keys = {_postings_key(tag_id): tag_id for tag_id in tag_ids}
+    cached = cache.get_many(list(keys))
+    result = {keys[key]: ids for key, ids in cached.items()}
+
+    missing = [tag_id for tag_id in tag_ids if tag_id not in result]
+    if missing:
+        loaded = {tag_id: [] for tag_id in missing}
+        rows = QuestionTag.objects.filter(tag_id__in=missing).order_by('tag_id', 'question_id')
+        for tag_id, question_id in rows.values_list('tag_id', 'question_id'):
+            loaded[tag_id].append(question_id)
+        loaded = {tag_id: tuple(ids) for tag_id, ids in loaded.items()}
+        cache.set_many({_postings_key(tag_id): ids for tag_id, ids in loaded.items()}, POSTINGS_CACHE_TTL)
+        result.update(loaded)
+
+    return result
+
+
+def invalidate_postings(tag_ids):
+    keys = [_postings_key(tag_id) for tag_id in set(tag_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def tagged_question_ids(slugs, mode='all'):
+    """
+    Sorted ids of the questions tagged with all (``mode='all'``) or any
+    (``mode='any'``) of the given slugs. Unknown slugs match nothing.
+    """
+    mode = normalize_mode(mode)
+    tag_ids = list(Tag.objects.filter(slug__in=slugs).values_list('id', flat=True))
+    if mode == 'all' and len(tag_ids) < len(set(slugs)):
+        return []
+    if not tag_ids:
+        return []
+
+    lists = sorted(postings(tag_ids).values(), key=len)
+    if mode == 'all':
+        matched = set(lists[0])
+        for ids in lists[1:]:
+            matched.intersection_update(ids)
+            if not matched:
+                break
+    else:
+        matched = set().union(*lists)
+    return sorted(matched)
+
+
+def filter_by_tags(queryset, slugs, mode='all'):
+    """Restrict a question queryset to the tag query"""
+    if not slugs:
+        return queryset
+    mode = normalize_mode(mode)
+    question_ids = tagged_question_ids(slugs, mode)
+    if len(question_ids) <= MAX_INLINE_IDS:
+        return queryset.filter(id__in=question_ids)
+
+    # Large results: let the database re-derive them instead of sending thousands of ids
+    links = QuestionTag.objects.filter(tag__slug__in=slugs)
+    if mode == 'all':
+        links = links.values('question_id').annotate(n=Count('tag_id')).filter(n=len(slugs))
+    return queryset.filter(id__in=links.values('question_id'))
+
+
+def set_question_tags(question, names):
+    """Replace the tags of a question, creating unknown tags"""
+    wanted = {}
+    for name in names:
+        slug = slugify_tag(name)
+        if slug:
+            wanted.setdefault(slug, name.strip())
+
+    with transaction.atomic():
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slug) for slug, name in wanted.items()], ignore_conflicts=True
+        )
+        tag_ids = set(Tag.objects.filter(slug__in=wanted).values_list('id', flat=True))
+        current = set(question.question_tags.values_list('tag_id', flat=True))
+
+        removed = current - tag_ids
+        added = tag_ids - current
+        if removed:
+            QuestionTag.objects.filter(question=question, tag_id__in=removed).delete()
+        if added:
+            QuestionTag.objects.bulk_create([QuestionTag(question=question, tag_id=tag_id) for tag_id in added])
+        invalidate_postings(removed | added)
+
+
+def add_tags_bulk(names_by_question):
+    """
+    Tag freshly created questions, ``{question_id: [names]}``, with one
+    query per step for all of them (used by bank imports)
+    """
+    wanted = {}
+    slugs_by_question = {}
+    for question_id, names in names_by_question.items():
+        slugs = []
+        for name in names:
+            slug = slugify_tag(name)
+            if slug:
+                wanted.setdefault(slug, name.strip())
+                slugs.append(slug)
+        slugs_by_question[question_id] = set(slugs)
+    if not wanted:
+        return
+
+    with transaction.atomic():
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slug) for slug, name in wanted.items()], ignore_conflicts=True
+        )
+        tag_ids = dict(Tag.objects.filter(slug__in=wanted).values_list('slug', 'id'))
+        # bulk_create skips the QuestionTag signals, so invalidate here
+        QuestionTag.objects.bulk_create([
+            QuestionTag(question_id=question_id, tag_id=tag_ids[slug])
+            for question_id, slugs in slugs_by_question.items()
+            for slug in slugs
+        ], ignore_conflicts=True, batch_size=1000)
+        invalidate_postings(tag_ids.values())
+
+
+def tag_counts():
+    """All tags with the number of questions carrying them"""
+    return Tag.objects.annotate(question_count=Count('question_tags')).order_by('-question_count', 'slug')
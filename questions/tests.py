@@ -1,3 +1,389 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase, APIClient
+from accounts.models import User
+from questions.models import Question, QuestionAnswer, QuestionSearchToken
+from questions.search import tokenize
+from questions import search, similarity
+
+
+class QuestionSearchTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_search@example.com', email='teacher_search@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.capital = Question.objects.create(
+                question_text='Thủ đô của Việt Nam là thành phố nào?', teacher=self.teacher
+            )
+            QuestionAnswer.objects.create(question=self.capital, text='Hà Nội', is_correct=True)
+            self.river = Question.objects.create(
+                question_text='Sông nào dài nhất Việt Nam?', teacher=self.teacher
+            )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def search(self, query):
+        resp = self.client.get('/questions/', {'search': query})
+        self.assertEqual(resp.status_code, 200)
+        return [row['id'] for row in resp.data['data']['results']]
+
+    def test_tokenize_folds_vietnamese_diacritics(self):
+        self.assertEqual(tokenize('Thủ đô Hà Nội'), ['thu', 'do', 'ha', 'noi'])
+
+    def test_search_matches_all_terms_with_or_without_accents(self):
+        self.assertEqual(self.search('viet nam'), self.search('Việt Nam'))
+        self.assertCountEqual(self.search('viet nam'), [self.capital.id, self.river.id])
+        self.assertEqual(self.search('thu do'), [self.capital.id])
+        # Answer text is indexed as well
+        self.assertEqual(self.search('ha noi'), [self.capital.id])
+        self.assertEqual(self.search('thu do song'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.river.question_text = 'Sông Mê Kông chảy qua bao nhiêu quốc gia?'
+            self.river.save()
+        self.assertEqual(self.search('me kong'), [self.river.id])
+        self.assertEqual(self.search('dai nhat'), [])
+
+        river_id = self.river.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.river.delete()
+        self.assertFalse(QuestionSearchToken.objects.filter(question_id=river_id).exists())
+
+    def test_question_saved_with_answers_is_reindexed_once(self):
+        with mock.patch.object(search, 'index_questions', wraps=search.index_questions) as index_questions, \
+                self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.create(question_text='Núi nào cao nhất Việt Nam?', teacher=self.teacher)
+            for text in ('Fansipan', 'Pu Ta Leng', 'Bạch Mộc Lương Tử'):
+                QuestionAnswer.objects.create(question=question, text=text)
+        index_questions.assert_called_once_with([question.id])
+        self.assertEqual(self.search('fansipan'), [question.id])
+
+
+class QuestionBankImportExportTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_import@example.com', email='teacher_import@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_import_reports_bad_rows_and_export_round_trips(self):
+        lines = [
+            json.dumps({
+                'question_text': '2 + 2 = ?',
+                'difficulty': 'easy',
+                'answers': [{'text': '4', 'is_correct': True}, {'text': '5', 'is_correct': False}],
+                'tags': ['Arithmetic', 'Grade 1'],
+            }),
+            json.dumps({'question_text': 'Broken', 'difficulty': 'impossible'}),
+            'not json',
+            json.dumps({'question_text': 'Explain gravity', 'type': 'essay'}),
+        ]
+        upload = SimpleUploadedFile('bank.jsonl', '\n'.join(lines).encode('utf-8'))
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/questions/import/', {'file': upload}, format='multipart')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['data']['created'], 2)
+        self.assertEqual([e['row'] for e in resp.data['data']['errors']], [2, 3])
+
+        question = Question.objects.get(question_text='2 + 2 = ?')
+        self.assertEqual(question.answers.filter(is_correct=True).get().text, '4')
+        # Bulk-imported questions are searchable
+        self.assertTrue(QuestionSearchToken.objects.filter(question=question).exists())
+
+        resp = self.client.get('/questions/export/', {'file_format': 'csv', 'mine': 'true'})
+        self.assertEqual(resp.status_code, 200)
+        exported = b''.join(resp.streaming_content)
+
+        upload = SimpleUploadedFile('bank.csv', exported)
+        resp = self.client.post('/questions/import/', {'file': upload}, format='multipart')
+        self.assertEqual(resp.data['data']['created'], 2)
+        self.assertEqual(Question.objects.filter(question_text='2 + 2 = ?').count(), 2)
+        self.assertEqual(QuestionAnswer.objects.filter(question__question_text='2 + 2 = ?').count(), 4)
+        # Tags survive the round trip
+        for copy in Question.objects.filter(question_text='2 + 2 = ?'):
+            self.assertEqual(sorted(copy.tags.values_list('slug', flat=True)), ['arithmetic', 'grade-1'])
+
+
+class QuestionDuplicateDetectionTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_dup@example.com', email='teacher_dup@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.original = Question.objects.create(
+                question_text='Which planet in our solar system is known as the red planet?',
+                teacher=self.teacher,
+            )
+            self.unrelated = Question.objects.create(
+                question_text='Who wrote the novel War and Peace?', teacher=self.teacher
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_signature_similarity_tracks_text_overlap(self):
+        a = similarity.compute_signature('Which planet is known as the red planet?')
+        b = similarity.compute_signature('Which planet is known as the Red Planet ?')
+        c = similarity.compute_signature('Who wrote the novel War and Peace?')
+        self.assertGreaterEqual(similarity.similarity(a, b), 0.7)
+        self.assertLess(similarity.similarity(a, c), 0.3)
+
+    def test_create_reports_possible_duplicates_and_report_clusters_them(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/questions/', {
+                'question_text': 'Which planet in our solar system is known as the Red Planet ?',
+            }, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual([d['id'] for d in resp.data['possible_duplicates']], [self.original.id])
+
+        resp = self.client.get('/questions/duplicates/')
+        self.assertEqual(resp.status_code, 200)
+        clusters = resp.data['data']['clusters']
+        self.assertEqual(len(clusters), 1)
+        self.assertIn(self.original.id, clusters[0]['question_ids'])
+        self.assertNotIn(self.unrelated.id, clusters[0]['question_ids'])
+
+    def test_check_duplicates_validates_the_text(self):
+        resp = self.client.post('/questions/check-duplicates/', {
+            'question_text': 'Which planet in our solar system is known as the Red Planet ?',
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([d['id'] for d in resp.data['data']['possible_duplicates']], [self.original.id])
+
+        for question_text in ('   ', ['text'], {'text': 'x'}, None):
+            resp = self.client.post('/questions/check-duplicates/', {'question_text': question_text}, format='json')
+            self.assertEqual(resp.status_code, 400)
+            self.assertIn('question_text', resp.data['errors'])
+
+
+class QuestionAnswerDiffTest(APITestCase):
+    def setUp(self):
+        from exam_sessions.models import ExamSession, StudentAnswer
+        from exams.models import Exam, ExamQuestion
+        from classes.models import Class
+        from django.utils import timezone
+
+        self.teacher = User.objects.create_user(
+            username='teacher_diff@example.com', email='teacher_diff@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        student = User.objects.create_user(
+            username='student_diff@example.com', email='student_diff@example.com',
+            password='pass', fullName='Student', role='student'
+        )
+        self.question = Question.objects.create(question_text='2 + 2 = ?', teacher=self.teacher)
+        self.right = QuestionAnswer.objects.create(question=self.question, text='4', is_correct=True)
+        self.wrong = QuestionAnswer.objects.create(question=self.question, text='5')
+
+        now = timezone.now()
+        exam = Exam.objects.create(
+            class_obj=Class.objects.create(className='Diff', teacher=self.teacher),
+            title='Quiz', minutes=10, start_time=now, end_time=now + timezone.timedelta(hours=1),
+            created_by=self.teacher,
+        )
+        exam_question = ExamQuestion.objects.create(exam=exam, question=self.question, order=1)
+        session = ExamSession.objects.create(
+            exam=exam, student=student, code='DIFF-1', start_time=now
+        )
+        self.selections = [
+            StudentAnswer.objects.create(
+                session=session, exam_question=exam_question, selected_answer=self.right, is_correct=True
+            ),
+        ]
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_update_keeps_answer_ids_and_student_selections(self):
+        from exam_sessions.models import RegradeJob
+
+        resp = self.client.put(f'/questions/{self.question.id}/', {
+            'question_text': '2 + 2 = ?',
+            'answers': [
+                {'id': self.right.id, 'text': 'Four', 'is_correct': True},
+                {'text': '22', 'is_correct': False},
+            ],
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+
+        self.assertEqual(QuestionAnswer.objects.get(id=self.right.id).text, 'Four')
+        self.assertFalse(QuestionAnswer.objects.filter(id=self.wrong.id).exists())
+        self.assertEqual(self.question.answers.count(), 2)
+        self.selections[0].refresh_from_db()
+        self.assertEqual(self.selections[0].selected_answer_id, self.right.id)
+        # Nobody had picked the removed answer
+        self.assertFalse(RegradeJob.objects.exists())
+
+        resp = self.client.put(f'/questions/{self.question.id}/', {
+            'question_text': '2 + 2 = ?', 'answers': [{'text': '4', 'is_correct': True}],
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.selections[0].refresh_from_db()
+        self.assertIsNone(self.selections[0].selected_answer_id)
+        self.assertEqual(RegradeJob.objects.filter(question=self.question).count(), 1)
+
+    def test_update_rejects_foreign_answer_ids(self):
+        other = Question.objects.create(question_text='Other', teacher=self.teacher)
+        foreign = QuestionAnswer.objects.create(question=other, text='x')
+        resp = self.client.put(f'/questions/{self.question.id}/', {
+            'question_text': '2 + 2 = ?', 'answers': [{'id': foreign.id, 'text': 'y'}],
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(QuestionAnswer.objects.get(id=foreign.id).text, 'x')
+
+
+class QuestionStatsTest(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher_stats@example.com', email='teacher_stats@example.com',
+            password='pass', fullName='Teacher', role='teacher'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_counters_follow_answers_exam_links_and_attempts(self):
+        from django.utils import timezone
+        from classes.models import Class
+        from exams.models import Exam, ExamQuestion
+        from questions import stats
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/questions/', {
+                'question_text': 'Largest ocean?',
+                'answers': [{'text': 'Pacific', 'is_correct': True}, {'text': 'Atlantic'}],
+            }, format='json')
+        question = Question.objects.get(id=resp.data['data']['id'])
+        self.assertEqual((question.answers_count, question.usage_count), (2, 0))
+
+        now = timezone.now()
+        class_obj = Class.objects.create(className='Stats', teacher=self.teacher)
+        exams = [
+            Exam.objects.create(
+                class_obj=class_obj, title=f'Exam {i}', minutes=10, start_time=now,
+                end_time=now + timezone.timedelta(hours=1), created_by=self.teacher,
+            )
+            for i in range(2)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for exam in exams:
+                ExamQuestion.objects.create(exam=exam, question=question, order=1, code='Q1')
+        stats.record_attempts([question.id], [question.id])
+        stats.record_attempts([question.id], [])
+
+        resp = self.client.get(f'/questions/{question.id}/')
+        data = resp.data['data']
+        self.assertEqual((data['usage_count'], data['attempts_count'], data['correct_rate']), (2, 2, 50.0))
+        self.assertEqual(sorted(e['title'] for e in data['used_in_exams']), ['Exam 0', 'Exam 1'])
+
+        # A full rebuild counts attempts from submitted sessions only, there are none here
+        stats.rebuild_stats()
+        question.refresh_from_db()
+        self.assertEqual((question.usage_count, question.answers_count, question.attempts_count), (2, 2, 0))
+
+    def test_editing_keeps_attempts_recorded_meanwhile(self):
+        from questions import stats
+        from questions.serializers import QuestionCreateUpdateSerializer
+
+        question = Question.objects.create(question_text='Capital of Peru?', teacher=self.teacher)
+        serializer = QuestionCreateUpdateSerializer(question, data={'question_text': 'Capital of Peru'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        # An answer is submitted while the teacher's edit is in flight
+        stats.record_attempts([question.id], [question.id])
+        serializer.save()
+
+        question.refresh_from_db()
+        self.assertEqual((question.question_text, question.attempts_count, question.correct_count), ('Capital of Peru', 1, 1))
+
+
+class QuestionFacetTest(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.teacher = User.objects.create_user(
+            username='teacher_facets@example.com', email='teacher_facets@example.com',
+            password='pass', fullName='Facet Teacher', role='teacher'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for question_type, difficulty in [
+                ('multiple_choice', 'easy'), ('multiple_choice', 'hard'), ('essay', 'easy'), ('essay', 'easy'),
+            ]:
+                Question.objects.create(
+                    question_text=f'Geography {question_type} {difficulty}', type=question_type,
+                    difficulty=difficulty, teacher=self.teacher
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def facet_counts(self, resp, name):
+        return {facet['value']: facet['count'] for facet in resp.data['data']['facets'][name] if facet['count']}
+
+    def test_facets_count_alternatives_to_each_selected_filter(self):
+        resp = self.client.get('/questions/', {'facets': 'true', 'type': 'essay', 'search': 'geography'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['data']['count'], 2)
+        # The type facet ignores the type filter itself, difficulty respects it
+        self.assertEqual(self.facet_counts(resp, 'type'), {'multiple_choice': 2, 'essay': 2})
+        self.assertEqual(self.facet_counts(resp, 'difficulty'), {'easy': 2})
+        self.assertEqual(self.facet_counts(resp, 'teacher'), {self.teacher.id: 2})
+
+        resp = self.client.get('/questions/')
+        self.assertNotIn('facets', resp.data['data'])
+
+
+class QuestionTagTest(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.teacher = User.objects.create_user(
+            username='teacher_tags@example.com', email='teacher_tags@example.com',
+            password='pass', fullName='Tag Teacher', role='teacher'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def create(self, text, tags):
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/questions/', {
+                'question_text': text, 'type': 'essay', 'difficulty': 'easy', 'tags': tags
+            }, format='json')
+        self.assertEqual(resp.status_code, 201)
+        return resp.data['data']['id']
+
+    def listed(self, **params):
+        resp = self.client.get('/questions/', params)
+        self.assertEqual(resp.status_code, 200)
+        return {question['id'] for question in resp.data['data']['results']}
+
+    def test_tag_filters_follow_tag_changes(self):
+        both = self.create('Solve x + 1 = 2', ['Đại số', 'Phương trình'])
+        algebra = self.create('Expand (a + b)^2', ['dai so'])
+
+        self.assertEqual(self.listed(tags='dai-so,phuong-trinh'), {both})
+        self.assertEqual(self.listed(tags='dai-so,phuong-trinh', tag_mode='any'), {both, algebra})
+        self.assertEqual(self.listed(tags='unknown'), set())
+
+        # Replacing the tags drops the cached posting lists
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.put(f'/questions/{algebra}/', {
+                'question_text': 'Expand (a + b)^2', 'type': 'essay', 'difficulty': 'easy',
+                'tags': ['Phương trình', 'Đại số']
+            }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(sorted(resp.data['data']['tags']), ['Phương trình', 'Đại số'])
+        self.assertEqual(self.listed(tags='dai-so,phuong-trinh'), {both, algebra})
+
+        resp = self.client.get('/questions/tags/')
+        self.assertEqual(
+            [(tag['slug'], tag['question_count']) for tag in resp.data['data']],
+            [('dai-so', 2), ('phuong-trinh', 2)]
+        )
@@ -7,6 +7,11 @@ urlpatterns = [
     # Question management endpoints
     path('', views.question_list_create, name='question_list_create'),
     path('my-questions/', views.my_questions, name='my_questions'),
+    path('import/', views.import_questions, name='import_questions'),
+    path('check-duplicates/', views.check_duplicates, name='check_duplicates'),
+    path('duplicates/', views.duplicate_report, name='duplicate_report'),
+    path('export/', views.export_questions, name='export_questions'),
+    path('tags/', views.tag_list, name='tag_list'),
     path('<int:question_id>/', views.question_detail, name='question_detail'),
     
     # Answer management endpoints
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.contrib.auth import get_user_model
 
 from .models import Question, QuestionAnswer
@@ -13,8 +14,14 @@ from .serializers import (
     QuestionCreateUpdateSerializer,
     QuestionMyQuestionsSerializer,
     QuestionAnswerSerializer,
-    QuestionAnswerCreateUpdateSerializer
+    QuestionAnswerCreateUpdateSerializer,
+    DuplicateCheckSerializer,
+    delete_answers
 )
+from .search import search_questions
+from .facets import question_facets
+from .tags import parse_tags, filter_by_tags, tag_counts, slugify_tag
+from . import bank_io, similarity
 from .permissions import (
     IsTeacherOrReadOnly,
     IsQuestionOwner,
@@ -46,7 +53,7 @@ def question_list_create(request):
                 'message': 'Only teachers can view all questions'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        questions = Question.objects.all()
+        questions = Question.objects.select_related('teacher').prefetch_related('answers', 'tags')
         
         # Apply filters
         type_filter = request.GET.get('type')
@@ -61,9 +68,14 @@ def question_list_create(request):
         if teacher_id:
             questions = questions.filter(teacher_id=teacher_id)
         
+        tags = parse_tags(request.GET.get('tags'))
+        tag_mode = request.GET.get('tag_mode', 'all')
+        if tags:
+            questions = filter_by_tags(questions, tags, tag_mode)
+        
         search = request.GET.get('search', '')
         if search:
-            questions = questions.filter(question_text__icontains=search)
+            questions = search_questions(questions, search)
         
         # Apply pagination
         paginator = CustomPagination()
@@ -71,21 +83,27 @@ def question_list_create(request):
         
         if page is not None:
             serializer = QuestionListSerializer(page, many=True)
-            paginated_response = paginator.get_paginated_response(serializer.data)
-            return Response({
-                'success': True,
-                'data': paginated_response.data
-            })
-        
-        serializer = QuestionListSerializer(questions, many=True)
-        return Response({
-            'success': True,
-            'data': {
+            data = paginator.get_paginated_response(serializer.data).data
+        else:
+            serializer = QuestionListSerializer(questions, many=True)
+            data = {
                 'results': serializer.data,
                 'count': questions.count(),
                 'page': 1,
                 'total_pages': 1
             }
+        
+        if request.GET.get('facets') == 'true':
+            data['facets'] = question_facets(
+                {'type': type_filter, 'difficulty': difficulty_filter, 'teacher_id': teacher_id},
+                search=search,
+                tags=tags,
+                tag_mode=tag_mode
+            )
+        
+        return Response({
+            'success': True,
+            'data': data
         })
     
     elif request.method == 'POST':
@@ -96,6 +114,9 @@ def question_list_create(request):
             return Response({
                 'success': True,
                 'data': response_serializer.data,
+                'possible_duplicates': similarity.possible_duplicates(
+                    question.question_text, exclude_id=question.id
+                ),
                 'message': 'Question created successfully'
             }, status=status.HTTP_201_CREATED)
         
@@ -114,7 +135,7 @@ def question_detail(request, question_id):
     PUT: Update question (teachers only)
     DELETE: Delete question (teachers only)
     """
-    question = get_object_or_404(Question, id=question_id)
+    question = get_object_or_404(Question.objects.select_related('teacher'), id=question_id)
     
     if request.method == 'GET':
         serializer = QuestionDetailSerializer(question)
@@ -174,7 +195,7 @@ def my_questions(request):
             'message': 'Only teachers can view their questions'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    questions = Question.objects.filter(teacher=request.user)
+    questions = Question.objects.filter(teacher=request.user).prefetch_related('tags')
     
     # Apply filters
     type_filter = request.GET.get('type')
@@ -185,9 +206,13 @@ def my_questions(request):
     if difficulty_filter:
         questions = questions.filter(difficulty=difficulty_filter)
     
+    tags = parse_tags(request.GET.get('tags'))
+    if tags:
+        questions = filter_by_tags(questions, tags, request.GET.get('tag_mode', 'all'))
+    
     search = request.GET.get('search', '')
     if search:
-        questions = questions.filter(question_text__icontains=search)
+        questions = search_questions(questions, search)
     
     # Apply pagination
     paginator = CustomPagination()
@@ -213,6 +238,157 @@ def my_questions(request):
     })
 
 
+@api_view(['POST'])
+@permission_classes([IsTeacherOrReadOnly])
+def check_duplicates(request):
+    """
+    POST: Find existing questions that are near duplicates of a question text (teachers only)
+    """
+    serializer = DuplicateCheckSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors,
+            'message': 'question_text is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'data': {
+            'possible_duplicates': similarity.possible_duplicates(serializer.validated_data['question_text'])
+        }
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def duplicate_report(request):
+    """
+    GET: Clusters of near-duplicate questions in the bank (teachers only)
+    """
+    if request.user.role != 'teacher':
+        return Response({
+            'success': False,
+            'message': 'Only teachers can view the duplicate report'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    questions = Question.objects.all()
+    if request.GET.get('mine') == 'true':
+        questions = questions.filter(teacher=request.user)
+    
+    try:
+        threshold = float(request.GET.get('threshold', similarity.DUPLICATE_THRESHOLD))
+    except ValueError:
+        threshold = similarity.DUPLICATE_THRESHOLD
+    
+    clusters = similarity.duplicate_clusters(threshold=threshold, queryset=questions)
+    return Response({
+        'success': True,
+        'data': {
+            'clusters': clusters,
+            'count': len(clusters)
+        }
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsTeacherOrReadOnly])
+def import_questions(request):
+    """
+    POST: Import a CSV/JSONL question bank for the current teacher
+    """
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({
+            'success': False,
+            'message': 'A file is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    file_format = request.data.get('file_format') or bank_io.detect_format(upload.name)
+    if file_format not in bank_io.FORMATS:
+        return Response({
+            'success': False,
+            'message': f'Unsupported file format, use one of: {", ".join(bank_io.FORMATS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    records = bank_io.read_records(bank_io.open_text(upload.file), file_format)
+    report = bank_io.import_questions(records, request.user)
+    
+    return Response({
+        'success': report['failed'] == 0,
+        'data': report,
+        'message': f"Imported {report['created']} questions, {report['failed']} rows rejected"
+    }, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_questions(request):
+    """
+    GET: Stream the question bank as CSV/JSONL (teachers only)
+    """
+    if request.user.role != 'teacher':
+        return Response({
+            'success': False,
+            'message': 'Only teachers can export questions'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    file_format = request.GET.get('file_format', 'jsonl')
+    if file_format not in bank_io.FORMATS:
+        return Response({
+            'success': False,
+            'message': f'Unsupported file format, use one of: {", ".join(bank_io.FORMATS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    questions = Question.objects.all()
+    
+    # Apply filters
+    if request.GET.get('mine') == 'true':
+        questions = questions.filter(teacher=request.user)
+    
+    type_filter = request.GET.get('type')
+    if type_filter:
+        questions = questions.filter(type=type_filter)
+    
+    difficulty_filter = request.GET.get('difficulty')
+    if difficulty_filter:
+        questions = questions.filter(difficulty=difficulty_filter)
+    
+    content_type = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(
+        bank_io.export_questions(questions, file_format),
+        content_type=f'{content_type}; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="questions.{file_format}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def tag_list(request):
+    """
+    GET: All tags with the number of questions carrying them
+    """
+    if request.user.role != 'teacher':
+        return Response({
+            'success': False,
+            'message': 'Only teachers can view question tags'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    tags = tag_counts()
+    search = request.GET.get('search', '')
+    if search:
+        tags = tags.filter(slug__contains=slugify_tag(search))
+    
+    return Response({
+        'success': True,
+        'data': [
+            {'id': tag.id, 'name': tag.name, 'slug': tag.slug, 'question_count': tag.question_count}
+            for tag in tags
+        ]
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAnswerOwner])
 def add_answer(request, question_id):
@@ -294,7 +470,7 @@ def delete_answer(request, question_id, answer_id):
             'message': 'You can only delete answers to your own questions'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    answer.delete()
+    delete_answers(question, [answer.id])
     return Response({
         'success': True,
         'message': 'Answer deleted successfully'